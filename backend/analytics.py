@@ -0,0 +1,243 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from collections import defaultdict
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_COLLECTION = "analytics_rollups"
+
+# Bucket name -> (length, _id time format). The formats sort in time order, so
+# range reads are a scan of the _id index.
+ROLLUP_BUCKETS = {
+    "hour": (timedelta(hours=1), "%Y-%m-%dT%H"),
+    "day": (timedelta(days=1), "%Y-%m-%d")
+}
+# Ticket fields the rollups are broken down by
+GROUP_BY_FIELDS = ["status", "deviceBrand", "issueCategory", "priority"]
+MAX_TIMESERIES_POINTS = 2000
+UNKNOWN_KEY = "unknown"
+
+Deltas = Dict[str, Dict[str, float]]
+
+def _status(document: Dict[str, Any]) -> Optional[str]:
+    status = document.get("status")
+    return getattr(status, "value", status)
+
+def rollup_key(value: Any) -> str:
+    """Field-name-safe form of a group value; '.' and '$' would split or break $inc paths."""
+    key = str(getattr(value, "value", value)) if value not in (None, "") else UNKNOWN_KEY
+    return key.replace(".", "．").replace("$", "＄")
+
+def group_value(key: str) -> str:
+    return key.replace("．", ".").replace("＄", "$")
+
+def bucket_start(at: datetime, bucket: str) -> datetime:
+    if bucket == "hour":
+        return at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def bucket_id(at: datetime, bucket: str) -> str:
+    return f"{bucket}:{at.strftime(ROLLUP_BUCKETS[bucket][1])}"
+
+def _contributions(document: Dict[str, Any]) -> List[Tuple[datetime, Dict[str, float]]]:
+    """What a single repair request adds to the rollups, keyed by the time it is counted at."""
+    contributions = []
+    created_at = document.get("createdAt")
+    if created_at:
+        # Breakdowns describe the tickets created in a bucket, with their current values
+        created = {"created": 1}
+        for field in GROUP_BY_FIELDS:
+            value = _status(document) if field == "status" else document.get(field)
+            created[f"by_{field}.{rollup_key(value)}"] = 1
+        contributions.append((created_at, created))
+
+    completed_at = document.get("completedAt")
+    if _status(document) == "Completed" and completed_at:
+        # Revenue and turnaround belong to the bucket the repair was completed in
+        completed = {"completed": 1}
+        if document.get("actualCost") is not None:
+            completed["revenue"] = document["actualCost"]
+        if created_at:
+            completed["turnaround_count"] = 1
+            completed["turnaround_seconds"] = (completed_at - created_at).total_seconds()
+        contributions.append((completed_at, completed))
+    return contributions
+
+def rollup_deltas(transitions: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> Deltas:
+    """Net rollup changes per bucket document for a list of (before, after) documents."""
+    deltas: Deltas = defaultdict(lambda: defaultdict(int))
+    for before, after in transitions:
+        for document, sign in ((before, -1), (after, 1)):
+            if document is None:
+                continue
+            for at, contribution in _contributions(document):
+                for bucket in ROLLUP_BUCKETS:
+                    fields = deltas[bucket_id(at, bucket)]
+                    for field, value in contribution.items():
+                        fields[field] += sign * value
+
+    return {
+        rollup_id: changed
+        for rollup_id, fields in deltas.items()
+        if (changed := {field: value for field, value in fields.items() if value})
+    }
+
+def _rollup_writes(deltas: Deltas) -> List[UpdateOne]:
+    writes = []
+    for rollup_id, fields in deltas.items():
+        bucket, _, key = rollup_id.partition(":")
+        writes.append(UpdateOne(
+            {"_id": rollup_id},
+            {
+                # The version lets a rebuild detect writes that raced with it
+                "$inc": {**fields, "version": 1},
+                "$setOnInsert": {"bucket": bucket, "start": datetime.strptime(key, ROLLUP_BUCKETS[bucket][1])}
+            },
+            upsert=True
+        ))
+    return writes
+
+async def apply_rollups(db: AsyncIOMotorDatabase, transitions: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]):
+    """Fold ticket changes into the hourly and daily rollups in one round trip."""
+    writes = _rollup_writes(rollup_deltas(transitions))
+    if writes:
+        await db[ROLLUPS_COLLECTION].bulk_write(writes, ordered=False)
+
+async def rebuild_rollups(db: AsyncIOMotorDatabase, batch_size: int = 1000) -> int:
+    """Recompute every rollup from the stored repair requests and merge the corrections into the live ones.
+
+    Corrections are $inc deltas against a snapshot taken before the scan, applied only to rollups
+    no write touched meanwhile; the others keep their live counts and the log says how many to rerun.
+    """
+    snapshot = {rollup["_id"]: rollup async for rollup in db[ROLLUPS_COLLECTION].find({})}
+
+    projection = {"_id": 0, "createdAt": 1, "completedAt": 1, "actualCost": 1, **{field: 1 for field in GROUP_BY_FIELDS}}
+    totals: Deltas = defaultdict(lambda: defaultdict(int))
+    count = 0
+    batch = []
+    async for document in db.repair_requests.find({}, projection).batch_size(batch_size):
+        batch.append((None, document))
+        if len(batch) >= batch_size:
+            count += _accumulate(totals, batch)
+            batch = []
+    count += _accumulate(totals, batch)
+
+    inserts, corrections = [], []
+    for rollup_id in set(totals) | set(snapshot):
+        actual = totals.get(rollup_id, {})
+        live = snapshot.get(rollup_id)
+        if live is None:
+            bucket, _, key = rollup_id.partition(":")
+            # Only inserted if still missing; one created since the snapshot already holds live counts
+            inserts.append(UpdateOne(
+                {"_id": rollup_id},
+                {"$setOnInsert": {**_nest(actual), "bucket": bucket, "start": datetime.strptime(key, ROLLUP_BUCKETS[bucket][1]), "version": 0}},
+                upsert=True
+            ))
+            continue
+        stored = _flatten(live)
+        changed = {field: actual.get(field, 0) - stored.get(field, 0) for field in set(actual) | set(stored)}
+        changed = {field: value for field, value in changed.items() if value}
+        if changed:
+            # Matched on the snapshot's version, so a rollup changed since then is left alone
+            corrections.append(UpdateOne({"_id": rollup_id, "version": live.get("version")}, {"$inc": {**changed, "version": 1}}))
+
+    applied = await _write_batches(db, inserts, batch_size, "nUpserted") + await _write_batches(db, corrections, batch_size, "nMatched")
+    skipped = len(inserts) + len(corrections) - applied
+
+    logger.info(f"Corrected {applied} analytics rollups from {count} repair requests")
+    if skipped:
+        logger.warning(f"{skipped} analytics rollups changed during the rebuild and were left as they are; run it again to correct them")
+    return count
+
+async def _write_batches(db: AsyncIOMotorDatabase, writes: List[UpdateOne], batch_size: int, counted: str) -> int:
+    applied = 0
+    for start in range(0, len(writes), batch_size):
+        try:
+            result = (await db[ROLLUPS_COLLECTION].bulk_write(writes[start:start + batch_size], ordered=False)).bulk_api_result
+        except BulkWriteError as e:
+            # Two upserts of the same new rollup race on _id; the other one's counts stand
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            result = e.details
+        applied += result.get(counted, 0)
+    return applied
+
+def _flatten(rollup: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    fields = {}
+    for field, value in rollup.items():
+        if not prefix and field in ("_id", "bucket", "start", "version"):
+            continue
+        if isinstance(value, dict):
+            fields.update(_flatten(value, f"{prefix}{field}."))
+        else:
+            fields[f"{prefix}{field}"] = value
+    return fields
+
+def _nest(fields: Dict[str, float]) -> Dict[str, Any]:
+    document: Dict[str, Any] = {}
+    for field, value in fields.items():
+        parent, _, child = field.partition(".")
+        if child:
+            document.setdefault(parent, {})[child] = value
+        else:
+            document[parent] = value
+    return document
+
+def _accumulate(totals: Deltas, batch: List[Tuple[None, Dict[str, Any]]]) -> int:
+    for rollup_id, fields in rollup_deltas(batch).items():
+        for field, value in fields.items():
+            totals[rollup_id][field] += value
+    return len(batch)
+
+async def get_timeseries(
+    db: AsyncIOMotorDatabase,
+    start: datetime,
+    end: datetime,
+    bucket: str,
+    group_by: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """One point per bucket in [start, end), zero-filled, read from the rollups."""
+    step = ROLLUP_BUCKETS[bucket][0]
+    starts = []
+    at = bucket_start(start, bucket)
+    while at < end:
+        starts.append(at)
+        at += step
+    if not starts:
+        return []
+
+    projection = {"_id": 1, "created": 1, "completed": 1, "revenue": 1, "turnaround_count": 1, "turnaround_seconds": 1}
+    if group_by:
+        projection[f"by_{group_by}"] = 1
+    rollups = {
+        rollup["_id"]: rollup
+        async for rollup in db[ROLLUPS_COLLECTION].find(
+            {"_id": {"$gte": bucket_id(starts[0], bucket), "$lte": bucket_id(starts[-1], bucket)}},
+            projection
+        )
+    }
+
+    points = []
+    for at in starts:
+        rollup = rollups.get(bucket_id(at, bucket), {})
+        turnaround_count = rollup.get("turnaround_count", 0)
+        point = {
+            "start": at,
+            "created": int(rollup.get("created", 0)),
+            "completed": int(rollup.get("completed", 0)),
+            "revenue": round(rollup.get("revenue", 0), 2),
+            "avg_turnaround_hours": round(rollup["turnaround_seconds"] / turnaround_count / 3600, 2) if turnaround_count else None
+        }
+        if group_by:
+            point["groups"] = {
+                group_value(key): int(count)
+                for key, count in (rollup.get(f"by_{group_by}") or {}).items()
+                if count
+            }
+        points.append(point)
+    return points
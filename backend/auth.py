@@ -1,20 +1,76 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Deque, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import asyncio
+import calendar
+import hashlib
+import ipaddress
 import os
+import time
+import uuid
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from .models import AdminUser, AdminResponse
+from .database import get_database
+from .cache import auth_cache, cache_invalidator
+from .metrics import auth_token_verify_duration_seconds, auth_password_verify_duration_seconds
 
 # Security configurations
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'fixnet_super_secret_key_change_in_production_2025')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 
+# Verified tokens are trusted for this long before being re-checked
+TOKEN_CACHE_TTL_SECONDS = 300
+ADMIN_CACHE_TTL_SECONDS = 30
+# Without shared invalidation, other workers only learn of a logout, deactivation or
+# password change when their cached entry expires, so keep that window short
+LOCAL_AUTH_CACHE_TTL_SECONDS = 5
+
+# Stream tickets stand in for the bearer token where it would end up in a URL
+STREAM_TICKET_PURPOSE = "events"
+STREAM_TICKET_TTL_SECONDS = 60
+
+# Password hashing pool: bcrypt runs off the event loop with a bounded backlog
+AUTH_HASH_WORKERS = int(os.environ.get("AUTH_HASH_WORKERS", "2"))
+AUTH_HASH_MAX_QUEUE = int(os.environ.get("AUTH_HASH_MAX_QUEUE", "16"))
+
+# Login throttling: failed attempts allowed per window
+LOGIN_WINDOW_SECONDS = 300
+LOGIN_MAX_FAILURES_PER_EMAIL = 5
+LOGIN_MAX_FAILURES_PER_IP = 20
+# Proxies (addresses or CIDR ranges) whose X-Forwarded-For is trusted to name the client
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in os.environ.get("TRUSTED_PROXIES", "").split(",")
+    if proxy.strip()
+]
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+_hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_jobs = 0
+
+class AuthBusyError(Exception):
+    """Raised when the password hashing pool has no room for more work."""
+
+async def _run_hash_job(fn, *args):
+    """Run a bcrypt call in the hashing pool, refusing work past the queue cap."""
+    global _hash_jobs
+    if _hash_jobs >= AUTH_HASH_WORKERS + AUTH_HASH_MAX_QUEUE:
+        raise AuthBusyError("Password hashing pool is saturated")
+    _hash_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_jobs -= 1
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash."""
@@ -24,6 +80,80 @@ def get_password_hash(password: str) -> str:
     """Generate hash for a password."""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing pool without blocking the event loop."""
+    with auth_password_verify_duration_seconds.time():
+        return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the hashing pool without blocking the event loop."""
+    return await _run_hash_job(get_password_hash, password)
+
+class LoginThrottle:
+    """Sliding-window counter of failed login attempts per key."""
+
+    def __init__(self, max_failures: int, window_seconds: float = LOGIN_WINDOW_SECONDS, max_keys: int = 10000):
+        self.max_failures = max_failures
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._failures: "OrderedDict[str, Deque[float]]" = OrderedDict()
+
+    def _prune(self, key: str, now: float) -> Optional[Deque[float]]:
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window_seconds:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def retry_after(self, key: str) -> Optional[float]:
+        """Seconds until the key may try again, or None if it is not throttled."""
+        now = time.monotonic()
+        failures = self._prune(key, now)
+        if failures is None or len(failures) < self.max_failures:
+            return None
+        return failures[0] + self.window_seconds - now
+
+    def record_failure(self, key: str):
+        now = time.monotonic()
+        failures = self._prune(key, now)
+        if failures is None:
+            failures = self._failures[key] = deque()
+        failures.append(now)
+        self._failures.move_to_end(key)
+        while len(self._failures) > self.max_keys:
+            self._failures.popitem(last=False)
+
+    def reset(self, key: str):
+        self._failures.pop(key, None)
+
+# Keyed by email and client IP, so failures from one client cannot lock the account for others
+email_login_throttle = LoginThrottle(LOGIN_MAX_FAILURES_PER_EMAIL)
+ip_login_throttle = LoginThrottle(LOGIN_MAX_FAILURES_PER_IP)
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+def client_ip(request: Request) -> str:
+    """The caller's address, taken from X-Forwarded-For only when the peer is a trusted proxy."""
+    address = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(address):
+        return address
+    # Walk back from the nearest hop; the first address not run by us is the client
+    forwarded = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(forwarded):
+        if not _is_trusted_proxy(hop):
+            return hop
+        address = hop
+    return address
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -31,7 +161,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "jti": str(uuid.uuid4())})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -40,12 +170,32 @@ def verify_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        # Single-purpose tokens such as stream tickets are not access tokens
+        if email is None or payload.get("purpose"):
             return None
-        return {"email": email}
+        return {"email": email, "exp": payload.get("exp"), "iat": payload.get("iat")}
     except JWTError:
         return None
 
+def token_digest(token: str) -> str:
+    """Stable identifier for a token that avoids keeping the token itself."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _timestamp(value: datetime) -> int:
+    # Naive datetimes here are UTC, matching how python-jose encodes exp/iat
+    return calendar.timegm(value.utctimetuple())
+
+def _token_key(digest: str) -> str:
+    return f"auth:token:{digest}"
+
+def _admin_key(email: str) -> str:
+    return f"auth:admin:{email}"
+
+def _auth_cache_ttl(ttl: float) -> float:
+    if cache_invalidator.shared:
+        return ttl
+    return min(ttl, LOCAL_AUTH_CACHE_TTL_SECONDS)
+
 async def get_admin_user(db: AsyncIOMotorDatabase, email: str) -> Optional[AdminUser]:
     """Get admin user by email from database."""
     user_data = await db.admin_users.find_one({"email": email})
@@ -53,28 +203,165 @@ async def get_admin_user(db: AsyncIOMotorDatabase, email: str) -> Optional[Admin
         return AdminUser(**user_data)
     return None
 
+async def get_cached_admin_user(db: AsyncIOMotorDatabase, email: str) -> Optional[AdminUser]:
+    """Get admin user by email, served from a short-lived cache."""
+    user = auth_cache.get(_admin_key(email))
+    if user is None:
+        user = await get_admin_user(db, email)
+        if user is not None:
+            auth_cache.set(_admin_key(email), user, ttl=_auth_cache_ttl(ADMIN_CACHE_TTL_SECONDS), tags=[_admin_key(email)])
+    return user
+
+async def is_token_revoked(db: AsyncIOMotorDatabase, digest: str) -> bool:
+    """Check the server-side revocation list."""
+    return await db.revoked_tokens.find_one({"_id": digest}, {"_id": 1}) is not None
+
+async def revoke_token(db: AsyncIOMotorDatabase, token: str, email: str):
+    """Revoke a token until it would have expired anyway."""
+    digest = token_digest(token)
+    payload = verify_token(token) or {}
+    expires_at = datetime.utcfromtimestamp(payload["exp"]) if payload.get("exp") else datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    await db.revoked_tokens.update_one(
+        {"_id": digest},
+        {"$set": {"email": email, "expires_at": expires_at, "revoked_at": datetime.utcnow()}},
+        upsert=True
+    )
+    await cache_invalidator.invalidate(keys=[_token_key(digest)])
+
+async def invalidate_admin_sessions(email: str):
+    """Drop cached tokens and the cached record for an admin, on every worker."""
+    await cache_invalidator.invalidate(tags=[_admin_key(email)])
+
+async def set_admin_active(db: AsyncIOMotorDatabase, email: str, is_active: bool) -> bool:
+    """Activate or deactivate an admin; deactivation ends their sessions."""
+    result = await db.admin_users.update_one({"email": email}, {"$set": {"is_active": is_active}})
+    await invalidate_admin_sessions(email)
+    return result.matched_count > 0
+
+async def set_admin_password(db: AsyncIOMotorDatabase, email: str, password: str) -> bool:
+    """Change an admin password; tokens issued before the change stop working."""
+    hashed_password = await get_password_hash_async(password)
+    result = await db.admin_users.update_one(
+        {"email": email},
+        {"$set": {"hashed_password": hashed_password, "password_changed_at": datetime.utcnow()}}
+    )
+    await invalidate_admin_sessions(email)
+    return result.matched_count > 0
+
 async def authenticate_admin(db: AsyncIOMotorDatabase, email: str, password: str) -> Optional[AdminUser]:
     """Authenticate admin user."""
     user = await get_admin_user(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     if not user.is_active:
         return None
     return user
 
-async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Get current authenticated admin user."""
-    token = credentials.credentials
+async def session_active(db: AsyncIOMotorDatabase, digest: str, email: str, issued_at: Optional[int]) -> bool:
+    """Whether a login session is still valid: not revoked, admin active, password unchanged since."""
+    if await is_token_revoked(db, digest):
+        return False
+    user = await get_cached_admin_user(db, email)
+    if user is None or not user.is_active:
+        return False
+    if user.password_changed_at is not None:
+        if issued_at is None or issued_at < _timestamp(user.password_changed_at):
+            return False
+    return True
+
+def create_stream_ticket(token: str) -> str:
+    """Short-lived token that only opens the event stream, tied to the session that asked for it."""
+    payload = verify_token(token)
+    now = datetime.utcnow()
+    return jwt.encode({
+        "sub": payload["email"],
+        "purpose": STREAM_TICKET_PURPOSE,
+        "session": token_digest(token),
+        "session_iat": payload["iat"],
+        "iat": now,
+        "exp": now + timedelta(seconds=STREAM_TICKET_TTL_SECONDS)
+    }, SECRET_KEY, algorithm=ALGORITHM)
+
+def _verify_stream_ticket(ticket: str) -> Optional[Dict[str, Any]]:
+    try:
+        payload = jwt.decode(ticket, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("purpose") != STREAM_TICKET_PURPOSE or not payload.get("sub") or not payload.get("session"):
+        return None
+    return {"email": payload["sub"], "session": payload["session"], "session_iat": payload.get("session_iat")}
+
+async def _authenticate_token(db: AsyncIOMotorDatabase, token: str) -> Tuple[Optional[str], str]:
+    """Resolve a bearer token to an admin email, with how it was decided."""
+    digest = token_digest(token)
+    now = time.time()
+    
+    # Fast path: this token was fully verified recently
+    claims = auth_cache.get(_token_key(digest))
+    if claims is not None:
+        if claims["exp"] is not None and claims["exp"] <= now:
+            return None, "rejected"
+        return claims["email"], "cached"
+    
     payload = verify_token(token)
     if payload is None:
+        return None, "rejected"
+    if not await session_active(db, digest, payload["email"], payload["iat"]):
+        return None, "rejected"
+    
+    ttl = _auth_cache_ttl(TOKEN_CACHE_TTL_SECONDS)
+    if payload["exp"] is not None:
+        ttl = min(ttl, payload["exp"] - now)
+    if ttl > 0:
+        auth_cache.set(_token_key(digest), payload, ttl=ttl, tags=[_admin_key(payload["email"])])
+    return payload["email"], "verified"
+
+async def is_admin_token(token: str) -> bool:
+    """Whether a bearer token belongs to an active admin, for checks made outside route dependencies."""
+    email, _ = await _authenticate_token(await get_database(), token)
+    return email is not None
+
+async def get_current_admin(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get current authenticated admin user."""
+    return await _require_admin(db, credentials.credentials)
+
+async def get_current_admin_stream(
+    ticket: Optional[str] = Query(None, description="Stream ticket, for clients such as EventSource that cannot set headers"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Dict[str, Any]:
+    """Get the admin session behind an event stream, from the Authorization header or a stream ticket."""
+    if credentials is not None:
+        email = await _require_admin(db, credentials.credentials)
+        payload = verify_token(credentials.credentials)
+        return {"email": email, "session": token_digest(credentials.credentials), "session_iat": payload["iat"]}
+    
+    session = _verify_stream_ticket(ticket) if ticket else None
+    if session is None or not await session_active(db, session["session"], session["email"], session["session_iat"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return session
+
+async def _require_admin(db: AsyncIOMotorDatabase, token: Optional[str]) -> str:
+    started = time.perf_counter()
+    email, outcome = await _authenticate_token(db, token) if token else (None, "rejected")
+    auth_token_verify_duration_seconds.observe(time.perf_counter() - started, outcome)
+    
+    if email is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return payload["email"]
+    return email
 
 async def create_default_admin(db: AsyncIOMotorDatabase):
     """Create default admin user if not exists."""
@@ -82,7 +369,7 @@ async def create_default_admin(db: AsyncIOMotorDatabase):
     existing_admin = await get_admin_user(db, admin_email)
     
     if not existing_admin:
-        hashed_password = get_password_hash("admin123")
+        hashed_password = await get_password_hash_async("admin123")
         admin_user = AdminUser(
             email=admin_email,
             hashed_password=hashed_password,
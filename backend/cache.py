@@ -0,0 +1,283 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+from datetime import datetime
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "2048"))
+# Approximate encoded size of everything in the response cache; list pages run to ~100 KiB each
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_MB", "32")) * 1024 * 1024
+# Expired entries are swept at most this often, besides being dropped when read
+CACHE_SWEEP_SECONDS = 5.0
+CACHE_DEFAULT_TTL = float(os.environ.get("CACHE_DEFAULT_TTL_SECONDS", "30"))
+CACHE_INVALIDATION_BACKEND = os.environ.get("CACHE_INVALIDATION_BACKEND", "")
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded in-process cache with per-key TTL, LRU eviction and tag invalidation."""
+
+    def __init__(self, maxsize: int = CACHE_MAX_ENTRIES, default_ttl: float = CACHE_DEFAULT_TTL, maxbytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        # Only values stored as encoded bytes count towards the byte bound
+        self.maxbytes = maxbytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...], int]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._next_sweep = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped on every invalidation request, present key or not
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry[3]
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a cached value, or default when missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        """Store a value under key, tagged for group invalidation."""
+        self._remove(key)
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        size = len(value) if isinstance(value, bytes) else 0
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        tags = tuple(tags)
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value, tags, size)
+        self.bytes += size
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _sweep(self, now: float):
+        """Drop every expired entry, so keys that are never read again do not hold memory."""
+        for key in [key for key, entry in self._entries.items() if entry[0] < now]:
+            self._remove(key)
+        self._next_sweep = now + CACHE_SWEEP_SECONDS
+
+    def delete(self, key: str):
+        """Drop a single key."""
+        self.generation += 1
+        if key in self._entries:
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_tag(self, tag: str):
+        """Drop every key stored with the given tag."""
+        self.generation += 1
+        for key in list(self._tags.get(tag, ())):
+            self._remove(key)
+            self.invalidations += 1
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._tags.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.maxsize,
+            "bytes": self.bytes,
+            "max_bytes": self.maxbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+InvalidationHandler = Callable[[Iterable[str], Iterable[str]], None]
+
+class InvalidationBackend:
+    """Shares cache invalidations between processes. The default is process-local."""
+
+    shared = False
+
+    async def start(self, handler: InvalidationHandler, reset: Callable[[], None]):
+        pass
+
+    async def publish(self, keys: Iterable[str], tags: Iterable[str]):
+        pass
+
+    async def stop(self):
+        pass
+
+class MongoInvalidationBackend(InvalidationBackend):
+    """Broadcasts invalidations through a capped collection tailed by every worker."""
+
+    shared = True
+    COLLECTION = "cache_invalidations"
+    CAPPED_SIZE_BYTES = 1024 * 1024
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.origin = str(uuid.uuid4())
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: InvalidationHandler, reset: Callable[[], None]):
+        try:
+            await self.db.create_collection(self.COLLECTION, capped=True, size=self.CAPPED_SIZE_BYTES)
+        except CollectionInvalid:
+            pass
+        marker = await self._insert_marker()
+        self._task = asyncio.create_task(self._tail(handler, reset, marker), name="cache-invalidations")
+
+    async def _insert_marker(self):
+        # Also keeps the tailable cursor open, which needs at least one document
+        result = await self.db[self.COLLECTION].insert_one({"origin": self.origin, "keys": [], "tags": [], "at": datetime.utcnow()})
+        return result.inserted_id
+
+    async def publish(self, keys: Iterable[str], tags: Iterable[str]):
+        await self.db[self.COLLECTION].insert_one({
+            "origin": self.origin,
+            "keys": list(keys),
+            "tags": list(tags),
+            "at": datetime.utcnow()
+        })
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _tail(self, handler: InvalidationHandler, reset: Callable[[], None], marker):
+        while True:
+            try:
+                # Natural order is insertion order on every host; ObjectIds from different
+                # workers do not sort that way, so messages are only read after this worker's marker
+                cursor = self.db[self.COLLECTION].find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+                past_marker = False
+                async for message in cursor:
+                    if not past_marker:
+                        past_marker = message["_id"] == marker
+                        continue
+                    if message.get("origin") != self.origin:
+                        handler(message.get("keys", []), message.get("tags", []))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation feed interrupted: {e}")
+            await asyncio.sleep(1.0)
+            try:
+                marker = await self._insert_marker()
+            except Exception as e:
+                logger.warning(f"Cache invalidation feed interrupted: {e}")
+                continue
+            # Invalidations sent while the feed was down are lost, so start cold
+            reset()
+
+class CacheInvalidator:
+    """Applies invalidations locally and forwards them to the shared backend."""
+
+    def __init__(self, *caches: TTLCache):
+        self.caches = caches
+        self.backend: InvalidationBackend = InvalidationBackend()
+
+    @property
+    def shared(self) -> bool:
+        """Whether invalidations reach the other workers."""
+        return self.backend.shared
+
+    def apply(self, keys: Iterable[str] = (), tags: Iterable[str] = ()):
+        keys, tags = list(keys), list(tags)
+        for cache in self.caches:
+            for key in keys:
+                cache.delete(key)
+            for tag in tags:
+                cache.invalidate_tag(tag)
+
+    def reset(self):
+        for cache in self.caches:
+            cache.clear()
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        if CACHE_INVALIDATION_BACKEND == "mongo":
+            self.backend = MongoInvalidationBackend(db)
+        await self.backend.start(self.apply, self.reset)
+
+    async def stop(self):
+        await self.backend.stop()
+        self.backend = InvalidationBackend()
+
+    async def invalidate(self, keys: Iterable[str] = (), tags: Iterable[str] = ()):
+        keys, tags = list(keys), list(tags)
+        self.apply(keys, tags)
+        try:
+            await self.backend.publish(keys, tags)
+        except Exception as e:
+            logger.warning(f"Failed to publish cache invalidation: {e}")
+
+async def cached(key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None, tags: Iterable[str] = ()) -> Any:
+    """Return the cached value for key, loading and storing it on a miss."""
+    value = response_cache.get(key, _MISSING)
+    if value is _MISSING:
+        generation = response_cache.generation
+        value = await loader()
+        # Skip storing if something was invalidated while loading, the value may be stale
+        if response_cache.generation == generation:
+            response_cache.set(key, value, ttl=ttl, tags=tags)
+    return value
+
+async def cached_json(key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None, tags: Iterable[str] = ()) -> Optional[bytes]:
+    """Like cached, but stores and serves the value encoded once as JSON; None stays None."""
+    async def load() -> Optional[bytes]:
+        value = await loader()
+        return None if value is None else dumps(value)
+    return await cached(key, load, ttl=ttl, tags=tags)
+
+response_cache = TTLCache(maxbytes=CACHE_MAX_BYTES)
+# Verified tokens and admin records, kept apart so response churn cannot evict them
+auth_cache = TTLCache(maxsize=4096, default_ttl=300)
+cache_invalidator = CacheInvalidator(response_cache, auth_cache)
@@ -1,73 +1,313 @@
+from fastapi import HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from typing import Optional
+from pydantic import BaseModel, validator
+from pymongo import monitoring
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+from typing import Any, Dict, List, Optional
+import asyncio
+import importlib.util
 import os
 import logging
+import threading
+import time
+
+from .indexes import sync_indexes
+from .metrics import mongo_command_metrics
+from .profiling import profiling_command_listener
 
 logger = logging.getLogger(__name__)
 
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest
+}
+
+# Wire compressors and the module pymongo needs for each
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+class MongoSettings(BaseModel):
+    """Connection, pool and read routing settings for the Mongo client."""
+    url: str
+    db_name: str = "fixnet"
+    app_name: str = "fixnet-backend"
+    min_pool_size: int = 0
+    max_pool_size: int = 100
+    max_idle_time_ms: Optional[int] = 60000
+    wait_queue_timeout_ms: Optional[int] = 5000
+    server_selection_timeout_ms: int = 5000
+    connect_timeout_ms: int = 10000
+    socket_timeout_ms: Optional[int] = None
+    compressors: List[str] = ["zstd", "snappy", "zlib"]
+    # Read preference for routes that tolerate slightly stale data (lists, stats, exports)
+    read_preference: str = "primary"
+    max_staleness_seconds: int = -1
+
+    @validator("compressors", pre=True)
+    def split_compressors(cls, v):
+        if isinstance(v, str):
+            v = [name.strip() for name in v.split(",") if name.strip()]
+        unknown = [name for name in v if name not in COMPRESSOR_MODULES]
+        if unknown:
+            raise ValueError(f"Unknown compressors: {', '.join(unknown)}")
+        return v
+
+    @validator("read_preference")
+    def validate_read_preference(cls, v):
+        if v not in READ_PREFERENCES:
+            raise ValueError(f"Unknown read preference: {v}")
+        return v
+
+    @validator("max_pool_size")
+    def validate_pool_size(cls, v, values):
+        if v < values.get("min_pool_size", 0):
+            raise ValueError("max_pool_size must not be below min_pool_size")
+        return v
+
+    @classmethod
+    def from_env(cls) -> "MongoSettings":
+        """Settings from MONGO_* environment variables, defaults for the rest."""
+        env = {
+            "url": "MONGO_URL",
+            "db_name": "DB_NAME",
+            "app_name": "MONGO_APP_NAME",
+            "min_pool_size": "MONGO_MIN_POOL_SIZE",
+            "max_pool_size": "MONGO_MAX_POOL_SIZE",
+            "max_idle_time_ms": "MONGO_MAX_IDLE_TIME_MS",
+            "wait_queue_timeout_ms": "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+            "server_selection_timeout_ms": "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+            "connect_timeout_ms": "MONGO_CONNECT_TIMEOUT_MS",
+            "socket_timeout_ms": "MONGO_SOCKET_TIMEOUT_MS",
+            "compressors": "MONGO_COMPRESSORS",
+            "read_preference": "MONGO_READ_PREFERENCE",
+            "max_staleness_seconds": "MONGO_MAX_STALENESS_SECONDS"
+        }
+        return cls(**{field: os.environ[name] for field, name in env.items() if name in os.environ})
+
+    def available_compressors(self) -> List[str]:
+        """Configured compressors whose support module is installed."""
+        return [name for name in self.compressors if importlib.util.find_spec(COMPRESSOR_MODULES[name])]
+
+    def client_options(self) -> Dict[str, Any]:
+        options = {
+            "appname": self.app_name,
+            "minPoolSize": self.min_pool_size,
+            "maxPoolSize": self.max_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms
+        }
+        compressors = self.available_compressors()
+        if compressors:
+            options["compressors"] = ",".join(compressors)
+        return options
+
+    def read_preference_for_reads(self):
+        mode = READ_PREFERENCES[self.read_preference]
+        if mode is Primary:
+            return Primary()
+        return mode(max_staleness=self.max_staleness_seconds)
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters, fed by pymongo's pool events from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.max_pool_size = 0
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_check_out_started(self, event):
+        # Check-out happens on a single thread, so the start time is kept per thread
+        self._local.started = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        waited = time.monotonic() - started if started is not None else 0.0
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+            self.checkouts += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_pool_size": self.max_pool_size,
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "waiting": self.waiting,
+                "saturation": round(self.checked_out / self.max_pool_size, 4) if self.max_pool_size else 0.0,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "avg_wait_ms": round(self.total_wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "pool_clears": self.pool_clears
+            }
+
 class Database:
     client: Optional[AsyncIOMotorClient] = None
     db: Optional[AsyncIOMotorDatabase] = None
+    # Same database, routed by the configured read preference
+    read_db: Optional[AsyncIOMotorDatabase] = None
+    settings: Optional[MongoSettings] = None
+    last_ping: Optional[Dict[str, Any]] = None
+    last_ping_at: float = 0.0
 
 db_instance = Database()
+pool_metrics = PoolMetrics()
 
-async def connect_to_mongo():
+# Readiness probes reuse a recent ping instead of hitting Mongo on every call
+PING_CACHE_SECONDS = float(os.environ.get("READINESS_PING_CACHE_SECONDS", "2"))
+PING_TIMEOUT_SECONDS = float(os.environ.get("READINESS_PING_TIMEOUT_SECONDS", "2"))
+
+# Connection state is owned by the application lifespan and changed under this lock
+_connection_lock = asyncio.Lock()
+_ping_lock = asyncio.Lock()
+
+async def connect_to_mongo(settings: Optional[MongoSettings] = None, index_sync: bool = True):
     """Create database connection."""
-    try:
-        mongo_url = os.environ['MONGO_URL']
-        db_name = os.environ.get('DB_NAME', 'fixnet')
+    async with _connection_lock:
+        if db_instance.client is not None:
+            return
         
-        db_instance.client = AsyncIOMotorClient(mongo_url)
-        db_instance.db = db_instance.client[db_name]
-        
-        # Test the connection
-        await db_instance.client.admin.command('ismaster')
-        logger.info(f"Connected to MongoDB database: {db_name}")
-        
-        # Create indexes for better performance
+        client = None
+        try:
+            settings = settings or MongoSettings.from_env()
+            
+            # Per-server limit; saturation is checked-out connections against it
+            pool_metrics.max_pool_size = settings.max_pool_size
+            client = AsyncIOMotorClient(settings.url, event_listeners=[pool_metrics, mongo_command_metrics, profiling_command_listener], **settings.client_options())
+            
+            # Test the connection before anything can use it
+            await client.admin.command('ping')
+            
+            db_instance.settings = settings
+            db_instance.client = client
+            db_instance.db = client[settings.db_name]
+            db_instance.read_db = db_instance.db.with_options(read_preference=settings.read_preference_for_reads())
+            logger.info(f"Connected to MongoDB database: {settings.db_name} (pool {settings.min_pool_size}-{settings.max_pool_size}, reads {settings.read_preference})")
+            
+        except Exception as e:
+            if client is not None:
+                client.close()
+            logger.error(f"Could not connect to MongoDB: {e}")
+            raise
+    
+    # Create indexes for better performance
+    if index_sync:
         await create_indexes()
-        
-    except Exception as e:
-        logger.error(f"Could not connect to MongoDB: {e}")
-        raise
 
 async def close_mongo_connection():
     """Close database connection."""
-    if db_instance.client:
-        db_instance.client.close()
-        logger.info("Disconnected from MongoDB")
+    async with _connection_lock:
+        client = db_instance.client
+        db_instance.client = None
+        db_instance.db = None
+        db_instance.read_db = None
+        db_instance.last_ping = None
+        if client:
+            client.close()
+            logger.info("Disconnected from MongoDB")
 
 async def get_database() -> AsyncIOMotorDatabase:
     """Get database instance."""
     if db_instance.db is None:
-        await connect_to_mongo()
+        # Connecting is the lifespan's job; a request never opens a client itself
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database not connected",
+            headers={"Retry-After": "1"}
+        )
     return db_instance.db
 
+async def get_read_database() -> AsyncIOMotorDatabase:
+    """Get database instance for reads that may be served by a secondary."""
+    db = await get_database()
+    return db_instance.read_db if db_instance.read_db is not None else db
+
+async def ping_database(max_age: float = PING_CACHE_SECONDS) -> Dict[str, Any]:
+    """Ping Mongo, reusing a result younger than max_age."""
+    if db_instance.client is None:
+        return {"ok": False, "error": "not connected"}
+    
+    if db_instance.last_ping is not None and time.monotonic() - db_instance.last_ping_at < max_age:
+        return db_instance.last_ping
+    
+    async with _ping_lock:
+        # Another probe may have refreshed it while we waited
+        if db_instance.last_ping is not None and time.monotonic() - db_instance.last_ping_at < max_age:
+            return db_instance.last_ping
+        
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(db_instance.client.admin.command('ping'), timeout=PING_TIMEOUT_SECONDS)
+            result = {"ok": True, "latency_ms": round((time.monotonic() - started) * 1000, 3)}
+        except Exception as e:
+            result = {"ok": False, "error": str(e) or type(e).__name__}
+        
+        db_instance.last_ping = result
+        db_instance.last_ping_at = time.monotonic()
+        return result
+
 async def create_indexes():
-    """Create database indexes for better performance."""
+    """Create missing database indexes, unless disabled with SKIP_INDEX_SYNC."""
+    if os.environ.get("SKIP_INDEX_SYNC", "").lower() in ("1", "true", "yes"):
+        logger.info("Index sync skipped (SKIP_INDEX_SYNC)")
+        return
     try:
         if db_instance.db is not None:
-            # Repair requests indexes
-            await db_instance.db.repair_requests.create_index("ticket_id", unique=True)
-            await db_instance.db.repair_requests.create_index("customerEmail")
-            await db_instance.db.repair_requests.create_index("customerPhone")
-            await db_instance.db.repair_requests.create_index("status")
-            await db_instance.db.repair_requests.create_index("createdAt")
-            await db_instance.db.repair_requests.create_index([
-                ("customerName", "text"),
-                ("customerEmail", "text"),
-                ("deviceBrand", "text"),
-                ("deviceModel", "text"),
-                ("specificIssue", "text")
-            ])
-            
-            # Admin users indexes
-            await db_instance.db.admin_users.create_index("email", unique=True)
-            
-            # Contact messages indexes
-            await db_instance.db.contact_messages.create_index("email")
-            await db_instance.db.contact_messages.create_index("created_at")
-            
-            logger.info("Database indexes created successfully")
+            result = await sync_indexes(db_instance.db)
+            if result["skipped"]:
+                logger.info(f"Database indexes up to date (spec v{result['version']})")
+            else:
+                logger.info(f"Database indexes synced (spec v{result['version']}), created: {', '.join(result['created']) or 'none'}")
     except Exception as e:
-        logger.warning(f"Could not create indexes: {e}")
\ No newline at end of file
+        logger.warning(f"Could not create indexes: {e}")
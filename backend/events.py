@@ -0,0 +1,292 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime
+import asyncio
+import logging
+import os
+import re
+import uuid
+
+from .models import RepairRequestSummary
+from .serialization import dumps
+from .stats import Transition
+
+logger = logging.getLogger(__name__)
+
+# Where ticket events come from: a change stream, this process's own writes, or auto-detect
+EVENTS_SOURCE = os.environ.get("EVENTS_SOURCE", "auto")
+EVENT_BUFFER_SIZE = int(os.environ.get("EVENT_BUFFER_SIZE", "1000"))
+EVENT_HEARTBEAT_SECONDS = float(os.environ.get("EVENT_HEARTBEAT_SECONDS", "15"))
+# How often an open stream re-checks that its login session was not revoked
+EVENT_SESSION_CHECK_SECONDS = float(os.environ.get("EVENT_SESSION_CHECK_SECONDS", "30"))
+# Reconnect delay suggested to EventSource clients
+EVENT_RETRY_MS = 3000
+SUBSCRIBER_QUEUE_SIZE = 256
+# Deletes only carry _id unless pre-images are on, so remember which ticket each _id belongs to
+KNOWN_TICKETS_MAX = 50000
+# Server error code for a resume token that fell off the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+# Change-stream event ids are the resume token's _data, the same on every worker
+RESUME_TOKEN_PATTERN = re.compile(r"[0-9A-Fa-f]{16,}")
+
+RESYNC = "resync"
+
+# Admin table columns sent with created and updated events
+SUMMARY_FIELDS = [field for field in RepairRequestSummary.__fields__ if field != "descriptionPreview"]
+
+# Only the operations and fields the feed uses cross the wire
+CHANGE_STREAM_PIPELINE = [
+    {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+    {"$project": {
+        "operationType": 1,
+        "documentKey": 1,
+        "updateDescription.updatedFields.status": 1,
+        "fullDocumentBeforeChange.ticket_id": 1,
+        "fullDocumentBeforeChange.status": 1,
+        **{f"fullDocument.{field}": 1 for field in SUMMARY_FIELDS}
+    }}
+]
+
+Event = Dict[str, Any]
+Entry = Tuple[str, Event]
+
+def _status(document: Dict[str, Any]) -> Optional[str]:
+    status = document.get("status")
+    return getattr(status, "value", status)
+
+def _summary(document: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: document.get(field) for field in SUMMARY_FIELDS}
+
+def transition_event(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Optional[Event]:
+    """The feed event for one (before, after) pair of repair request documents."""
+    if after is None:
+        if before is None:
+            return None
+        return {"type": "deleted", "ticket_id": before["ticket_id"]}
+    event = {"ticket_id": after["ticket_id"], "status": _status(after), "ticket": _summary(after)}
+    if before is None:
+        return {"type": "created", **event}
+    if _status(before) != _status(after):
+        return {"type": "status_changed", "old_status": _status(before), **event}
+    return {"type": "updated", **event}
+
+def format_sse(event_id: Optional[str], event: Event) -> bytes:
+    """One Server-Sent Events frame."""
+    frame = f"event: {event['type']}\n"
+    if event_id is not None:
+        frame += f"id: {event_id}\n"
+    return frame.encode() + b"data: " + dumps(event) + b"\n\n"
+
+class TicketEventBroker:
+    """Fans repair request events out to connected feed subscribers."""
+
+    def __init__(self):
+        # Ids of in-process events are only meaningful to the process that issued them;
+        # change-stream events use their resume token instead
+        self.epoch = uuid.uuid4().hex[:8]
+        self.source = "local"
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._sequence = 0
+        self._buffer: "deque[Entry]" = deque(maxlen=EVENT_BUFFER_SIZE)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._known_tickets: "OrderedDict[Any, str]" = OrderedDict()
+        self.pre_images = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: Event, event_id: Optional[str] = None) -> str:
+        if event_id is None:
+            self._sequence += 1
+            event_id = f"{self.epoch}-{self._sequence}"
+        entry = (event_id, {**event, "at": datetime.utcnow()})
+        self._buffer.append(entry)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                # A subscriber that cannot keep up refetches instead of blocking everyone
+                self._overflow(queue)
+        return event_id
+
+    def _overflow(self, queue: asyncio.Queue):
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait((None, {"type": RESYNC, "reason": "lagging"}))
+
+    def publish_transitions(self, transitions: Iterable[Transition]):
+        """Publish events for writes made by this process, unless a change stream already sees them."""
+        if self.source != "local":
+            # The stream's delete only carries _id, so note which ticket it was
+            for before, after in transitions:
+                if after is None and before is not None and "_id" in before:
+                    self._remember(before["_id"], before["ticket_id"])
+            return
+        for before, after in transitions:
+            event = transition_event(before, after)
+            if event is not None:
+                self.publish(event)
+
+    async def subscribe(self, last_event_id: Optional[str] = None) -> Tuple[asyncio.Queue, List[Entry]]:
+        """Register a subscriber and return its queue with the events it missed since last_event_id."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Registered before catching up so nothing is missed; the queue may then repeat the
+        # end of the backlog, and consumers skip ids they already sent
+        self._subscribers.add(queue)
+        backlog: List[Entry] = []
+        if last_event_id:
+            try:
+                backlog = await self._replay(last_event_id)
+            except BaseException:
+                self._subscribers.discard(queue)
+                raise
+        return queue, backlog
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    async def _replay(self, last_event_id: str) -> List[Entry]:
+        for position, (event_id, _) in enumerate(self._buffer):
+            if event_id == last_event_id:
+                return list(islice(self._buffer, position + 1, None))
+        if self.source == "change_stream" and RESUME_TOKEN_PATTERN.fullmatch(last_event_id):
+            # Issued by another worker, or before this one's buffer starts
+            return await self._catch_up(last_event_id)
+        # Unknown or expired id: the client has to reload its view
+        return [(None, {"type": RESYNC, "reason": "unknown_event_id"})]
+
+    async def _catch_up(self, resume_token: str) -> List[Entry]:
+        """Events after a resume token, read from a private change stream until the buffer takes over."""
+        buffered = list(self._buffer)
+        positions = {event_id: position for position, (event_id, _) in enumerate(buffered)}
+        backlog: List[Entry] = []
+        try:
+            async with self._open_stream(self._db, {"_data": resume_token}) as stream:
+                while len(backlog) < EVENT_BUFFER_SIZE:
+                    change = await stream.try_next()
+                    if change is None:
+                        # Reached the present; anything newer arrives through the queue
+                        return backlog
+                    event_id = change["_id"]["_data"]
+                    if event_id in positions:
+                        return backlog + buffered[positions[event_id]:]
+                    event = self._change_event(change, track=False)
+                    if event is not None:
+                        backlog.append((event_id, {**event, "at": datetime.utcnow()}))
+        except Exception as e:
+            logger.info(f"Could not resume the ticket feed from {resume_token[:16]}: {e}")
+        # Too far behind, expired or not a token of this stream
+        return [(None, {"type": RESYNC, "reason": "unknown_event_id"})]
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        if EVENTS_SOURCE != "local" and await self._supports_change_streams(db):
+            self.source = "change_stream"
+            self._db = db
+            self.pre_images = await self._enable_pre_images(db)
+            self._task = asyncio.create_task(self._watch(db), name="ticket-events")
+        elif EVENTS_SOURCE == "change_stream":
+            logger.warning("Change streams need a replica set, ticket events fall back to in-process publishing")
+        logger.info(f"Ticket events sourced from {self.source}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.source = "local"
+        self._db = None
+        self.pre_images = False
+
+    async def _enable_pre_images(self, db: AsyncIOMotorDatabase) -> bool:
+        """Turn on pre-images so deletes and status changes carry the previous ticket id and status."""
+        try:
+            await db.command("collMod", "repair_requests", changeStreamPreAndPostImages={"enabled": True})
+        except Exception as e:
+            # Needs MongoDB 6.0 and collMod rights; without it deletes fall back to known ids
+            logger.info(f"Change stream pre-images unavailable: {e}")
+            return False
+        return True
+
+    async def _supports_change_streams(self, db: AsyncIOMotorDatabase) -> bool:
+        try:
+            hello = await db.client.admin.command("hello")
+        except Exception as e:
+            logger.info(f"Could not detect the MongoDB topology: {e}")
+            return False
+        return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+    def _open_stream(self, db: AsyncIOMotorDatabase, resume_token: Optional[Dict[str, Any]]):
+        # Every worker watches with the same options, so they all see the same resume tokens
+        return db.repair_requests.watch(
+            CHANGE_STREAM_PIPELINE,
+            full_document="updateLookup",
+            full_document_before_change="whenAvailable" if self.pre_images else None,
+            resume_after=resume_token
+        )
+
+    async def _watch(self, db: AsyncIOMotorDatabase):
+        resume_token = None
+        while True:
+            try:
+                async with self._open_stream(db, resume_token) as stream:
+                    async for change in stream:
+                        resume_token = change["_id"]
+                        event = self._change_event(change)
+                        if event is not None:
+                            self.publish(event, event_id=resume_token["_data"])
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                logger.warning(f"Ticket change stream failed: {e}")
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    # Events were missed, start over from now and have clients reload
+                    resume_token = None
+                    self.publish({"type": RESYNC, "reason": "history_lost"})
+            except Exception as e:
+                logger.warning(f"Ticket change stream interrupted: {e}")
+            await asyncio.sleep(1.0)
+
+    def _remember(self, document_id: Any, ticket_id: str):
+        self._known_tickets[document_id] = ticket_id
+        self._known_tickets.move_to_end(document_id)
+        if len(self._known_tickets) > KNOWN_TICKETS_MAX:
+            self._known_tickets.popitem(last=False)
+
+    def _change_event(self, change: Dict[str, Any], track: bool = True) -> Optional[Event]:
+        """The feed event for one change stream change; replays leave the known tickets alone."""
+        operation = change["operationType"]
+        document_id = change["documentKey"]["_id"]
+        document = change.get("fullDocument")
+        before = change.get("fullDocumentBeforeChange") or {}
+
+        if operation == "delete":
+            # From the pre-image when enabled, else from tickets seen or deleted by this process
+            # since startup; only a delete neither knows makes clients resync
+            known = self._known_tickets.pop(document_id, None) if track else self._known_tickets.get(document_id)
+            ticket_id = known or before.get("ticket_id")
+            if ticket_id is None:
+                return {"type": RESYNC, "reason": "unknown_delete"}
+            return {"type": "deleted", "ticket_id": ticket_id}
+        # Updated and then deleted before the lookup ran; the delete follows
+        if document is None:
+            return None
+
+        if track:
+            self._remember(document_id, document["ticket_id"])
+        event = {"ticket_id": document["ticket_id"], "status": _status(document), "ticket": _summary(document)}
+        if operation == "insert":
+            return {"type": "created", **event}
+        if "status" in change.get("updateDescription", {}).get("updatedFields", {}):
+            # Without pre-images the previous status is unknown
+            return {"type": "status_changed", "old_status": _status(before), **event}
+        return {"type": "updated", **event}
+
+ticket_events = TicketEventBroker()
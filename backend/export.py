@@ -0,0 +1,115 @@
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import date, datetime
+from enum import Enum
+import csv
+import io
+import zlib
+
+from .serialization import dumps
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_BATCH_SIZE = 1000
+# Rows are buffered into chunks of roughly this size before being sent
+EXPORT_CHUNK_BYTES = 64 * 1024
+GZIP_LEVEL = 6
+# Leading characters that make spreadsheet apps read a cell as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson"
+}
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows a gzip body."""
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        # Customer-supplied text must not run as a formula when staff open the export
+        return f"'{value}"
+    return value
+
+async def csv_chunks(cursor, columns: List[str]) -> AsyncIterator[bytes]:
+    """Encode documents as CSV rows, one buffered chunk at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for document in cursor:
+        writer.writerow([_csv_value(document.get(column)) for column in columns])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+async def ndjson_chunks(cursor) -> AsyncIterator[bytes]:
+    """Encode documents as newline-delimited JSON, one buffered chunk at a time."""
+    buffer = bytearray()
+    async for document in cursor:
+        buffer += dumps(document)
+        buffer += b"\n"
+        if len(buffer) >= EXPORT_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a chunk stream into a single gzip member on the fly."""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+async def _closing(cursor, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # Release the server-side cursor even when the client disconnects mid-export
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await cursor.close()
+
+def export_response(
+    cursor,
+    export_format: str,
+    columns: List[str],
+    filename: str,
+    accept_encoding: Optional[str] = None
+) -> StreamingResponse:
+    """Stream a Mongo cursor as a CSV or NDJSON download."""
+    if export_format == "csv":
+        chunks = csv_chunks(cursor, columns)
+    else:
+        chunks = ndjson_chunks(cursor)
+
+    headers: Dict[str, str] = {
+        "Content-Disposition": f'attachment; filename="{filename}.{export_format}"',
+        "Vary": "Accept-Encoding"
+    }
+    if accepts_gzip(accept_encoding):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(_closing(cursor, chunks), media_type=MEDIA_TYPES[export_format], headers=headers)
@@ -0,0 +1,90 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateMany, DeleteMany
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from typing import Any, Dict, List
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+INBOX_COUNTERS_COLLECTION = "inbox_counters"
+INBOX_COUNTERS_ID = "contact_messages"
+
+async def adjust_unread(db: AsyncIOMotorDatabase, delta: int):
+    """Apply a change in the number of unread contact messages."""
+    if not delta:
+        return
+    try:
+        await db[INBOX_COUNTERS_COLLECTION].update_one(
+            {"_id": INBOX_COUNTERS_ID},
+            {"$inc": {"unread": delta, "version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+    except Exception as e:
+        # Drift is corrected by the next reconciliation
+        logger.warning(f"Failed to update unread message counter: {e}")
+
+async def reconcile_unread_count(db: AsyncIOMotorDatabase) -> int:
+    """Recount unread contact messages from the (is_read, created_at) index.
+
+    The correction is an $inc against a snapshot, skipped if the counter moved meanwhile.
+    """
+    snapshot = await db[INBOX_COUNTERS_COLLECTION].find_one({"_id": INBOX_COUNTERS_ID})
+    unread = await db.contact_messages.count_documents({"is_read": False})
+    now = datetime.utcnow()
+    if snapshot is None:
+        try:
+            await db[INBOX_COUNTERS_COLLECTION].insert_one(
+                {"_id": INBOX_COUNTERS_ID, "unread": unread, "version": 0, "updated_at": now, "reconciled_at": now}
+            )
+        except DuplicateKeyError:
+            logger.info("Unread message counter changed during reconciliation, retrying next run")
+        return unread
+
+    result = await db[INBOX_COUNTERS_COLLECTION].update_one(
+        {"_id": INBOX_COUNTERS_ID, "version": snapshot.get("version")},
+        {"$inc": {"unread": unread - snapshot.get("unread", 0), "version": 1}, "$set": {"updated_at": now, "reconciled_at": now}}
+    )
+    if result.matched_count:
+        logger.info("Unread message counter reconciled")
+    else:
+        logger.info("Unread message counter changed during reconciliation, retrying next run")
+    return unread
+
+async def get_unread_count(db: AsyncIOMotorDatabase) -> int:
+    """Unread contact messages from the maintained counter, built on first use."""
+    counters = await db[INBOX_COUNTERS_COLLECTION].find_one({"_id": INBOX_COUNTERS_ID})
+    if counters is None or "reconciled_at" not in counters:
+        return await reconcile_unread_count(db)
+    return max(int(counters.get("unread", 0)), 0)
+
+def _bulk_operations(action: str, ids: List[str]) -> List[Any]:
+    targets = {"id": {"$in": ids}}
+    if action == "mark_read":
+        return [UpdateMany({**targets, "is_read": False}, {"$set": {"is_read": True}})]
+    if action == "mark_unread":
+        return [UpdateMany({**targets, "is_read": True}, {"$set": {"is_read": False}})]
+    return [DeleteMany(targets)]
+
+def _unread_delta(action: str, result: Dict[str, Any], unread_targets: int) -> int:
+    if action == "delete":
+        # Counted just before the delete; a message read or removed in between is settled by reconciliation
+        return -min(unread_targets, result.get("nRemoved", 0))
+    modified = result.get("nModified", 0)
+    return modified if action == "mark_unread" else -modified
+
+async def apply_bulk_action(db: AsyncIOMotorDatabase, action: str, ids: List[str]) -> Dict[str, int]:
+    """Mark read, mark unread or delete many contact messages in one round trip."""
+    ids = list(dict.fromkeys(ids))
+    # Counted before deleting, so the counter knows how many unread messages go away
+    unread_targets = await db.contact_messages.count_documents({"id": {"$in": ids}, "is_read": False}) if action == "delete" else 0
+    try:
+        result = (await db.contact_messages.bulk_write(_bulk_operations(action, ids), ordered=True)).bulk_api_result
+    except BulkWriteError as e:
+        # Whatever was applied before the failure still moves the counter
+        await adjust_unread(db, _unread_delta(action, e.details, unread_targets))
+        raise
+
+    modified, deleted = result.get("nModified", 0), result.get("nRemoved", 0)
+    await adjust_unread(db, _unread_delta(action, result, unread_targets))
+    return {"requested": len(ids), "changed": deleted if action == "delete" else modified}
@@ -0,0 +1,115 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
+from typing import Dict, Any, List
+from datetime import datetime
+import asyncio
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = "migrations"
+INDEX_MIGRATION_ID = "indexes"
+
+# Bump when an index is changed or removed; additions are picked up by the digest alone
+INDEX_SPEC_VERSION = 2
+
+INDEX_SPEC: Dict[str, List[IndexModel]] = {
+    "repair_requests": [
+        IndexModel([("ticket_id", ASCENDING)], unique=True),
+        IndexModel([("customerEmail", ASCENDING)]),
+        IndexModel([("customerPhone", ASCENDING)]),
+        IndexModel([("customerPhoneSuffixes", ASCENDING)]),
+        IndexModel([("searchTokens", ASCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+        IndexModel([("createdAt", ASCENDING)]),
+        IndexModel([("createdAt", DESCENDING), ("ticket_id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("createdAt", DESCENDING), ("ticket_id", DESCENDING)]),
+        IndexModel([
+            ("customerName", TEXT),
+            ("customerEmail", TEXT),
+            ("deviceBrand", TEXT),
+            ("deviceModel", TEXT),
+            ("specificIssue", TEXT)
+        ])
+    ],
+    "admin_users": [
+        IndexModel([("email", ASCENDING)], unique=True)
+    ],
+    # Revoked tokens expire out of the collection when the token would have
+    "revoked_tokens": [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0)
+    ],
+    "contact_messages": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)]),
+        IndexModel([("created_at", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        # Unread inbox pages and the unread counter reconciliation
+        IndexModel([("is_read", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)])
+    ],
+    "notification_outbox": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+        # Dead letters are kept for inspection for two weeks, then expire with their payload
+        IndexModel(
+            [("dead_at", ASCENDING)],
+            expireAfterSeconds=14 * 24 * 3600,
+            partialFilterExpression={"status": "dead"}
+        ),
+        # Entries marked sent before delivered ones were deleted
+        IndexModel(
+            [("sent_at", ASCENDING)],
+            expireAfterSeconds=24 * 3600,
+            partialFilterExpression={"status": "sent"}
+        )
+    ]
+}
+
+def spec_digest(spec: Dict[str, List[IndexModel]] = INDEX_SPEC) -> str:
+    """Stable fingerprint of an index spec."""
+    documents = {
+        collection: sorted((dict(index.document, key=list(index.document["key"].items())) for index in indexes), key=lambda d: d["name"])
+        for collection, indexes in spec.items()
+    }
+    raw = json.dumps({"version": INDEX_SPEC_VERSION, "indexes": documents}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+async def _sync_collection(db: AsyncIOMotorDatabase, collection: str, indexes: List[IndexModel]) -> List[str]:
+    existing = {index["name"]: index async for index in db[collection].list_indexes()}
+    missing = []
+    for index in indexes:
+        name = index.document["name"]
+        if name not in existing:
+            missing.append(index)
+        elif any(existing[name].get(option) != value for option, value in index.document.items() if option not in ("key", "name")):
+            # Never dropped automatically, an index rebuild is an operational decision
+            logger.warning(f"Index {collection}.{name} exists with different options, leaving it unchanged")
+    if missing:
+        # One createIndexes command per collection
+        return await db[collection].create_indexes(missing)
+    return []
+
+async def sync_indexes(db: AsyncIOMotorDatabase, force: bool = False) -> Dict[str, Any]:
+    """Create the indexes from INDEX_SPEC that do not exist yet and record the applied spec."""
+    digest = spec_digest()
+    applied = await db[MIGRATIONS_COLLECTION].find_one({"_id": INDEX_MIGRATION_ID})
+    if applied and applied.get("digest") == digest and not force:
+        return {"version": INDEX_SPEC_VERSION, "digest": digest, "created": [], "skipped": True}
+
+    results = await asyncio.gather(*(
+        _sync_collection(db, collection, indexes) for collection, indexes in INDEX_SPEC.items()
+    ))
+    created = [
+        f"{collection}.{name}"
+        for collection, names in zip(INDEX_SPEC, results)
+        for name in names
+    ]
+
+    await db[MIGRATIONS_COLLECTION].replace_one(
+        {"_id": INDEX_MIGRATION_ID},
+        {"version": INDEX_SPEC_VERSION, "digest": digest, "created": created, "applied_at": datetime.utcnow()},
+        upsert=True
+    )
+    return {"version": INDEX_SPEC_VERSION, "digest": digest, "created": created, "skipped": False}
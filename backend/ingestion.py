@@ -0,0 +1,220 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError, ConnectionFailure, OperationFailure
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import os
+
+from .ticket_ids import new_ticket_id, TICKET_ID_ATTEMPTS
+
+logger = logging.getLogger(__name__)
+
+# "direct" inserts each submission inside its request, "batched" goes through the queue
+INGEST_MODE = os.environ.get("REPAIR_INGEST_MODE", "direct")
+# "commit" answers once the batch holding the submission is written, "queued" as soon as it is queued
+INGEST_ACK = os.environ.get("REPAIR_INGEST_ACK", "commit")
+INGEST_QUEUE_SIZE = int(os.environ.get("REPAIR_INGEST_QUEUE_SIZE", "5000"))
+INGEST_BATCH_SIZE = int(os.environ.get("REPAIR_INGEST_BATCH_SIZE", "200"))
+INGEST_FLUSH_SECONDS = float(os.environ.get("REPAIR_INGEST_FLUSH_MS", "20")) / 1000
+INGEST_MAX_ATTEMPTS = 5
+INGEST_RETRY_AFTER_SECONDS = 1
+DUPLICATE_KEY = 11000
+
+InsertedHandler = Callable[[AsyncIOMotorDatabase, List[Dict[str, Any]]], Awaitable[None]]
+
+class IngestQueueFull(Exception):
+    """The ingestion queue cannot take more submissions right now."""
+
+class IngestFailed(Exception):
+    """A queued submission could not be written."""
+
+class _Submission:
+    __slots__ = ("document", "future", "attempts", "ticket_id_attempts")
+
+    def __init__(self, document: Dict[str, Any], future: Optional[asyncio.Future]):
+        self.document = document
+        self.future = future
+        self.attempts = 0
+        self.ticket_id_attempts = 1
+
+def _duplicate_field(error: Dict[str, Any]) -> Optional[str]:
+    """The indexed field a duplicate key write error collided on."""
+    key_pattern = error.get("keyPattern")
+    if key_pattern:
+        return next(iter(key_pattern))
+    # Servers before 4.4 only name the index in the message
+    message = error.get("errmsg", "")
+    if "index: _id_ " in message:
+        return "_id"
+    if "index: ticket_id_1 " in message:
+        return "ticket_id"
+    return None
+
+class IngestionPipeline:
+    """Bounded queue of validated submissions, written to Mongo in insert_many micro-batches."""
+
+    def __init__(self, collection: str = "repair_requests"):
+        self.collection = collection
+        self.mode = INGEST_MODE
+        self.ack = INGEST_ACK
+        self.batch_size = INGEST_BATCH_SIZE
+        self.flush_seconds = INGEST_FLUSH_SECONDS
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+        self._batch_ready = asyncio.Event()
+        self._handlers: List[InsertedHandler] = []
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._task: Optional[asyncio.Task] = None
+        self._accepting = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode == "batched"
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def configure(self, mode: str, ack: str):
+        self.mode = mode
+        self.ack = ack
+
+    def on_inserted(self, handler: InsertedHandler):
+        """Run handler with every batch of newly written documents."""
+        self._handlers.append(handler)
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        if not self.enabled or self._task is not None:
+            return
+        self._db = db
+        self._accepting = True
+        self._task = asyncio.create_task(self._run(), name="repair-ingestion")
+        logger.info(f"Batched repair request ingestion started (ack on {self.ack}, batches of {self.batch_size})")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # Refuse new submissions and let the flusher write what is already queued
+        self._accepting = False
+        await self._queue.put(None)
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+
+    async def submit(self, document: Dict[str, Any]):
+        """Queue a document for writing; with commit acks, wait until it is stored."""
+        if not self._accepting:
+            raise IngestQueueFull()
+        future = asyncio.get_running_loop().create_future() if self.ack == "commit" else None
+        try:
+            self._queue.put_nowait(_Submission(document, future))
+        except asyncio.QueueFull:
+            raise IngestQueueFull()
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+        if future is not None:
+            await future
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                return
+            # Wait for a full batch or the flush interval, whichever comes first
+            if self._queue.qsize() < self.batch_size - 1:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            batch = [first]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                submission = self._queue.get_nowait()
+                if submission is None:
+                    stopping = True
+                    break
+                batch.append(submission)
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"Repair request ingestion flush failed: {e}")
+                for submission in batch:
+                    self._fail(submission, IngestFailed(str(e)))
+
+    async def _flush(self, batch: List[_Submission]):
+        pending = batch
+        written: List[_Submission] = []
+        while pending:
+            for submission in pending:
+                submission.attempts += 1
+            try:
+                await self._db[self.collection].insert_many([submission.document for submission in pending], ordered=False)
+                written.extend(pending)
+                pending = []
+            except BulkWriteError as e:
+                failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+                retry: List[_Submission] = []
+                for index, submission in enumerate(pending):
+                    error = failed.get(index)
+                    if error is None:
+                        written.append(submission)
+                        continue
+                    field = _duplicate_field(error) if error.get("code") == DUPLICATE_KEY else None
+                    if field == "_id":
+                        # Our own _id: written by an earlier attempt whose acknowledgement was lost
+                        written.append(submission)
+                    elif field == "ticket_id" and await self._is_written(submission):
+                        written.append(submission)
+                    elif field == "ticket_id" and submission.ticket_id_attempts < TICKET_ID_ATTEMPTS:
+                        # Another ticket holds the id, only possible while two workers share a node id
+                        self._reissue_ticket_id(submission)
+                        retry.append(submission)
+                    else:
+                        self._fail(submission, IngestFailed(error.get("errmsg", "write error")))
+                pending = retry
+            except (ConnectionFailure, OperationFailure) as e:
+                # Outcome unknown: retry the whole batch, duplicates are recognised by key above
+                if pending[0].attempts >= INGEST_MAX_ATTEMPTS:
+                    for submission in pending:
+                        self._fail(submission, IngestFailed(str(e)))
+                    pending = []
+                else:
+                    logger.warning(f"Repair request batch write failed, retrying: {e}")
+                    await asyncio.sleep(0.1 * 2 ** pending[0].attempts)
+
+        for submission in written:
+            if submission.future is not None and not submission.future.done():
+                submission.future.set_result(None)
+        if written:
+            documents = [submission.document for submission in written]
+            for handler in self._handlers:
+                try:
+                    await handler(self._db, documents)
+                except Exception as e:
+                    logger.warning(f"Post-insert handler failed for {len(documents)} repair requests: {e}")
+
+    async def _is_written(self, submission: _Submission) -> bool:
+        document_id = submission.document.get("_id")
+        if submission.attempts == 1 or document_id is None:
+            return False
+        return await self._db[self.collection].find_one({"_id": document_id}, {"_id": 1}) is not None
+
+    def _reissue_ticket_id(self, submission: _Submission):
+        old_ticket_id = submission.document["ticket_id"]
+        submission.document["ticket_id"] = new_ticket_id()
+        submission.ticket_id_attempts += 1
+        if submission.future is None:
+            # The client was already answered with the old id
+            logger.error(f"Queued repair request {old_ticket_id} was stored as {submission.document['ticket_id']}, its id was taken")
+        else:
+            logger.warning(f"Ticket id {old_ticket_id} already taken, retrying with a new one")
+
+    def _fail(self, submission: _Submission, error: Exception):
+        if submission.future is not None:
+            if not submission.future.done():
+                submission.future.set_exception(error)
+        else:
+            # Already acknowledged to the client, so the ticket only survives in the log
+            logger.error(f"Dropped queued repair request {submission.document.get('ticket_id')}: {error}")
+
+repair_ingestion = IngestionPipeline()
@@ -0,0 +1,115 @@
+"""Maintenance commands for the FixNet backend.
+
+    python -m backend.manage backfill-search
+    python -m backend.manage reconcile-stats
+    python -m backend.manage backfill-rollups
+    python -m backend.manage sync-indexes
+    python -m backend.manage set-admin-password admin@fixnet.com
+    python -m backend.manage set-admin-active admin@fixnet.com --inactive
+"""
+import argparse
+import asyncio
+import getpass
+import logging
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from .database import connect_to_mongo, close_mongo_connection, get_database
+from .indexes import sync_indexes
+from .search import backfill_search_fields
+from .stats import reconcile_dashboard_counters
+from .analytics import rebuild_rollups
+from .inbox import reconcile_unread_count
+from .auth import set_admin_password, set_admin_active
+from .cache import cache_invalidator
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+async def backfill_search(args):
+    db = await get_database()
+    updated = await backfill_search_fields(db, batch_size=args.batch_size)
+    logger.info(f"Backfilled search fields on {updated} repair requests")
+
+async def sync_index_spec(args):
+    db = await get_database()
+    result = await sync_indexes(db, force=args.force)
+    if result["skipped"]:
+        logger.info(f"Indexes already at spec v{result['version']}")
+    else:
+        logger.info(f"Applied index spec v{result['version']}, created: {', '.join(result['created']) or 'none'}")
+
+async def reconcile_stats(args):
+    db = await get_database()
+    await reconcile_dashboard_counters(db)
+    await reconcile_unread_count(db)
+
+async def backfill_rollups(args):
+    db = await get_database()
+    await rebuild_rollups(db, batch_size=args.batch_size)
+
+async def change_admin_password(args):
+    db = await get_database()
+    password = getpass.getpass("New password: ")
+    if not await set_admin_password(db, args.email, password):
+        logger.error(f"No admin user {args.email}")
+        return
+    logger.info(f"Password changed for {args.email}, existing sessions revoked")
+
+async def change_admin_active(args):
+    db = await get_database()
+    if not await set_admin_active(db, args.email, args.active):
+        logger.error(f"No admin user {args.email}")
+        return
+    logger.info(f"Admin {args.email} {'activated' if args.active else 'deactivated'}")
+
+async def run(args):
+    # Index sync is an explicit command here, never a side effect of connecting
+    await connect_to_mongo(index_sync=False)
+    # Lets running servers drop cached sessions when the shared backend is enabled
+    await cache_invalidator.start(await get_database())
+    try:
+        await args.handler(args)
+    finally:
+        await cache_invalidator.stop()
+        await close_mongo_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description="FixNet backend maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill-search", help="Populate search fields on existing repair requests")
+    backfill.add_argument("--batch-size", type=int, default=500)
+    backfill.set_defaults(handler=backfill_search)
+
+    indexes = commands.add_parser("sync-indexes", help="Create missing indexes from the declarative spec")
+    indexes.add_argument("--force", action="store_true", help="Compare against the database even if this spec was already applied")
+    indexes.set_defaults(handler=sync_index_spec)
+
+    reconcile = commands.add_parser("reconcile-stats", help="Recompute dashboard and unread message counters")
+    reconcile.set_defaults(handler=reconcile_stats)
+
+    rollups = commands.add_parser("backfill-rollups", help="Rebuild the hourly and daily analytics rollups from repair requests")
+    rollups.add_argument("--batch-size", type=int, default=1000)
+    rollups.set_defaults(handler=backfill_rollups)
+
+    password = commands.add_parser("set-admin-password", help="Change an admin password and revoke their sessions")
+    password.add_argument("email")
+    password.set_defaults(handler=change_admin_password)
+
+    active = commands.add_parser("set-admin-active", help="Activate or deactivate an admin user")
+    active.add_argument("email")
+    active.add_argument("--inactive", dest="active", action="store_false")
+    active.set_defaults(handler=change_admin_active, active=True)
+
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
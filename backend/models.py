@@ -1,10 +1,12 @@
 from pydantic import BaseModel, Field, EmailStr, validator
-from typing import Optional, List
+from typing import Optional, List, Union, Dict, Any
 from datetime import datetime
 from enum import Enum
 import uuid
 import re
 
+from .ticket_ids import new_ticket_id
+
 class RepairStatus(str, Enum):
     NEW = "New"
     IN_PROGRESS = "In Progress"
@@ -56,7 +58,7 @@ class RepairRequestCreate(BaseModel):
 
 class RepairRequest(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    ticket_id: str = Field(default_factory=lambda: f"FN-{datetime.now().year}-{str(uuid.uuid4())[:8].upper()}")
+    ticket_id: str = Field(default_factory=new_ticket_id)
     customerName: str
     customerEmail: EmailStr
     customerPhone: str
@@ -83,6 +85,28 @@ class RepairRequest(BaseModel):
     class Config:
         use_enum_values = True
 
+class RepairRequestSummary(BaseModel):
+    """Compact list representation with just the admin table columns."""
+    ticket_id: str
+    customerName: str
+    customerEmail: EmailStr
+    customerPhone: str
+    deviceBrand: str
+    deviceModel: str
+    issueCategory: str
+    specificIssue: str
+    descriptionPreview: Optional[str] = None
+    status: RepairStatus
+    priority: PriorityLevel
+    assignedTech: Optional[str] = None
+    estimatedCost: Optional[float] = None
+    createdAt: datetime
+    updatedAt: datetime
+    estimatedCompletion: Optional[datetime] = None
+
+    class Config:
+        use_enum_values = True
+
 class RepairRequestUpdate(BaseModel):
     status: Optional[RepairStatus] = None
     priority: Optional[PriorityLevel] = None
@@ -102,6 +126,7 @@ class AdminUser(BaseModel):
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
     last_login: Optional[datetime] = None
+    password_changed_at: Optional[datetime] = None
 
 class AdminLogin(BaseModel):
     email: EmailStr
@@ -128,7 +153,10 @@ class RepairRequestResponse(BaseModel):
 class RepairRequestListResponse(BaseModel):
     success: bool
     total: int
-    requests: List[RepairRequest]
+    total_is_exact: bool = True
+    # Full documents, summaries (view=summary) or partial documents (fields=...)
+    requests: List[Union[RepairRequest, RepairRequestSummary, Dict[str, Any]]]
+    next_cursor: Optional[str] = None
 
 class StatusUpdateRequest(BaseModel):
     ticket_id: str
@@ -138,6 +166,41 @@ class StatusUpdateRequest(BaseModel):
     class Config:
         use_enum_values = True
 
+class BulkOperationType(str, Enum):
+    SET_STATUS = "set_status"
+    UPDATE = "update"
+    DELETE = "delete"
+
+class BulkRepairOperation(BaseModel):
+    operation: BulkOperationType
+    ticket_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    status: Optional[RepairStatus] = None
+    notes: Optional[str] = None
+    update: Optional[RepairRequestUpdate] = None
+
+    class Config:
+        use_enum_values = True
+
+class BulkRepairRequest(BaseModel):
+    operations: List[BulkRepairOperation] = Field(..., min_length=1, max_length=50)
+
+class BulkItemResult(BaseModel):
+    ticket_id: str
+    operation: BulkOperationType
+    success: bool
+    result: str
+    error: Optional[str] = None
+
+    class Config:
+        use_enum_values = True
+
+class BulkRepairResponse(BaseModel):
+    success: bool
+    processed: int
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
 class ContactMessage(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str = Field(..., min_length=2, max_length=100)
@@ -151,4 +214,31 @@ class ContactMessageCreate(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
     email: EmailStr
     subject: str = Field(..., min_length=2, max_length=200)
-    message: str = Field(..., min_length=10, max_length=2000)
\ No newline at end of file
+    message: str = Field(..., min_length=10, max_length=2000)
+
+class ContactBulkAction(str, Enum):
+    MARK_READ = "mark_read"
+    MARK_UNREAD = "mark_unread"
+    DELETE = "delete"
+
+class ContactBulkRequest(BaseModel):
+    action: ContactBulkAction
+    ids: List[str] = Field(..., min_length=1, max_length=5000)
+
+    class Config:
+        use_enum_values = True
+
+class ContactBulkResponse(BaseModel):
+    success: bool
+    action: ContactBulkAction
+    requested: int
+    changed: int
+    unread: int
+
+    class Config:
+        use_enum_values = True
+
+class ProfilingConfig(BaseModel):
+    enabled: bool
+    sample_rate: float = Field(0.0, ge=0.0, le=1.0)
+    threshold_ms: float = Field(500.0, ge=0.0)
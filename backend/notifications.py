@@ -0,0 +1,248 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import uuid
+
+from .telegram_bot import telegram_bot
+
+logger = logging.getLogger(__name__)
+
+# Outbox configuration
+OUTBOX_COLLECTION = "notification_outbox"
+MAX_ATTEMPTS = 8
+BASE_BACKOFF_SECONDS = 5
+MAX_BACKOFF_SECONDS = 15 * 60
+LEASE_SECONDS = 60
+IDLE_POLL_SECONDS = 5.0
+DIGEST_MAX_ITEMS = 20
+
+class NotificationStatus:
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    DEAD = "dead"
+
+class NotificationKind:
+    NEW_TICKET = "new_ticket"
+    STATUS_UPDATE = "status_update"
+    CONTACT_MESSAGE = "contact_message"
+    BULK_SUMMARY = "bulk_summary"
+
+# Notification kinds that may be coalesced into a digest message
+DIGEST_KINDS = [NotificationKind.NEW_TICKET, NotificationKind.STATUS_UPDATE]
+
+def _outbox_entry(kind: str, payload: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "payload": payload,
+        "status": NotificationStatus.PENDING,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        "updated_at": now,
+        "last_error": None
+    }
+
+async def enqueue_notification(db: AsyncIOMotorDatabase, kind: str, payload: Dict[str, Any]) -> str:
+    """Write a notification to the outbox and wake the delivery worker."""
+    entry = _outbox_entry(kind, payload, datetime.utcnow())
+    await db[OUTBOX_COLLECTION].insert_one(entry)
+    notification_worker.wake()
+    return entry["id"]
+
+async def enqueue_notifications(db: AsyncIOMotorDatabase, kind: str, payloads: List[Dict[str, Any]]) -> List[str]:
+    """Write several notifications of one kind to the outbox in a single insert."""
+    if not payloads:
+        return []
+    now = datetime.utcnow()
+    entries = [_outbox_entry(kind, payload, now) for payload in payloads]
+    await db[OUTBOX_COLLECTION].insert_many(entries)
+    notification_worker.wake()
+    return [entry["id"] for entry in entries]
+
+async def outbox_backlog(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Undelivered notification counts and the age of the oldest one due."""
+    now = datetime.utcnow()
+    pending, dead, oldest = await asyncio.gather(
+        db[OUTBOX_COLLECTION].count_documents({"status": {"$in": [NotificationStatus.PENDING, NotificationStatus.SENDING]}}),
+        db[OUTBOX_COLLECTION].count_documents({"status": NotificationStatus.DEAD}),
+        db[OUTBOX_COLLECTION].find_one(
+            {"status": NotificationStatus.PENDING, "next_attempt_at": {"$lte": now}},
+            {"next_attempt_at": 1},
+            sort=[("status", 1), ("next_attempt_at", 1)]
+        )
+    )
+    return {
+        "pending": pending,
+        "dead": dead,
+        "oldest_due_seconds": round((now - oldest["next_attempt_at"]).total_seconds(), 3) if oldest else 0.0
+    }
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Exponential backoff for the given number of failed attempts."""
+    seconds = min(BASE_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0)), MAX_BACKOFF_SECONDS)
+    return timedelta(seconds=seconds)
+
+async def deliver(notification: Dict[str, Any]) -> bool:
+    """Send a single outbox notification through the Telegram bot."""
+    kind = notification.get("kind")
+    payload = notification.get("payload") or {}
+
+    if kind == NotificationKind.NEW_TICKET:
+        return await telegram_bot.send_new_ticket_notification(payload)
+    if kind == NotificationKind.STATUS_UPDATE:
+        return await telegram_bot.send_status_update_notification(**payload)
+    if kind == NotificationKind.CONTACT_MESSAGE:
+        return await telegram_bot.send_contact_message_notification(payload)
+    if kind == NotificationKind.BULK_SUMMARY:
+        return await telegram_bot.send_bulk_summary_notification(payload)
+
+    raise ValueError(f"Unknown notification kind: {kind}")
+
+async def deliver_digest(notifications: List[Dict[str, Any]]) -> bool:
+    """Send a burst of ticket notifications as one digest message."""
+    new_tickets = [n["payload"] for n in notifications if n["kind"] == NotificationKind.NEW_TICKET]
+    status_updates = [n["payload"] for n in notifications if n["kind"] == NotificationKind.STATUS_UPDATE]
+    return await telegram_bot.send_digest(new_tickets, status_updates)
+
+class NotificationWorker:
+    """Background task that drains the notification outbox."""
+
+    def __init__(self):
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start draining the outbox in the background."""
+        if self._task is not None:
+            return
+        self.db = db
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="notification-outbox")
+        logger.info("Notification outbox worker started")
+
+    async def stop(self):
+        """Stop the worker; undelivered notifications stay in the outbox."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Notification outbox worker stopped")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def wake(self):
+        """Signal the worker that new notifications are ready."""
+        self._wakeup.set()
+
+    async def _claim_next(self, kinds: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Atomically lease the next due notification."""
+        now = datetime.utcnow()
+        query = {
+            "$or": [
+                {"status": NotificationStatus.PENDING, "next_attempt_at": {"$lte": now}},
+                # Leases left behind by a crashed or restarted worker
+                {"status": NotificationStatus.SENDING, "next_attempt_at": {"$lte": now}}
+            ]
+        }
+        if kinds:
+            query["kind"] = {"$in": kinds}
+        
+        return await self.db[OUTBOX_COLLECTION].find_one_and_update(
+            query,
+            {"$set": {
+                "status": NotificationStatus.SENDING,
+                "next_attempt_at": now + timedelta(seconds=LEASE_SECONDS),
+                "updated_at": now
+            }},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _mark_sent(self, notification: Dict[str, Any]):
+        # Delivered entries are dropped rather than kept, since the payload holds customer details
+        await self.db[OUTBOX_COLLECTION].delete_one({"id": notification["id"]})
+
+    async def _mark_failed(self, notification: Dict[str, Any], error: str):
+        now = datetime.utcnow()
+        attempts = notification.get("attempts", 0) + 1
+
+        if attempts >= MAX_ATTEMPTS:
+            update = {"status": NotificationStatus.DEAD, "dead_at": now}
+            logger.error(f"Notification {notification['id']} moved to dead-letter after {attempts} attempts: {error}")
+        else:
+            update = {"status": NotificationStatus.PENDING, "next_attempt_at": now + backoff_delay(attempts)}
+            logger.warning(f"Notification {notification['id']} failed (attempt {attempts}), will retry: {error}")
+
+        update.update({"attempts": attempts, "updated_at": now, "last_error": error})
+        await self.db[OUTBOX_COLLECTION].update_one({"id": notification["id"]}, {"$set": update})
+
+    async def _claim_burst(self, first: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Lease further ticket notifications to coalesce with the first one."""
+        batch = [first]
+        while len(batch) < DIGEST_MAX_ITEMS:
+            notification = await self._claim_next(kinds=DIGEST_KINDS)
+            if notification is None:
+                break
+            batch.append(notification)
+        return batch
+
+    async def process_next(self) -> bool:
+        """Deliver due notifications. Returns False when the outbox is drained."""
+        notification = await self._claim_next()
+        if notification is None:
+            return False
+
+        # Above the chat rate limit, fold queued ticket notifications into a digest
+        batch = [notification]
+        if notification["kind"] in DIGEST_KINDS and not telegram_bot.limiter.has_token():
+            batch = await self._claim_burst(notification)
+
+        try:
+            if len(batch) > 1:
+                delivered = await deliver_digest(batch)
+            else:
+                delivered = await deliver(notification)
+            error = None if delivered else "Telegram API rejected the message"
+        except Exception as e:
+            delivered = False
+            error = str(e)
+
+        for item in batch:
+            if delivered:
+                await self._mark_sent(item)
+            else:
+                await self._mark_failed(item, error)
+        return True
+
+    async def _run(self):
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                while await self.process_next():
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification outbox worker error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=IDLE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+notification_worker = NotificationWorker()
@@ -0,0 +1,37 @@
+from typing import Dict, Any, Tuple
+from datetime import datetime
+import base64
+import json
+
+def encode_cursor(created_at: datetime, key: str) -> str:
+    """Build an opaque cursor token from a document's sort key."""
+    raw = json.dumps({"t": created_at.isoformat(), "k": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str) -> Tuple[datetime, str]:
+    """Decode a cursor token. Raises ValueError for malformed tokens."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["t"]), str(data["k"])
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+def keyset_filter(created_field: str, key_field: str, created_at: datetime, key: str) -> Dict[str, Any]:
+    """Filter for documents after the cursor in (created desc, key desc) order."""
+    return {
+        "$or": [
+            {created_field: {"$lt": created_at}},
+            {created_field: created_at, key_field: {"$lt": key}}
+        ]
+    }
+
+def keyset_sort(created_field: str, key_field: str):
+    """Sort specification matching keyset_filter."""
+    return [(created_field, -1), (key_field, -1)]
+
+def merge_filters(query: Dict[str, Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine two Mongo filters without clobbering top-level operators."""
+    if not query:
+        return extra
+    return {"$and": [query, extra]}
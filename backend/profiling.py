@@ -0,0 +1,290 @@
+from pymongo import monitoring
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+import cProfile
+import hmac
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Routers whose requests may be profiled
+PROFILED_PREFIXES = ("/api/repair-requests", "/api/contact", "/api/auth")
+# Long-lived streams would hold the call profiler for as long as they stay open
+UNPROFILED_PATHS = ("/api/repair-requests/events",)
+PROFILE_HEADER = "x-profile"
+# Sent as the X-Profile value, forces a profile without an admin token
+PROFILING_SECRET = os.environ.get("PROFILING_SECRET", "")
+PROFILE_ID_HEADER = "X-Profile-Id"
+MAX_SPANS = 1000
+TOP_FUNCTIONS = 40
+
+class RequestProfile:
+    """Timeline of one request, with a call profile of the event loop while it ran."""
+
+    def __init__(self, method: str, path: str, forced: bool):
+        self.id = str(uuid.uuid4())
+        self.method = method
+        self.path = path
+        self.forced = forced
+        self.route: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped_spans = 0
+        self.call_profile: Optional[str] = None
+        self.pstats_dump: Optional[bytes] = None
+        # Other requests served on the loop while the call profile was recording
+        self.overlapping_requests = 0
+
+    def offset_ms(self, at: float) -> float:
+        return round((at - self.started) * 1000, 3)
+
+    def add_span(self, kind: str, name: str, started: float, duration: float, **details: Any):
+        # Called from pymongo's executor threads as well; list.append is atomic
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped_spans += 1
+            return
+        self.spans.append({
+            "kind": kind,
+            "name": name,
+            "start_ms": self.offset_ms(started),
+            "duration_ms": round(duration * 1000, 3),
+            **details
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "spans": len(self.spans),
+            "has_call_profile": self.call_profile is not None,
+            "overlapping_requests": self.overlapping_requests
+        }
+
+    def detail(self) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "timeline": sorted(self.spans, key=lambda span: span["start_ms"]),
+            "dropped_spans": self.dropped_spans,
+            # cProfile sees everything the loop thread ran, not just this request
+            "call_profile_scope": "event_loop",
+            "call_profile": self.call_profile
+        }
+
+# The profile of the request being served, visible to awaited calls and, through
+# motor's context-copying executor, to pymongo's command events
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+class Profiler:
+    """Runtime profiling settings and the ring buffer of kept profiles."""
+
+    def __init__(self):
+        self.enabled = os.environ.get("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+        self.sample_rate = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+        self.threshold_ms = float(os.environ.get("PROFILING_THRESHOLD_MS", "500"))
+        self.profiles: "deque[RequestProfile]" = deque(maxlen=int(os.environ.get("PROFILING_BUFFER_SIZE", "50")))
+        # cProfile observes the whole thread, so only one request holds it at a time
+        self._call_profiler_lock = threading.Lock()
+        # Requests seen by the middleware, to tell how many shared the loop with a call profile
+        self.in_flight = 0
+        self.admitted = 0
+
+    def config(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "threshold_ms": self.threshold_ms,
+            "buffer_size": self.profiles.maxlen
+        }
+
+    def configure(self, enabled: bool, sample_rate: float, threshold_ms: float):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.threshold_ms = threshold_ms
+        logger.info(f"Profiling {'enabled' if enabled else 'disabled'} (sample rate {sample_rate}, threshold {threshold_ms}ms)")
+
+    def should_profile(self, path: str, forced: bool) -> bool:
+        if not self.enabled or not path.startswith(PROFILED_PREFIXES) or path in UNPROFILED_PATHS:
+            return False
+        return forced or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        for profile in self.profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def keep(self, profile: RequestProfile):
+        self.profiles.append(profile)
+
+    def clear(self):
+        self.profiles.clear()
+
+profiler = Profiler()
+
+def _format_call_profile(call_profiler: cProfile.Profile, overlapping_requests: int) -> str:
+    output = io.StringIO()
+    output.write(
+        f"Event loop sample: {overlapping_requests} other request(s) ran on this loop while it was recorded, "
+        "and their calls are included.\n"
+    )
+    stats = pstats.Stats(call_profiler, stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+    return output.getvalue()
+
+TokenAuthorizer = Callable[[str], Awaitable[bool]]
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles sampled or explicitly requested calls."""
+
+    def __init__(self, app, authorize: Optional[TokenAuthorizer] = None):
+        self.app = app
+        # Checks the bearer token of a request asking for a profile with X-Profile: 1
+        self.authorize = authorize
+
+    async def _forced(self, scope) -> bool:
+        """Whether the request asked for a profile and is allowed to force one."""
+        headers = dict(scope["headers"])
+        requested = headers.get(PROFILE_HEADER.encode())
+        if not requested or not profiler.should_profile(scope["path"], True):
+            return False
+        if PROFILING_SECRET and hmac.compare_digest(requested, PROFILING_SECRET.encode()):
+            return True
+        if requested.lower() not in (b"1", b"true", b"yes") or self.authorize is None:
+            return False
+        scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        try:
+            return await self.authorize(token.strip())
+        except Exception as e:
+            logger.warning(f"Could not check the token of a profile request: {e}")
+            return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        profiler.in_flight += 1
+        profiler.admitted += 1
+        try:
+            await self._serve(scope, receive, send)
+        finally:
+            profiler.in_flight -= 1
+
+    async def _serve(self, scope, receive, send):
+        # Anyone else asking is only sampled, so callers cannot flood the buffer
+        forced = await self._forced(scope)
+        if not profiler.should_profile(scope["path"], forced):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], forced)
+        token = current_profile.set(profile)
+
+        call_profiler = None
+        if profiler._call_profiler_lock.acquire(blocking=False):
+            # Requests already running, plus every one admitted before it stops
+            overlapping = profiler.in_flight - 1 - profiler.admitted
+            call_profiler = cProfile.Profile()
+            call_profiler.enable()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(PROFILE_ID_HEADER.lower().encode(), profile.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if call_profiler is not None:
+                call_profiler.disable()
+                profiler._call_profiler_lock.release()
+                profile.overlapping_requests = overlapping + profiler.admitted
+            current_profile.reset(token)
+
+            profile.duration_ms = round((time.perf_counter() - profile.started) * 1000, 3)
+            profile.route = getattr(scope.get("route"), "path", None)
+            if profile.forced or profile.duration_ms >= profiler.threshold_ms:
+                # Formatting is only paid for profiles that are kept
+                if call_profiler is not None:
+                    profile.call_profile = _format_call_profile(call_profiler, profile.overlapping_requests)
+                    call_profiler.create_stats()
+                    profile.pstats_dump = marshal.dumps(call_profiler.stats)
+                profiler.keep(profile)
+
+class ProfilingCommandListener(monitoring.CommandListener):
+    """Adds Mongo commands issued by a profiled request to its timeline."""
+
+    def __init__(self):
+        self._started: Dict[int, Tuple[float, str]] = {}
+
+    def started(self, event):
+        if current_profile.get() is None:
+            return
+        # getMore carries the cursor id under its name and the collection separately
+        name_field = "collection" if event.command_name == "getMore" else event.command_name
+        collection = event.command.get(name_field)
+        self._started[event.request_id] = (time.perf_counter(), collection if isinstance(collection, str) else "")
+
+    def _finish(self, event, failed: bool):
+        started = self._started.pop(event.request_id, None)
+        profile = current_profile.get()
+        if profile is None or started is None:
+            return
+        started_at, collection = started
+        profile.add_span(
+            "mongo",
+            f"{event.command_name} {collection}".strip(),
+            started_at,
+            event.duration_micros / 1e6,
+            failed=failed
+        )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+profiling_command_listener = ProfilingCommandListener()
+
+async def _httpx_request_started(request):
+    if current_profile.get() is not None:
+        request.extensions["profile_started"] = time.perf_counter()
+
+async def _httpx_response_received(response):
+    profile = current_profile.get()
+    started = response.request.extensions.get("profile_started")
+    if profile is not None and started is not None:
+        profile.add_span(
+            "http",
+            # Only the last path segment, Telegram URLs carry the bot token
+            f"{response.request.method} {response.request.url.host} {response.request.url.path.rsplit('/', 1)[-1]}",
+            started,
+            time.perf_counter() - started,
+            status_code=response.status_code
+        )
+
+# Event hooks for httpx clients whose calls should show up in request timelines
+HTTPX_EVENT_HOOKS = {"request": [_httpx_request_started], "response": [_httpx_response_received]}
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.security import HTTPBearer
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from ..models import AdminLogin, TokenResponse, AdminResponse
-from ..auth import authenticate_admin, create_access_token, get_current_admin, ACCESS_TOKEN_EXPIRE_MINUTES
+from ..auth import (
+    authenticate_admin, create_access_token, get_current_admin, ACCESS_TOKEN_EXPIRE_MINUTES,
+    AuthBusyError, email_login_throttle, ip_login_throttle, client_ip, get_cached_admin_user, revoke_token,
+    create_stream_ticket, STREAM_TICKET_TTL_SECONDS
+)
 from ..database import get_database
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
@@ -13,18 +17,45 @@ security = HTTPBearer()
 @router.post("/login", response_model=TokenResponse)
 async def login(
     login_data: AdminLogin,
+    request: Request,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Authenticate admin and return access token."""
+    ip_key = client_ip(request)
+    email_key = f"{login_data.email.lower()}|{ip_key}"
+    
     try:
-        user = await authenticate_admin(db, login_data.email, login_data.password)
+        # Reject throttled callers before doing any bcrypt work
+        retry_after = max(
+            email_login_throttle.retry_after(email_key) or 0,
+            ip_login_throttle.retry_after(ip_key) or 0
+        )
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed login attempts, try again later",
+                headers={"Retry-After": str(int(retry_after) + 1)}
+            )
+        
+        try:
+            user = await authenticate_admin(db, login_data.email, login_data.password)
+        except AuthBusyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Login is temporarily busy, try again shortly",
+                headers={"Retry-After": "1"}
+            )
         
         if not user:
+            email_login_throttle.record_failure(email_key)
+            ip_login_throttle.record_failure(ip_key)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
             )
         
+        email_login_throttle.reset(email_key)
+        
         # Update last login
         await db.admin_users.update_one(
             {"email": user.email},
@@ -59,15 +90,15 @@ async def get_current_user(
 ):
     """Get current admin user information."""
     try:
-        user_data = await db.admin_users.find_one({"email": admin_email})
+        user = await get_cached_admin_user(db, admin_email)
         
-        if not user_data:
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        return AdminResponse(**user_data)
+        return AdminResponse(**user.dict())
         
     except HTTPException:
         raise
@@ -78,9 +109,32 @@ async def get_current_user(
         )
 
 @router.post("/logout")
-async def logout(admin_email: str = Depends(get_current_admin)):
-    """Logout endpoint (client should delete token)."""
-    return {"success": True, "message": "Logged out successfully"}
+async def logout(
+    admin_email: str = Depends(get_current_admin),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Logout endpoint: revokes the current token on the server."""
+    try:
+        await revoke_token(db, credentials.credentials, admin_email)
+        return {"success": True, "message": "Logged out successfully"}
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Logout failed: {str(e)}"
+        )
+
+@router.post("/stream-ticket")
+async def issue_stream_ticket(
+    admin_email: str = Depends(get_current_admin),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Short-lived ticket for opening the event stream, which cannot send an Authorization header."""
+    return {
+        "ticket": create_stream_ticket(credentials.credentials),
+        "expires_in": STREAM_TICKET_TTL_SECONDS
+    }
 
 @router.get("/validate-token")
 async def validate_token(admin_email: str = Depends(get_current_admin)):
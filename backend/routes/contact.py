@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from typing import List, Optional
+from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 import logging
 
-from ..models import ContactMessage, ContactMessageCreate
-from ..database import get_database
+from ..models import ContactMessage, ContactMessageCreate, ContactBulkRequest, ContactBulkResponse
+from ..database import get_database, get_read_database
+from ..pagination import encode_cursor, decode_cursor, keyset_filter, keyset_sort, merge_filters
 from ..auth import get_current_admin
-from ..telegram_bot import telegram_bot
+from ..notifications import enqueue_notification, NotificationKind
+from ..export import export_response, EXPORT_FORMATS, EXPORT_BATCH_SIZE
+from ..serialization import FastJSONResponse
+from ..inbox import adjust_unread, get_unread_count, apply_bulk_action
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/contact", tags=["Contact"])
@@ -25,11 +31,13 @@ async def create_contact_message(
         result = await db.contact_messages.insert_one(contact_message.dict())
         
         if result.inserted_id:
-            # Send Telegram notification
+            await adjust_unread(db, 1)
+            
+            # Queue Telegram notification
             try:
-                await telegram_bot.send_contact_message_notification(contact_message.dict())
+                await enqueue_notification(db, NotificationKind.CONTACT_MESSAGE, contact_message.dict())
             except Exception as e:
-                logger.warning(f"Failed to send Telegram notification: {e}")
+                logger.warning(f"Failed to queue Telegram notification: {e}")
             
             return {
                 "success": True,
@@ -45,11 +53,12 @@ async def create_contact_message(
 
 @router.get("/", response_model=List[ContactMessage])
 async def get_contact_messages(
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
     limit: int = Query(50, ge=1, le=100, description="Items per page"),
     unread_only: bool = Query(False, description="Show only unread messages"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous X-Next-Cursor header"),
     admin_email: str = Depends(get_current_admin),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_read_database)
 ):
     """Get all contact messages (admin only)."""
     try:
@@ -58,37 +67,125 @@ async def get_contact_messages(
         if unread_only:
             query["is_read"] = False
         
-        # Get paginated results
-        skip = (page - 1) * limit
-        cursor = db.contact_messages.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        messages_data = await cursor.to_list(length=limit)
+        # Get paginated results, by keyset when a cursor is given
+        sort = keyset_sort("created_at", "id")
+        if cursor:
+            try:
+                after_created, after_id = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            page_query = merge_filters(query, keyset_filter("created_at", "id", after_created, after_id))
+            results = db.contact_messages.find(page_query, {"_id": 0}).sort(sort).limit(limit)
+        else:
+            skip = (page - 1) * limit
+            results = db.contact_messages.find(query, {"_id": 0}).sort(sort).skip(skip).limit(limit)
+        messages_data = await results.to_list(length=limit)
         
-        # Convert to ContactMessage objects
-        messages = [ContactMessage(**msg) for msg in messages_data]
+        # The list body is kept for compatibility, so the cursor travels in a header
+        headers = {}
+        if len(messages_data) == limit:
+            last = messages_data[-1]
+            headers["X-Next-Cursor"] = encode_cursor(last["created_at"], last["id"])
         
-        return messages
+        # Stored messages were validated on create and are passed through untouched
+        return FastJSONResponse(messages_data, headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching contact messages: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/export")
+async def export_contact_messages(
+    request: Request,
+    format: str = Query("csv", description="Export format: csv or ndjson"),
+    unread_only: bool = Query(False, description="Export only unread messages"),
+    admin_email: str = Depends(get_current_admin),
+    db: AsyncIOMotorDatabase = Depends(get_read_database)
+):
+    """Stream every matching contact message as CSV or NDJSON."""
+    try:
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Invalid export format: {format}")
+        
+        query = {}
+        if unread_only:
+            query["is_read"] = False
+        
+        cursor = db.contact_messages.find(query, {"_id": 0}) \
+            .sort(keyset_sort("created_at", "id")) \
+            .batch_size(EXPORT_BATCH_SIZE)
+        return export_response(
+            cursor,
+            format,
+            list(ContactMessage.__fields__),
+            f"contact-messages-{datetime.utcnow():%Y%m%d-%H%M%S}",
+            request.headers.get("accept-encoding")
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting contact messages: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/unread-count")
+async def get_unread_message_count(
+    admin_email: str = Depends(get_current_admin),
+    db: AsyncIOMotorDatabase = Depends(get_read_database)
+):
+    """Number of unread contact messages, from the maintained counter."""
+    try:
+        return {"success": True, "unread": await get_unread_count(db)}
+        
+    except Exception as e:
+        logger.error(f"Error fetching unread message count: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk", response_model=ContactBulkResponse)
+async def bulk_contact_messages(
+    bulk_request: ContactBulkRequest,
+    admin_email: str = Depends(get_current_admin),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Mark read, mark unread or delete many contact messages in one request."""
+    try:
+        result = await apply_bulk_action(db, bulk_request.action, bulk_request.ids)
+        return {
+            "success": True,
+            "action": bulk_request.action,
+            **result,
+            "unread": await get_unread_count(db)
+        }
+        
+    except Exception as e:
+        logger.error(f"Error running bulk contact action {bulk_request.action}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{message_id}/read")
 async def mark_message_as_read(
     message_id: str,
     admin_email: str = Depends(get_current_admin),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Mark a contact message as read."""
+    """Mark a contact message as read; an already-read message succeeds with already_read set."""
     try:
-        result = await db.contact_messages.update_one(
+        # The previous state tells whether this call is the one that read it
+        previous = await db.contact_messages.find_one_and_update(
             {"id": message_id},
-            {"$set": {"is_read": True}}
+            {"$set": {"is_read": True}},
+            projection={"_id": 0, "is_read": 1},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.modified_count > 0:
-            return {"success": True, "message": "Message marked as read"}
-        else:
+        if previous is None:
             raise HTTPException(status_code=404, detail="Message not found")
+        if previous.get("is_read"):
+            return {"success": True, "already_read": True, "message": "Message already read"}
+        
+        await adjust_unread(db, -1)
+        return {"success": True, "already_read": False, "message": "Message marked as read"}
             
     except HTTPException:
         raise
@@ -104,9 +201,11 @@ async def delete_contact_message(
 ):
     """Delete a contact message."""
     try:
-        result = await db.contact_messages.delete_one({"id": message_id})
+        deleted_message = await db.contact_messages.find_one_and_delete({"id": message_id}, {"is_read": 1})
         
-        if result.deleted_count > 0:
+        if deleted_message:
+            if not deleted_message.get("is_read"):
+                await adjust_unread(db, -1)
             return {"success": True, "message": "Message deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Message not found")
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Request
+import logging
+import os
+
+from ..database import db_instance, ping_database, pool_metrics, PING_CACHE_SECONDS
+from ..notifications import outbox_backlog, notification_worker
+from ..cache import cached
+from ..serialization import FastJSONResponse
+from .metrics import monitoring_authorized
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/health", tags=["Health"])
+
+# Above this many undelivered notifications the worker reports itself degraded
+MAX_OUTBOX_BACKLOG = int(os.environ.get("READINESS_MAX_OUTBOX_BACKLOG", "500"))
+
+class ServiceState:
+    """Lifecycle flags maintained by the application lifespan."""
+    started = False
+    stopping = False
+
+service_state = ServiceState()
+
+@router.get("")
+async def health_check():
+    return {"status": "healthy", "service": "FixNet Backend"}
+
+@router.get("/live")
+async def liveness():
+    """Liveness probe: the process is up and serving, no dependencies checked."""
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def readiness(request: Request):
+    """Readiness probe: 503 until started and while Mongo is unreachable; details need a monitoring token."""
+    mongo = await ping_database()
+    pool = pool_metrics.snapshot()
+    
+    outbox = None
+    if mongo["ok"]:
+        try:
+            outbox = await cached("health:outbox", lambda: outbox_backlog(db_instance.db), ttl=PING_CACHE_SECONDS)
+        except Exception as e:
+            logger.warning(f"Could not read outbox backlog: {e}")
+    
+    if not service_state.started or service_state.stopping or not mongo["ok"]:
+        state, status_code = "not_ready", 503
+    elif (
+        (outbox is not None and outbox["pending"] > MAX_OUTBOX_BACKLOG)
+        or not notification_worker.running
+        or (pool["waiting"] > 0 and pool["checked_out"] >= pool["max_pool_size"])
+    ):
+        # Still serving, but worth alerting on
+        state, status_code = "degraded", 200
+    else:
+        state, status_code = "ready", 200
+    
+    if not await monitoring_authorized(request):
+        return FastJSONResponse({"status": state}, status_code=status_code)
+    
+    return FastJSONResponse({
+        "status": state,
+        "started": service_state.started,
+        "stopping": service_state.stopping,
+        "mongo": mongo,
+        "mongo_pool": pool,
+        "outbox": outbox,
+        "notification_worker": notification_worker.running
+    }, status_code=status_code)
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+import hmac
+import os
+
+from ..metrics import registry
+from ..database import pool_metrics
+from ..cache import response_cache, auth_cache
+from ..ingestion import repair_ingestion
+from ..auth import is_admin_token
+
+router = APIRouter(prefix="/api/metrics", tags=["Metrics"])
+
+# Scrapers send this as a bearer token; without it only admin tokens are accepted
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+mongo_pool_connections = registry.gauge(
+    "mongo_pool_connections", "MongoDB pool connections by state", ("state",)
+)
+mongo_pool_checkout_failures = registry.gauge(
+    "mongo_pool_checkout_failures", "MongoDB pool check-out failures since start, by reason", ("reason",)
+)
+cache_entries = registry.gauge("cache_entries", "Entries held per in-process cache", ("cache",))
+cache_bytes = registry.gauge("cache_bytes", "Approximate encoded size of the entries held per size-bounded cache", ("cache",))
+cache_lookups = registry.gauge("cache_lookups", "Cache lookups since start, per cache and result", ("cache", "result"))
+repair_ingest_queue_depth = registry.gauge("repair_ingest_queue_depth", "Repair requests queued for a batched insert")
+
+def collect_runtime_gauges():
+    pool = pool_metrics.snapshot()
+    for state in ("open", "checked_out", "waiting", "max_pool_size"):
+        mongo_pool_connections.set(pool[state], state)
+    for reason, count in pool["checkout_failures"].items():
+        mongo_pool_checkout_failures.set(count, str(reason))
+    
+    for name, cache in (("response", response_cache), ("auth", auth_cache)):
+        stats = cache.stats()
+        cache_entries.set(stats["entries"], name)
+        if stats["max_bytes"] is not None:
+            cache_bytes.set(stats["bytes"], name)
+        cache_lookups.set(stats["hits"], name, "hit")
+        cache_lookups.set(stats["misses"], name, "miss")
+    
+    repair_ingest_queue_depth.set(repair_ingestion.depth)
+
+registry.on_collect(collect_runtime_gauges)
+
+async def monitoring_authorized(request: Request) -> bool:
+    """Whether the request carries the metrics token or an admin bearer token."""
+    supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if METRICS_TOKEN and hmac.compare_digest(supplied.encode(), METRICS_TOKEN.encode()):
+        return True
+    if not supplied:
+        return False
+    try:
+        return await is_admin_token(supplied)
+    except HTTPException:
+        # Admin tokens cannot be checked while the database is unavailable
+        return False
+
+@router.get("", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    """Prometheus text exposition of the process metrics, for the metrics token or an admin."""
+    if not await monitoring_authorized(request):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException, Depends, Response
+import logging
+
+from ..models import ProfilingConfig
+from ..auth import get_current_admin
+from ..profiling import profiler
+from ..serialization import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/admin/profiles", tags=["Profiling"])
+
+@router.get("")
+async def list_profiles(admin_email: str = Depends(get_current_admin)):
+    """Profiling settings and the kept profiles, newest first."""
+    return FastJSONResponse({
+        "config": profiler.config(),
+        "profiles": [profile.summary() for profile in reversed(profiler.profiles)]
+    })
+
+@router.put("/config")
+async def update_profiling_config(
+    config: ProfilingConfig,
+    admin_email: str = Depends(get_current_admin)
+):
+    """Turn profiling on or off for this worker and tune sampling."""
+    profiler.configure(config.enabled, config.sample_rate, config.threshold_ms)
+    logger.info(f"Profiling settings changed by {admin_email}")
+    return FastJSONResponse({"success": True, "config": profiler.config()})
+
+@router.delete("")
+async def clear_profiles(admin_email: str = Depends(get_current_admin)):
+    """Drop every kept profile."""
+    profiler.clear()
+    return {"success": True, "message": "Profiles cleared"}
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, admin_email: str = Depends(get_current_admin)):
+    """Timeline and call profile of one kept request."""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FastJSONResponse(profile.detail())
+
+@router.get("/{profile_id}/pstats")
+async def download_profile_stats(profile_id: str, admin_email: str = Depends(get_current_admin)):
+    """Raw cProfile stats, loadable with pstats or snakeviz."""
+    profile = profiler.get(profile_id)
+    if profile is None or profile.pstats_dump is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(
+        profile.pstats_dump,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.pstats"'}
+    )
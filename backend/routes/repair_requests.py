@@ -1,21 +1,103 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import asyncio
 import logging
+import time
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from ..models import (
     RepairRequestCreate, RepairRequest, RepairRequestUpdate, 
-    RepairRequestResponse, RepairRequestListResponse, StatusUpdateRequest,
-    RepairStatus, PriorityLevel
+    RepairRequestResponse, RepairRequestListResponse, RepairRequestSummary, StatusUpdateRequest,
+    RepairStatus, PriorityLevel, BulkRepairRequest, BulkRepairResponse, BulkOperationType
 )
-from ..database import get_database
-from ..auth import get_current_admin
-from ..telegram_bot import telegram_bot
+from ..database import get_database, get_read_database
+from ..stats import apply_transition, apply_transitions, get_dashboard_counters, get_dashboard_stats as read_dashboard_stats
+from ..search import build_search_query, search_fields, SEARCH_MODES
+from ..pagination import encode_cursor, decode_cursor, keyset_filter, keyset_sort, merge_filters
+from ..auth import get_current_admin, get_current_admin_stream, session_active
+from ..notifications import enqueue_notification, enqueue_notifications, NotificationKind
+from ..ticket_ids import new_ticket_id, TICKET_ID_ATTEMPTS
+from ..ingestion import repair_ingestion, IngestQueueFull, INGEST_RETRY_AFTER_SECONDS
+from ..cache import cached_json, cache_invalidator
+from ..serialization import FastJSONResponse, EncodedJSONResponse
+from ..export import export_response, EXPORT_FORMATS, EXPORT_BATCH_SIZE
+from ..analytics import get_timeseries, ROLLUP_BUCKETS, GROUP_BY_FIELDS, MAX_TIMESERIES_POINTS
+from ..events import ticket_events, format_sse, EVENT_HEARTBEAT_SECONDS, EVENT_RETRY_MS, EVENT_SESSION_CHECK_SECONDS
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/repair-requests", tags=["Repair Requests"])
 
+# Cached admin reads
+LIST_CACHE_TAG = "repair_requests:lists"
+STATS_CACHE_KEY = "repair_requests:stats"
+LIST_CACHE_TTL = 10
+TICKET_CACHE_TTL = 30
+STATS_CACHE_TTL = 10
+
+# Stored documents are returned as-is, minus Mongo's _id and the derived search fields
+REPAIR_REQUEST_PROJECTION = {"_id": 0, "customerPhoneDigits": 0, "customerPhoneSuffixes": 0, "searchTokens": 0}
+
+# Summary rows carry a short description preview instead of the full text
+DESCRIPTION_PREVIEW_LENGTH = 120
+SUMMARY_PROJECTION = {
+    "_id": 0,
+    **{field: 1 for field in RepairRequestSummary.__fields__ if field != "descriptionPreview"},
+    "descriptionPreview": {"$substrCP": ["$description", 0, DESCRIPTION_PREVIEW_LENGTH]}
+}
+LIST_VIEWS = ("full", "summary")
+
+def list_projection(view: str, fields: Optional[str]) -> dict:
+    """Mongo projection for the requested list representation."""
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in RepairRequest.__fields__]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        # The cursor is built from these, so they are always returned
+        return {"_id": 0, "ticket_id": 1, "createdAt": 1, **{field: 1 for field in requested}}
+    if view == "summary":
+        return SUMMARY_PROJECTION
+    return REPAIR_REQUEST_PROJECTION
+
+def ticket_cache_key(ticket_id: str) -> str:
+    return f"repair_requests:ticket:{ticket_id}"
+
+async def invalidate_repair_caches(*ticket_ids: str):
+    """Drop cached reads affected by changes to the given tickets."""
+    await cache_invalidator.invalidate(
+        keys=[ticket_cache_key(ticket_id) for ticket_id in ticket_ids] + [STATS_CACHE_KEY],
+        tags=[LIST_CACHE_TAG]
+    )
+
+def build_status_update(status: str, notes: Optional[str] = None) -> dict:
+    """$set fields for a status change."""
+    update_data = {
+        "status": status,
+        "updatedAt": datetime.utcnow()
+    }
+    
+    if notes:
+        update_data["notes"] = notes
+    
+    if status == RepairStatus.COMPLETED:
+        update_data["completedAt"] = datetime.utcnow()
+    
+    return update_data
+
+def build_request_update(update_data: RepairRequestUpdate) -> dict:
+    """$set fields for a general repair request update."""
+    update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
+    update_dict["updatedAt"] = datetime.utcnow()
+    
+    if update_data.status == RepairStatus.COMPLETED:
+        update_dict["completedAt"] = datetime.utcnow()
+    
+    return update_dict
+
 @router.post("/", response_model=RepairRequestResponse)
 async def create_repair_request(
     request_data: RepairRequestCreate,
@@ -30,86 +112,493 @@ async def create_repair_request(
         days_to_add = 1 if request_data.urgency == "urgent" else 3
         estimated_completion = datetime.utcnow() + timedelta(days=days_to_add)
         
-        # Create repair request
-        repair_request = RepairRequest(
+        # Create repair request; request_data is already validated, so build without re-validating
+        repair_request = RepairRequest.construct(
             **request_data.dict(),
-            priority=priority,
+            status=RepairStatus.NEW.value,
+            priority=priority.value,
             estimatedCompletion=estimated_completion
-        )
-        
-        # Insert into database
-        result = await db.repair_requests.insert_one(repair_request.dict())
+        ).dict()
         
-        if result.inserted_id:
-            # Send Telegram notification
+        # Insert into database along with the derived search fields
+        document = {**repair_request, **search_fields(repair_request)}
+        if repair_ingestion.enabled:
             try:
-                await telegram_bot.send_new_ticket_notification(repair_request.dict())
-            except Exception as e:
-                logger.warning(f"Failed to send Telegram notification: {e}")
+                await repair_ingestion.submit(document)
+                # The pipeline re-issues the id if another ticket already holds it
+                repair_request["ticket_id"] = document["ticket_id"]
+            except IngestQueueFull:
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many submissions right now, please retry shortly",
+                    headers={"Retry-After": str(INGEST_RETRY_AFTER_SECONDS)}
+                )
+        else:
+            for attempt in range(TICKET_ID_ATTEMPTS):
+                try:
+                    result = await db.repair_requests.insert_one(document)
+                    break
+                except DuplicateKeyError:
+                    if attempt == TICKET_ID_ATTEMPTS - 1:
+                        raise
+                    # Only possible while two workers briefly share a node id
+                    logger.warning(f"Ticket id {document['ticket_id']} already taken, retrying with a new one")
+                    repair_request["ticket_id"] = document["ticket_id"] = new_ticket_id()
+            if not result.inserted_id:
+                raise HTTPException(status_code=500, detail="Failed to create repair request")
+            await record_created_requests(db, [document])
+        
+        return FastJSONResponse({
+            "success": True,
+            "message": "Repair request submitted successfully!",
+            "ticket_id": repair_request["ticket_id"],
+            "data": repair_request
+        })
             
-            return RepairRequestResponse(
-                success=True,
-                message="Repair request submitted successfully!",
-                ticket_id=repair_request.ticket_id,
-                data=repair_request
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating repair request: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def record_created_requests(db: AsyncIOMotorDatabase, documents: List[dict]):
+    """Counters, caches, live events and notifications for newly stored repair requests."""
+    transitions = [(None, document) for document in documents]
+    try:
+        await apply_transitions(db, transitions)
+    except Exception as e:
+        logger.warning(f"Failed to update dashboard counters: {e}")
+    await invalidate_repair_caches(*(document["ticket_id"] for document in documents))
+    ticket_events.publish_transitions(transitions)
+    
+    # Queue Telegram notifications, without the stored-only fields
+    try:
+        await enqueue_notifications(db, NotificationKind.NEW_TICKET, [
+            {key: value for key, value in document.items() if key not in REPAIR_REQUEST_PROJECTION}
+            for document in documents
+        ])
+    except Exception as e:
+        logger.warning(f"Failed to queue Telegram notification: {e}")
+
+# Submissions written by the batched ingestion pipeline get the same follow-up
+repair_ingestion.on_inserted(record_created_requests)
+
+async def fast_total(db: AsyncIOMotorDatabase, query: dict) -> Optional[int]:
+    """Total for unfiltered or status-only queries from the maintained counters."""
+    if query and set(query) != {"status"}:
+        return None
+    
+    try:
+        counters = await get_dashboard_counters(db)
+    except Exception as e:
+        logger.warning(f"Dashboard counters unavailable: {e}")
+        if not query:
+            return await db.repair_requests.estimated_document_count()
+        return await db.repair_requests.count_documents(query)
+    
+    if not query:
+        return int(counters.get("total", 0))
+    return int((counters.get("by_status") or {}).get(query["status"], 0))
+
+async def fetch_page_with_total(db: AsyncIOMotorDatabase, query: dict, projection: dict, sort: list, skip: int, limit: int):
+    """Fetch one page plus the exact total in a single $facet aggregation."""
+    pipeline = [
+        {"$match": query},
+        {"$sort": dict(sort)},
+        {"$facet": {
+            "requests": [{"$skip": skip}, {"$limit": limit}, {"$project": projection}],
+            "total": [{"$count": "count"}]
+        }}
+    ]
+    result = await db.repair_requests.aggregate(pipeline).to_list(length=1)
+    facet = result[0] if result else {"requests": [], "total": []}
+    total = facet["total"][0]["count"] if facet["total"] else 0
+    return facet["requests"], total
+
+def build_list_query(status: Optional[str], search: Optional[str], search_mode: str) -> dict:
+    """Mongo filter shared by the list and export endpoints."""
+    query = {}
+    
+    if status and status != "all":
+        query["status"] = status
+    
+    if search and search.strip():
+        if search_mode not in SEARCH_MODES:
+            raise HTTPException(status_code=400, detail=f"Invalid search mode: {search_mode}")
+        # Index-backed search: ticket ID / email / phone fast paths, then text or prefix tokens
+        query.update(build_search_query(search, search_mode))
+    
+    return query
+
+async def list_repair_requests(
+    db: AsyncIOMotorDatabase,
+    status: Optional[str],
+    search: Optional[str],
+    search_mode: str,
+    page: int,
+    limit: int,
+    cursor: Optional[str],
+    exact_total: bool,
+    projection: dict = REPAIR_REQUEST_PROJECTION
+) -> dict:
+    """Query one page of repair requests as plain, JSON-ready data."""
+    query = build_list_query(status, search, search_mode)
+    
+    # Fetch one extra row to learn whether another page exists
+    sort = keyset_sort("createdAt", "ticket_id")
+    skip = 0
+    page_query = query
+    if cursor:
+        try:
+            after_created, after_ticket = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        page_query = merge_filters(query, keyset_filter("createdAt", "ticket_id", after_created, after_ticket))
+    else:
+        skip = (page - 1) * limit
+    
+    # Maintained counters can drift until reconciled, so only counted totals are exact
+    total = await fast_total(db, query)
+    total_is_exact = False
+    if total is None and exact_total and not cursor:
+        # Page and total in one round trip
+        requests_data, total = await fetch_page_with_total(db, query, projection, sort, skip, limit + 1)
+        total_is_exact = True
+    else:
+        results = db.repair_requests.find(page_query, projection).sort(sort).skip(skip).limit(limit + 1)
+        if total is None and exact_total:
+            requests_data, total = await asyncio.gather(
+                results.to_list(length=limit + 1),
+                db.repair_requests.count_documents(query)
             )
+            total_is_exact = True
+        else:
+            requests_data = await results.to_list(length=limit + 1)
+    
+    has_more = len(requests_data) > limit
+    requests_data = requests_data[:limit]
+    
+    if total is None:
+        total = skip + len(requests_data) + (1 if has_more else 0)
+    
+    next_cursor = None
+    if has_more:
+        last = requests_data[-1]
+        next_cursor = encode_cursor(last["createdAt"], last["ticket_id"])
+    
+    # Stored documents were validated on ingest and are passed through untouched
+    return {
+        "success": True,
+        "total": total,
+        "total_is_exact": total_is_exact,
+        "requests": requests_data,
+        "next_cursor": next_cursor
+    }
+
+def _stored_value(value):
+    # MongoDB keeps datetimes to the millisecond
+    if isinstance(value, datetime):
+        return value.replace(microsecond=value.microsecond // 1000 * 1000, tzinfo=None)
+    return getattr(value, "value", value)
+
+async def _unapplied_tickets(db: AsyncIOMotorDatabase, executed: List[tuple]) -> set:
+    """Tickets whose last planned write in a bulk operation is not reflected in the database."""
+    first = {}
+    final = {}
+    for _, ticket_id, before, after in executed:
+        first.setdefault(ticket_id, before)
+        final[ticket_id] = after
+    stored = {
+        document["ticket_id"]: document
+        async for document in db.repair_requests.find({"ticket_id": {"$in": list(final)}})
+    }
+    unapplied = set()
+    for ticket_id, after in final.items():
+        document = stored.get(ticket_id)
+        if after is None:
+            applied = document is None
         else:
-            raise HTTPException(status_code=500, detail="Failed to create repair request")
+            # Only the fields this operation changed, plus the status it was guarded on
+            changed = {field: value for field, value in after.items() if field == "status" or first[ticket_id].get(field) != value}
+            applied = document is not None and all(
+                _stored_value(document.get(field)) == _stored_value(value) for field, value in changed.items()
+            )
+        if not applied:
+            unapplied.add(ticket_id)
+    return unapplied
+
+@router.post("/bulk", response_model=BulkRepairResponse)
+async def bulk_repair_operations(
+    bulk_request: BulkRepairRequest,
+    admin_email: str = Depends(get_current_admin),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Apply status changes, updates and deletes to many repair requests in one round trip."""
+    try:
+        # Validate operations up front
+        for operation in bulk_request.operations:
+            if operation.operation == BulkOperationType.SET_STATUS and operation.status is None:
+                raise HTTPException(status_code=400, detail="set_status operations require a status")
+            if operation.operation == BulkOperationType.UPDATE and operation.update is None:
+                raise HTTPException(status_code=400, detail="update operations require an update")
+        
+        # Load the current state of every affected ticket at once
+        ticket_ids = list({ticket_id for operation in bulk_request.operations for ticket_id in operation.ticket_ids})
+        current = {
+            document["ticket_id"]: document
+            async for document in db.repair_requests.find({"ticket_id": {"$in": ticket_ids}})
+        }
+        
+        # Plan writes in order, tracking state so later operations see earlier ones
+        # Plain result rows, shaped like BulkItemResult
+        results: List[dict] = []
+        writes = []
+        planned = []  # (result index, ticket_id, before, after) per write
+        for operation in bulk_request.operations:
+            for ticket_id in operation.ticket_ids:
+                before = current.get(ticket_id)
+                if before is None:
+                    results.append({
+                        "ticket_id": ticket_id, "operation": operation.operation, "success": False,
+                        "result": "not_found", "error": "Repair request not found"
+                    })
+                    continue
+                
+                # Guarded by the status this plan expects, so a concurrent change is not overwritten
+                expected = {"ticket_id": ticket_id, "status": before.get("status")}
+                if operation.operation == BulkOperationType.DELETE:
+                    writes.append(DeleteOne(expected))
+                    after = None
+                    outcome = "deleted"
+                else:
+                    if operation.operation == BulkOperationType.SET_STATUS:
+                        update_data = build_status_update(operation.status, operation.notes)
+                    else:
+                        update_data = build_request_update(operation.update)
+                    writes.append(UpdateOne(expected, {"$set": update_data}))
+                    after = {**before, **update_data}
+                    outcome = "updated"
+                
+                current[ticket_id] = after
+                planned.append((len(results), ticket_id, before, after))
+                results.append({
+                    "ticket_id": ticket_id, "operation": operation.operation, "success": True,
+                    "result": outcome, "error": None
+                })
+        
+        # Execute every write in one ordered bulk_write
+        failed_at = None
+        concern_error = None
+        outcome = {}
+        if writes:
+            try:
+                outcome = (await db.repair_requests.bulk_write(writes, ordered=True)).bulk_api_result
+            except BulkWriteError as e:
+                outcome = e.details
+                write_errors = outcome.get("writeErrors", [])
+                if write_errors:
+                    failed_at = write_errors[0]["index"]
+                    error_message = write_errors[0].get("errmsg", str(e))
+                # Without write errors every write ran; only its replication is unconfirmed
+                concern_errors = outcome.get("writeConcernErrors", [])
+                if concern_errors:
+                    concern_error = f"Write concern not satisfied: {concern_errors[0].get('errmsg', str(e))}"
+        
+        executed = planned if failed_at is None else planned[:failed_at]
+        conflicted = set()
+        if outcome.get("nMatched", 0) + outcome.get("nRemoved", 0) < len(executed):
+            # Some guarded writes matched nothing; the stored documents tell which ones
+            conflicted = await _unapplied_tickets(db, executed)
+        
+        transitions = []
+        for write_index, (result_index, ticket_id, before, after) in enumerate(planned):
+            if failed_at is not None and write_index >= failed_at:
+                results[result_index]["success"] = False
+                results[result_index]["result"] = "error"
+                results[result_index]["error"] = error_message if write_index == failed_at else "Not executed after an earlier failure"
+            elif ticket_id in conflicted:
+                results[result_index]["success"] = False
+                results[result_index]["result"] = "conflict"
+                results[result_index]["error"] = "Repair request changed during the bulk operation"
+            else:
+                results[result_index]["error"] = concern_error
+                transitions.append((before, after))
+        
+        if transitions:
+            try:
+                await apply_transitions(db, transitions)
+            except Exception as e:
+                logger.warning(f"Failed to update dashboard counters: {e}")
+            await invalidate_repair_caches(*{ticket_id for _, ticket_id, _, _ in planned})
+            ticket_events.publish_transitions(transitions)
             
+            # One summary notification for the whole batch
+            status_changes = [
+                {
+                    "ticket_id": before["ticket_id"],
+                    "customer_name": before.get("customerName", "Unknown"),
+                    "old_status": before.get("status"),
+                    "new_status": after["status"]
+                }
+                for before, after in transitions
+                if after is not None and after.get("status") != before.get("status")
+            ]
+            deleted = [before["ticket_id"] for before, after in transitions if after is None]
+            updated = sum(1 for _, after in transitions if after is not None)
+            try:
+                await enqueue_notification(db, NotificationKind.BULK_SUMMARY, {
+                    "admin_email": admin_email,
+                    "updated": updated,
+                    "deleted": deleted,
+                    "status_changes": status_changes
+                })
+            except Exception as e:
+                logger.warning(f"Failed to queue Telegram notification: {e}")
+        
+        succeeded = sum(1 for result in results if result["success"])
+        return FastJSONResponse({
+            "success": succeeded == len(results),
+            "processed": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results
+        })
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error creating repair request: {e}")
+        logger.error(f"Error running bulk repair operations: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=RepairRequestListResponse)
 async def get_repair_requests(
     status: Optional[str] = Query(None, description="Filter by status"),
     search: Optional[str] = Query(None, description="Search by customer name, email, phone, or ticket ID"),
-    page: int = Query(1, ge=1, description="Page number"),
+    search_mode: str = Query("auto", description="Search mode: auto, prefix or text"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
     limit: int = Query(50, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous next_cursor"),
+    exact_total: bool = Query(True, description="Count matching requests exactly unless a maintained counter covers the filter; false returns a lower bound"),
+    view: str = Query("full", description="Row representation: full or summary"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return instead of a view"),
     admin_email: str = Depends(get_current_admin),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_read_database)
 ):
     """Get all repair requests with optional filtering."""
     try:
-        # Build query
-        query = {}
-        
-        if status and status != "all":
-            query["status"] = status
-        
-        if search:
-            # Search across multiple fields
-            query["$or"] = [
-                {"customerName": {"$regex": search, "$options": "i"}},
-                {"customerEmail": {"$regex": search, "$options": "i"}},
-                {"customerPhone": {"$regex": search, "$options": "i"}},
-                {"ticket_id": {"$regex": search, "$options": "i"}},
-                {"deviceBrand": {"$regex": search, "$options": "i"}},
-                {"deviceModel": {"$regex": search, "$options": "i"}},
-                {"specificIssue": {"$regex": search, "$options": "i"}}
-            ]
-        
-        # Get total count
-        total = await db.repair_requests.count_documents(query)
-        
-        # Get paginated results
-        skip = (page - 1) * limit
-        cursor = db.repair_requests.find(query).sort("createdAt", -1).skip(skip).limit(limit)
-        requests_data = await cursor.to_list(length=limit)
-        
-        # Convert to RepairRequest objects
-        requests = [RepairRequest(**req) for req in requests_data]
-        
-        return RepairRequestListResponse(
-            success=True,
-            total=total,
-            requests=requests
+        if view not in LIST_VIEWS:
+            raise HTTPException(status_code=400, detail=f"Invalid view: {view}")
+        projection = list_projection(view, fields)
+        
+        cache_key = f"repair_requests:list:{status}|{search}|{search_mode}|{page}|{limit}|{cursor}|{exact_total}|{view}|{fields}"
+        content = await cached_json(
+            cache_key,
+            lambda: list_repair_requests(db, status, search, search_mode, page, limit, cursor, exact_total, projection),
+            ttl=LIST_CACHE_TTL,
+            tags=[LIST_CACHE_TAG]
         )
+        return EncodedJSONResponse(content)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching repair requests: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/export")
+async def export_repair_requests(
+    request: Request,
+    format: str = Query("csv", description="Export format: csv or ndjson"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    search: Optional[str] = Query(None, description="Search by customer name, email, phone, or ticket ID"),
+    search_mode: str = Query("auto", description="Search mode: auto, prefix or text"),
+    created_from: Optional[datetime] = Query(None, description="Only requests created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only requests created before this time"),
+    admin_email: str = Depends(get_current_admin),
+    db: AsyncIOMotorDatabase = Depends(get_read_database)
+):
+    """Stream every matching repair request as CSV or NDJSON."""
+    try:
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Invalid export format: {format}")
+        
+        query = build_list_query(status, search, search_mode)
+        created_range = {}
+        if created_from:
+            created_range["$gte"] = created_from
+        if created_to:
+            created_range["$lt"] = created_to
+        if created_range:
+            query = merge_filters(query, {"createdAt": created_range})
+        
+        cursor = db.repair_requests.find(query, REPAIR_REQUEST_PROJECTION) \
+            .sort(keyset_sort("createdAt", "ticket_id")) \
+            .batch_size(EXPORT_BATCH_SIZE)
+        return export_response(
+            cursor,
+            format,
+            list(RepairRequest.__fields__),
+            f"repair-requests-{datetime.utcnow():%Y%m%d-%H%M%S}",
+            request.headers.get("accept-encoding")
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting repair requests: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/events")
+async def stream_repair_request_events(
+    request: Request,
+    last_event_id: Optional[str] = Query(None, description="Resume after this event id; the Last-Event-ID header takes precedence"),
+    session: dict = Depends(get_current_admin_stream),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Live feed of repair request changes as Server-Sent Events."""
+    resume_from = request.headers.get("last-event-id") or last_event_id
+    
+    async def stream():
+        # Subscribed inside the body so a client gone before streaming never registers
+        queue, backlog = await ticket_events.subscribe(resume_from)
+        checked_at = time.monotonic()
+        try:
+            yield f"retry: {EVENT_RETRY_MS}\n\n".encode()
+            for event_id, event in backlog:
+                yield format_sse(event_id, event)
+            # The queue can repeat the end of a backlog caught up from a change stream
+            sent = {event_id for event_id, _ in backlog if event_id is not None}
+            while True:
+                try:
+                    event_id, event = await asyncio.wait_for(queue.get(), timeout=EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Comment frame keeps proxies from closing an idle connection
+                    yield b": keepalive\n\n"
+                    event_id, event = None, None
+                
+                # Close streams whose login was revoked since they were opened
+                if time.monotonic() - checked_at >= EVENT_SESSION_CHECK_SECONDS:
+                    checked_at = time.monotonic()
+                    if not await session_active(db, session["session"], session["email"], session["session_iat"]):
+                        yield format_sse(None, {"type": "revoked"})
+                        break
+                if event is None:
+                    continue
+                if event_id in sent:
+                    sent.discard(event_id)
+                    continue
+                yield format_sse(event_id, event)
+        finally:
+            ticket_events.unsubscribe(queue)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/{ticket_id}", response_model=RepairRequest)
 async def get_repair_request(
     ticket_id: str,
@@ -118,12 +607,17 @@ async def get_repair_request(
 ):
     """Get a specific repair request by ticket ID."""
     try:
-        request_data = await db.repair_requests.find_one({"ticket_id": ticket_id})
+        request_data = await cached_json(
+            ticket_cache_key(ticket_id),
+            lambda: db.repair_requests.find_one({"ticket_id": ticket_id}, REPAIR_REQUEST_PROJECTION),
+            ttl=TICKET_CACHE_TTL,
+            tags=[ticket_cache_key(ticket_id)]
+        )
         
-        if not request_data:
+        if request_data is None:
             raise HTTPException(status_code=404, detail="Repair request not found")
         
-        return RepairRequest(**request_data)
+        return EncodedJSONResponse(request_data)
         
     except HTTPException:
         raise
@@ -140,47 +634,36 @@ async def update_repair_status(
 ):
     """Update the status of a repair request."""
     try:
-        # Get current request
-        current_request = await db.repair_requests.find_one({"ticket_id": ticket_id})
-        if not current_request:
-            raise HTTPException(status_code=404, detail="Repair request not found")
-        
-        old_status = current_request.get("status")
-        
         # Prepare update data
-        update_data = {
-            "status": status_update.status,
-            "updatedAt": datetime.utcnow()
-        }
-        
-        if status_update.notes:
-            update_data["notes"] = status_update.notes
-        
-        if status_update.status == RepairStatus.COMPLETED:
-            update_data["completedAt"] = datetime.utcnow()
+        update_data = build_status_update(status_update.status, status_update.notes)
         
-        # Update in database
-        result = await db.repair_requests.update_one(
+        # Update in database, keeping the previous state for counters and notifications
+        current_request = await db.repair_requests.find_one_and_update(
             {"ticket_id": ticket_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
         )
+        if not current_request:
+            raise HTTPException(status_code=404, detail="Repair request not found")
+        
+        old_status = current_request.get("status")
+        await apply_transition(db, current_request, {**current_request, **update_data})
+        await invalidate_repair_caches(ticket_id)
+        ticket_events.publish_transitions([(current_request, {**current_request, **update_data})])
+        
+        # Queue Telegram notification for status change
+        try:
+            await enqueue_notification(db, NotificationKind.STATUS_UPDATE, {
+                "ticket_id": ticket_id,
+                "old_status": old_status,
+                "new_status": status_update.status,
+                "customer_name": current_request.get("customerName", "Unknown")
+            })
+        except Exception as e:
+            logger.warning(f"Failed to queue Telegram notification: {e}")
+        
+        return {"success": True, "message": "Status updated successfully"}
         
-        if result.modified_count > 0:
-            # Send Telegram notification for status change
-            try:
-                await telegram_bot.send_status_update_notification(
-                    ticket_id=ticket_id,
-                    old_status=old_status,
-                    new_status=status_update.status,
-                    customer_name=current_request.get("customerName", "Unknown")
-                )
-            except Exception as e:
-                logger.warning(f"Failed to send Telegram notification: {e}")
-            
-            return {"success": True, "message": "Status updated successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to update status")
-            
     except HTTPException:
         raise
     except Exception as e:
@@ -196,28 +679,23 @@ async def update_repair_request(
 ):
     """Update a repair request."""
     try:
-        # Get current request
-        current_request = await db.repair_requests.find_one({"ticket_id": ticket_id})
-        if not current_request:
-            raise HTTPException(status_code=404, detail="Repair request not found")
-        
         # Prepare update data
-        update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
-        update_dict["updatedAt"] = datetime.utcnow()
+        update_dict = build_request_update(update_data)
         
-        if update_data.status == RepairStatus.COMPLETED:
-            update_dict["completedAt"] = datetime.utcnow()
-        
-        # Update in database
-        result = await db.repair_requests.update_one(
+        # Update in database, keeping the previous state for counters
+        current_request = await db.repair_requests.find_one_and_update(
             {"ticket_id": ticket_id},
-            {"$set": update_dict}
+            {"$set": update_dict},
+            return_document=ReturnDocument.BEFORE
         )
+        if not current_request:
+            raise HTTPException(status_code=404, detail="Repair request not found")
         
-        if result.modified_count > 0:
-            return {"success": True, "message": "Repair request updated successfully"}
-        else:
-            return {"success": False, "message": "No changes made"}
+        await apply_transition(db, current_request, {**current_request, **update_dict})
+        await invalidate_repair_caches(ticket_id)
+        ticket_events.publish_transitions([(current_request, {**current_request, **update_dict})])
+        
+        return {"success": True, "message": "Repair request updated successfully"}
             
     except HTTPException:
         raise
@@ -233,9 +711,12 @@ async def delete_repair_request(
 ):
     """Delete a repair request."""
     try:
-        result = await db.repair_requests.delete_one({"ticket_id": ticket_id})
+        deleted_request = await db.repair_requests.find_one_and_delete({"ticket_id": ticket_id})
         
-        if result.deleted_count > 0:
+        if deleted_request:
+            await apply_transition(db, deleted_request, None)
+            await invalidate_repair_caches(ticket_id)
+            ticket_events.publish_transitions([(deleted_request, None)])
             return {"success": True, "message": "Repair request deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Repair request not found")
@@ -249,50 +730,61 @@ async def delete_repair_request(
 @router.get("/stats/dashboard")
 async def get_dashboard_stats(
     admin_email: str = Depends(get_current_admin),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_read_database)
 ):
     """Get dashboard statistics."""
     try:
-        # Get counts by status
-        pipeline = [
-            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-        ]
-        
-        status_counts = {}
-        async for result in db.repair_requests.aggregate(pipeline):
-            status_counts[result["_id"]] = result["count"]
-        
-        # Get today's requests
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = await db.repair_requests.count_documents({
-            "createdAt": {"$gte": today_start}
-        })
+        # Served from the incrementally maintained counters
+        stats = await cached_json(STATS_CACHE_KEY, lambda: read_dashboard_stats(db), ttl=STATS_CACHE_TTL)
+        return EncodedJSONResponse(stats)
         
-        # Get this week's requests
-        week_start = today_start - timedelta(days=7)
-        week_count = await db.repair_requests.count_documents({
-            "createdAt": {"$gte": week_start}
+    except Exception as e:
+        logger.error(f"Error fetching dashboard stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stats/timeseries")
+async def get_stats_timeseries(
+    start: Optional[datetime] = Query(None, alias="from", description="Range start, defaults to 30 days (day) or 48 hours (hour) before the end"),
+    end: Optional[datetime] = Query(None, alias="to", description="Range end (exclusive), defaults to now"),
+    bucket: str = Query("day", description="Bucket size: hour or day"),
+    group_by: Optional[str] = Query(None, description="Break counts down by status, deviceBrand, issueCategory or priority"),
+    admin_email: str = Depends(get_current_admin),
+    db: AsyncIOMotorDatabase = Depends(get_read_database)
+):
+    """Ticket counts, revenue and turnaround per hour or day, read from the analytics rollups."""
+    try:
+        if bucket not in ROLLUP_BUCKETS:
+            raise HTTPException(status_code=400, detail=f"Invalid bucket: {bucket}")
+        if group_by is not None and group_by not in GROUP_BY_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Invalid group_by: {group_by}")
+        
+        # Rollups are keyed in naive UTC like the stored timestamps
+        if end is None:
+            end = datetime.utcnow()
+        elif end.tzinfo is not None:
+            end = end.astimezone(timezone.utc).replace(tzinfo=None)
+        if start is None:
+            start = end - (timedelta(hours=48) if bucket == "hour" else timedelta(days=30))
+        elif start.tzinfo is not None:
+            start = start.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        if start >= end:
+            raise HTTPException(status_code=400, detail="from must be before to")
+        if (end - start) / ROLLUP_BUCKETS[bucket][0] > MAX_TIMESERIES_POINTS:
+            raise HTTPException(status_code=400, detail=f"Range spans more than {MAX_TIMESERIES_POINTS} {bucket} buckets")
+        
+        points = await get_timeseries(db, start, end, bucket, group_by)
+        return FastJSONResponse({
+            "success": True,
+            "bucket": bucket,
+            "group_by": group_by,
+            "from": start,
+            "to": end,
+            "points": points
         })
         
-        # Calculate total revenue (from completed requests)
-        revenue_pipeline = [
-            {"$match": {"status": "Completed", "actualCost": {"$exists": True}}},
-            {"$group": {"_id": None, "total": {"$sum": "$actualCost"}}}
-        ]
-        
-        total_revenue = 0
-        async for result in db.repair_requests.aggregate(revenue_pipeline):
-            total_revenue = result["total"]
-        
-        return {
-            "total_requests": sum(status_counts.values()),
-            "status_breakdown": status_counts,
-            "today_requests": today_count,
-            "week_requests": week_count,
-            "total_revenue": total_revenue,
-            "active_requests": status_counts.get("New", 0) + status_counts.get("In Progress", 0) + status_counts.get("Diagnosed", 0)
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching dashboard stats: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.error(f"Error fetching stats timeseries: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
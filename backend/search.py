@@ -0,0 +1,99 @@
+from pymongo import UpdateOne
+from typing import Dict, Any, List
+import re
+
+from .ticket_ids import normalize_ticket_id
+
+# Fields covered by the prefix token index
+SEARCH_TOKEN_FIELDS = ["customerName", "customerEmail", "deviceBrand", "deviceModel", "specificIssue"]
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 15
+MIN_PHONE_DIGITS = 3
+
+SEARCH_MODES = ("auto", "prefix", "text")
+
+TICKET_ID_PATTERN = re.compile(r"^FN-[0-9A-Z-]*$", re.IGNORECASE)
+PHONE_PATTERN = re.compile(r"^\+?[\d\s().-]+$")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s.]+$")
+WORD_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+def phone_digits(phone: str) -> str:
+    """Normalize a phone number to its digits."""
+    return re.sub(r"\D", "", phone or "")
+
+def phone_suffixes(digits: str) -> List[str]:
+    """Every digit suffix of a phone number, so a prefix match finds any run of its digits."""
+    return [digits[start:] for start in range(len(digits) - MIN_PHONE_DIGITS + 1)]
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase words."""
+    return [word.lower() for word in WORD_PATTERN.findall(text or "")]
+
+def search_tokens(document: Dict[str, Any]) -> List[str]:
+    """Edge n-grams of every word in the searchable fields."""
+    tokens = set()
+    for field in SEARCH_TOKEN_FIELDS:
+        for word in tokenize(str(document.get(field) or "")):
+            for length in range(MIN_TOKEN_LENGTH, min(len(word), MAX_TOKEN_LENGTH) + 1):
+                tokens.add(word[:length])
+    return sorted(tokens)
+
+def search_fields(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Derived fields stored alongside a repair request for indexed search."""
+    digits = phone_digits(document.get("customerPhone"))
+    return {
+        "customerPhoneDigits": digits,
+        # Numbers are typed with or without the country code, so match from any digit
+        "customerPhoneSuffixes": phone_suffixes(digits),
+        "searchTokens": search_tokens(document)
+    }
+
+def _prefix_query(term: str) -> Dict[str, Any]:
+    words = [word[:MAX_TOKEN_LENGTH] for word in tokenize(term) if len(word) >= MIN_TOKEN_LENGTH]
+    if not words:
+        return {"$text": {"$search": term}}
+    return {"searchTokens": {"$all": words}}
+
+def build_search_query(term: str, mode: str = "auto") -> Dict[str, Any]:
+    """Build an index-backed Mongo filter for a repair request search."""
+    term = term.strip()
+
+    if mode == "text":
+        return {"$text": {"$search": term}}
+    if mode == "prefix":
+        return _prefix_query(term)
+
+    # Exact fast paths, each answered by its own index
+    if TICKET_ID_PATTERN.match(term):
+        # The pattern only admits literal characters, so the prefix regex stays index-bounded
+        return {"ticket_id": {"$regex": f"^{normalize_ticket_id(term)}"}}
+    if EMAIL_PATTERN.match(term):
+        return {"customerEmail": {"$in": list({term, term.lower()})}}
+    if "@" in term:
+        # Part of an address, e.g. "john@gmail": its words are prefixes of the email's tokens
+        return _prefix_query(term)
+    digits = phone_digits(term)
+    if PHONE_PATTERN.match(term) and len(digits) >= MIN_PHONE_DIGITS:
+        return {"customerPhoneSuffixes": {"$regex": f"^{digits}"}}
+
+    return {"$text": {"$search": term}}
+
+async def backfill_search_fields(db, batch_size: int = 500) -> int:
+    """Populate derived search fields on documents created before they existed."""
+    updated = 0
+    operations = []
+    cursor = db.repair_requests.find(
+        {"$or": [{"searchTokens": {"$exists": False}}, {"customerPhoneSuffixes": {"$exists": False}}]},
+        {field: 1 for field in SEARCH_TOKEN_FIELDS + ["customerPhone"]}
+    )
+    async for document in cursor:
+        operations.append(UpdateOne({"_id": document["_id"]}, {"$set": search_fields(document)}))
+        if len(operations) >= batch_size:
+            result = await db.repair_requests.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+
+    if operations:
+        result = await db.repair_requests.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+    return updated
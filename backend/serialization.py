@@ -0,0 +1,44 @@
+from fastapi.responses import JSONResponse, Response
+from bson import ObjectId
+from typing import Any
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    """Encode the non-JSON types found in Mongo documents and models."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (UUID, ObjectId)):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Serialize plain data straight to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that skips jsonable_encoder and encodes with orjson when available."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class EncodedJSONResponse(Response):
+    """Response for content that is already JSON bytes, e.g. served from the response cache."""
+
+    media_type = "application/json"
@@ -6,14 +6,26 @@ import logging
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Import our modules
-from .database import connect_to_mongo, close_mongo_connection, get_database
-from .auth import create_default_admin
-from .routes import repair_requests, auth, contact
-
+# Loaded before the package imports, which read their settings at import time
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Import our modules
+from .database import connect_to_mongo, close_mongo_connection, get_database
+from .auth import create_default_admin, is_admin_token
+from .notifications import notification_worker
+from .stats import stats_reconciler
+from .cache import cache_invalidator
+from .events import ticket_events
+from .ingestion import repair_ingestion
+from .ticket_ids import ticket_ids
+from .telegram_bot import telegram_bot
+from .routes import repair_requests, auth, contact, health, metrics, profiling
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .serialization import FastJSONResponse
+from .routes.health import service_state
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -33,6 +45,26 @@ async def lifespan(app: FastAPI):
         db = await get_database()
         await create_default_admin(db)
         
+        # Claim a node id so ticket ids from this worker cannot collide with others
+        await ticket_ids.start(db)
+        
+        # Start draining queued Telegram notifications
+        await telegram_bot.start()
+        notification_worker.start(db)
+        
+        # Keep dashboard counters from drifting
+        stats_reconciler.start(db)
+        
+        # Share cache invalidations with other workers when configured
+        await cache_invalidator.start(db)
+        
+        # Live ticket feed for admin dashboards
+        await ticket_events.start(db)
+        
+        # Queue and batch-insert submissions when REPAIR_INGEST_MODE=batched
+        await repair_ingestion.start(db)
+        
+        service_state.started = True
         logger.info("FixNet Backend started successfully!")
     except Exception as e:
         logger.error(f"Failed to start backend: {e}")
@@ -42,6 +74,16 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down FixNet Backend...")
+    # Fail readiness first so load balancers drain this worker
+    service_state.stopping = True
+    # Write queued submissions while everything they touch is still up
+    await repair_ingestion.stop()
+    await ticket_ids.stop(db)
+    await ticket_events.stop()
+    await cache_invalidator.stop()
+    await stats_reconciler.stop()
+    await notification_worker.stop()
+    await telegram_bot.close()
     await close_mongo_connection()
 
 # Create the main app
@@ -49,7 +91,9 @@ app = FastAPI(
     title="FixNet API",
     description="Backend API for FixNet smartphone repair service",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson-backed encoding for every route that returns plain data
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -59,12 +103,22 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id"],
 )
 
+# Opt-in request profiling, off unless enabled by an admin
+app.add_middleware(ProfilingMiddleware, authorize=is_admin_token)
+
+# Per-route request counts and latency
+app.add_middleware(MetricsMiddleware)
+
 # Include API routes
 app.include_router(repair_requests.router)
 app.include_router(auth.router)
 app.include_router(contact.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(profiling.router)
 
 # Root endpoint
 @app.get("/api/")
@@ -74,8 +128,3 @@ async def root():
         "version": "1.0.0",
         "status": "running"
     }
-
-# Health check endpoint
-@app.get("/api/health")
-async def health_check():
-    return {"status": "healthy", "service": "FixNet Backend"}
@@ -0,0 +1,253 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta
+from collections import defaultdict
+import asyncio
+import logging
+import os
+import uuid
+
+from .analytics import apply_rollups
+from .inbox import reconcile_unread_count
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_COLLECTION = "dashboard_counters"
+DAILY_COLLECTION = "dashboard_daily"
+COUNTERS_ID = "repair_requests"
+
+ACTIVE_STATUSES = ["New", "In Progress", "Diagnosed"]
+RECONCILE_DAYS = 31
+RECONCILE_INTERVAL_SECONDS = int(os.environ.get("DASHBOARD_RECONCILE_INTERVAL_SECONDS", "900"))
+# One worker reconciles per interval, whichever takes the lease
+LEASES_COLLECTION = "maintenance_leases"
+RECONCILE_LEASE_ID = "stats-reconciler"
+
+Transition = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+def _status(document: Dict[str, Any]) -> str:
+    status = document.get("status")
+    return getattr(status, "value", status)
+
+def _day(created_at: datetime) -> str:
+    return created_at.strftime("%Y-%m-%d")
+
+def _contribution(document: Dict[str, Any]) -> Dict[str, float]:
+    """What a single repair request adds to the dashboard counters."""
+    status = _status(document)
+    contribution = {"total": 1, f"by_status.{status}": 1}
+    if status == "Completed" and document.get("actualCost") is not None:
+        contribution["revenue"] = document["actualCost"]
+    return contribution
+
+def counter_deltas(transitions: List[Transition]) -> Tuple[Dict[str, float], Dict[str, int]]:
+    """Net counter and daily-bucket changes for a list of (before, after) documents."""
+    counters = defaultdict(int)
+    daily = defaultdict(int)
+
+    for before, after in transitions:
+        if before is not None:
+            for field, value in _contribution(before).items():
+                counters[field] -= value
+            if before.get("createdAt"):
+                daily[_day(before["createdAt"])] -= 1
+        if after is not None:
+            for field, value in _contribution(after).items():
+                counters[field] += value
+            if after.get("createdAt"):
+                daily[_day(after["createdAt"])] += 1
+
+    counters = {field: value for field, value in counters.items() if value}
+    daily = {day: value for day, value in daily.items() if value}
+    return counters, daily
+
+async def apply_transitions(db: AsyncIOMotorDatabase, transitions: List[Transition]):
+    """Atomically fold ticket changes into the dashboard counters and analytics rollups."""
+    counters, daily = counter_deltas(transitions)
+
+    if counters:
+        # The version lets reconciliation detect increments that raced with it
+        await db[COUNTERS_COLLECTION].update_one(
+            {"_id": COUNTERS_ID},
+            {"$inc": {**counters, "version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+    for day, value in daily.items():
+        await db[DAILY_COLLECTION].update_one({"_id": day}, {"$inc": {"created": value}}, upsert=True)
+    await apply_rollups(db, transitions)
+
+async def apply_transition(db: AsyncIOMotorDatabase, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+    """Fold a single ticket change into the dashboard counters."""
+    try:
+        await apply_transitions(db, [(before, after)])
+    except Exception as e:
+        # Drift is corrected by the next reconciliation run
+        logger.warning(f"Failed to update dashboard counters: {e}")
+
+def _flatten_counters(document: Dict[str, Any]) -> Dict[str, float]:
+    counters = {"total": document.get("total", 0), "revenue": document.get("revenue", 0)}
+    for status, count in (document.get("by_status") or {}).items():
+        counters[f"by_status.{status}"] = count
+    return counters
+
+async def reconcile_dashboard_counters(db: AsyncIOMotorDatabase) -> bool:
+    """Correct the counters and recent daily buckets from the repair requests.
+
+    Corrections are applied as $inc deltas against a snapshot, and only if no
+    increment landed since the snapshot; otherwise the next run tries again.
+    """
+    snapshot = await db[COUNTERS_COLLECTION].find_one({"_id": COUNTERS_ID})
+    window_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=RECONCILE_DAYS)
+    daily_snapshot = {
+        bucket["_id"]: bucket.get("created", 0)
+        async for bucket in db[DAILY_COLLECTION].find({"_id": {"$gte": _day(window_start)}})
+    }
+
+    status_counts = {}
+    async for result in db.repair_requests.aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]):
+        status_counts[result["_id"]] = result["count"]
+
+    total_revenue = 0
+    async for result in db.repair_requests.aggregate([
+        {"$match": {"status": "Completed", "actualCost": {"$exists": True}}},
+        {"$group": {"_id": None, "total": {"$sum": "$actualCost"}}}
+    ]):
+        total_revenue = result["total"]
+
+    daily_counts = {}
+    async for result in db.repair_requests.aggregate([
+        {"$match": {"createdAt": {"$gte": window_start}}},
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$createdAt"}}, "count": {"$sum": 1}}}
+    ]):
+        daily_counts[result["_id"]] = result["count"]
+
+    now = datetime.utcnow()
+    actual = _flatten_counters({"total": sum(status_counts.values()), "by_status": status_counts, "revenue": total_revenue})
+    if snapshot is None:
+        try:
+            await db[COUNTERS_COLLECTION].insert_one({
+                "_id": COUNTERS_ID,
+                "total": actual["total"],
+                "by_status": status_counts,
+                "revenue": total_revenue,
+                "version": 0,
+                "updated_at": now,
+                "reconciled_at": now
+            })
+            applied = True
+        except DuplicateKeyError:
+            applied = False
+    else:
+        stored = _flatten_counters(snapshot)
+        deltas = {field: actual.get(field, 0) - stored.get(field, 0) for field in set(actual) | set(stored)}
+        deltas = {field: value for field, value in deltas.items() if value}
+        result = await db[COUNTERS_COLLECTION].update_one(
+            {"_id": COUNTERS_ID, "version": snapshot.get("version")},
+            {"$inc": {**deltas, "version": 1}, "$set": {"updated_at": now, "reconciled_at": now}}
+        )
+        applied = result.matched_count == 1
+        if deltas and applied:
+            logger.warning(f"Dashboard counters had drifted: {deltas}")
+
+    for day in set(daily_counts) | set(daily_snapshot):
+        count, stored = daily_counts.get(day, 0), daily_snapshot.get(day)
+        if stored is None:
+            try:
+                await db[DAILY_COLLECTION].insert_one({"_id": day, "created": count})
+            except DuplicateKeyError:
+                pass
+        elif count != stored:
+            # Matched on the snapshot value, so a concurrent $inc makes this a no-op
+            await db[DAILY_COLLECTION].update_one({"_id": day, "created": stored}, {"$inc": {"created": count - stored}})
+
+    if applied:
+        logger.info("Dashboard counters reconciled")
+    else:
+        logger.info("Dashboard counters changed during reconciliation, retrying next run")
+    return applied
+
+async def get_dashboard_counters(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Counters document, built on first use."""
+    counters = await db[COUNTERS_COLLECTION].find_one({"_id": COUNTERS_ID})
+    if counters is None or "reconciled_at" not in counters:
+        await reconcile_dashboard_counters(db)
+        counters = await db[COUNTERS_COLLECTION].find_one({"_id": COUNTERS_ID})
+    return counters
+
+async def get_dashboard_stats(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Dashboard statistics served from the maintained counters."""
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = today_start - timedelta(days=7)
+
+    counters, daily = await asyncio.gather(
+        get_dashboard_counters(db),
+        db[DAILY_COLLECTION].find({"_id": {"$gte": _day(week_start)}}).to_list(length=None)
+    )
+
+    status_counts = {status: count for status, count in (counters.get("by_status") or {}).items() if count}
+    daily_counts = {bucket["_id"]: bucket.get("created", 0) for bucket in daily}
+
+    return {
+        "total_requests": sum(status_counts.values()),
+        "status_breakdown": status_counts,
+        "today_requests": daily_counts.get(_day(today_start), 0),
+        "week_requests": sum(daily_counts.values()),
+        "total_revenue": counters.get("revenue", 0),
+        "active_requests": sum(status_counts.get(status, 0) for status in ACTIVE_STATUSES)
+    }
+
+class StatsReconciler:
+    """Background task that periodically corrects dashboard and inbox counter drift."""
+
+    def __init__(self, interval: float = RECONCILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.owner = str(uuid.uuid4())
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db: AsyncIOMotorDatabase):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(db), name="stats-reconciler")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _take_lease(self, db: AsyncIOMotorDatabase) -> bool:
+        """Claim this interval's reconciliation unless another worker holds it."""
+        now = datetime.utcnow()
+        try:
+            await db[LEASES_COLLECTION].find_one_and_update(
+                {"_id": RECONCILE_LEASE_ID, "$or": [{"owner": self.owner}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.interval * 0.9)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        while True:
+            try:
+                await get_dashboard_counters(db)
+                await asyncio.sleep(self.interval)
+                if await self._take_lease(db):
+                    await reconcile_dashboard_counters(db)
+                    await reconcile_unread_count(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Dashboard counter reconciliation failed: {e}")
+                await asyncio.sleep(self.interval)
+
+stats_reconciler = StatsReconciler()
@@ -1,16 +1,125 @@
+import html
 import httpx
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import asyncio
+import os
+import time
 from datetime import datetime
 
+from .metrics import telegram_send_duration_seconds, telegram_send_failures_total
+from .profiling import HTTPX_EVENT_HOOKS
+
 logger = logging.getLogger(__name__)
 
+# Telegram rejects longer messages; counted in UTF-16 code units like the Bot API does
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Longest customer-supplied value shown in a summary line
+SUMMARY_FIELD_MAX_LENGTH = 80
+
+def _field(value: Any, default: str = "N/A", limit: int = SUMMARY_FIELD_MAX_LENGTH) -> str:
+    """A user-supplied value truncated and escaped for an HTML message."""
+    text = default if value is None or value == "" else str(value)
+    if len(text) > limit:
+        text = text[:limit - 1] + "…"
+    return html.escape(text, quote=False)
+
+def _message_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+def _capped_message(lines: List[str], items: List[str], footer: List[str]) -> str:
+    """Join header lines, as many item lines as fit under the Telegram limit, and the footer."""
+    budget = TELEGRAM_MESSAGE_LIMIT - _message_length("\n".join(lines + footer)) - 64
+    shown = []
+    for item in items:
+        budget -= _message_length(item) + 1
+        if budget < 0:
+            break
+        shown.append(item)
+    hidden = sum(1 for item in items[len(shown):] if item.startswith("•"))
+    if hidden:
+        shown.append(f"… and {hidden} more")
+    return "\n".join(lines + shown + footer)
+
+class TokenBucket:
+    """Token-bucket rate limiter for a single Telegram chat."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def has_token(self) -> bool:
+        """Check whether a message could be sent right now."""
+        self._refill()
+        return self.tokens >= 1 and time.monotonic() >= self.blocked_until
+
+    def try_acquire(self) -> bool:
+        """Take a token without waiting."""
+        if not self.has_token():
+            return False
+        self.tokens -= 1
+        return True
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                self._refill()
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Block sends for the given time, e.g. after a 429 from Telegram."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
 class TelegramBot:
-    def __init__(self, bot_token: str, chat_id: str):
+    def __init__(
+        self,
+        bot_token: str,
+        chat_id: str,
+        api_url: str = "https://api.telegram.org",
+        rate_per_second: float = 1.0,
+        burst: float = 3.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
         self.bot_token = bot_token
         self.chat_id = chat_id
-        self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        self.base_url = f"{api_url.rstrip('/')}/bot{bot_token}"
+        self.limiter = TokenBucket(rate_per_second, burst)
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def start(self):
+        """Open the pooled HTTP client used for all sends."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0),
+                transport=self.transport,
+                event_hooks=HTTPX_EVENT_HOOKS
+            )
+    
+    async def close(self):
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
         """Send a message to the configured chat."""
@@ -21,12 +130,29 @@ class TelegramBot:
             "parse_mode": parse_mode
         }
         
+        await self.start()
+        await self.limiter.acquire()
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, timeout=10.0)
-                response.raise_for_status()
-                return True
+            response = await self._client.post(url, json=payload)
         except Exception as e:
+            telegram_send_duration_seconds.observe(time.perf_counter() - started)
+            telegram_send_failures_total.inc(type(e).__name__)
+            logger.error(f"Failed to send Telegram message: {e}")
+            return False
+        telegram_send_duration_seconds.observe(time.perf_counter() - started)
+        
+        try:
+            if response.status_code == 429:
+                retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+                self.limiter.pause(float(retry_after))
+                telegram_send_failures_total.inc("rate_limited")
+                logger.warning(f"Telegram rate limit hit, pausing sends for {retry_after}s")
+                return False
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            telegram_send_failures_total.inc(f"http_{response.status_code}")
             logger.error(f"Failed to send Telegram message: {e}")
             return False
     
@@ -108,9 +234,69 @@ class TelegramBot:
         """.strip()
         
         return await self.send_message(message)
+    
+    async def send_bulk_summary_notification(self, summary: Dict[str, Any]) -> bool:
+        """Send one notification summarizing a bulk admin operation."""
+        status_changes = summary.get("status_changes", [])
+        deleted = summary.get("deleted", [])
+        
+        lines = [
+            "🗂️ <b>Bulk Update - FixNet</b>",
+            "",
+            f"👤 <b>By:</b> {_field(summary.get('admin_email'))}",
+            f"✏️ <b>Updated:</b> {int(summary.get('updated', 0))}",
+            f"🗑️ <b>Deleted:</b> {len(deleted)}"
+        ]
+        
+        if deleted:
+            shown = ", ".join(f"<code>{_field(ticket_id)}</code>" for ticket_id in deleted[:10])
+            more = f" and {len(deleted) - 10} more" if len(deleted) > 10 else ""
+            lines.append("")
+            lines.append(f"🗑️ <b>Deleted:</b> {shown}{more}")
+        
+        items = []
+        if status_changes:
+            transitions: Dict[str, int] = {}
+            for change in status_changes:
+                key = f"{_field(change.get('old_status'))} → {_field(change.get('new_status'))}"
+                transitions[key] = transitions.get(key, 0) + 1
+            lines.append("")
+            lines.append(f"📄 <b>Status Changes ({len(status_changes)}):</b>")
+            items = [f"• {key}: {count}" for key, count in sorted(transitions.items(), key=lambda item: -item[1])]
+        
+        footer = ["", f"⏰ <b>Updated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M')}"]
+        return await self.send_message(_capped_message(lines, items, footer))
+    
+    async def send_digest(self, new_tickets: List[Dict[str, Any]], status_updates: List[Dict[str, Any]]) -> bool:
+        """Send a single summary message for a burst of ticket notifications."""
+        lines = [f"📚 <b>FixNet Digest</b> ({len(new_tickets) + len(status_updates)} updates)"]
+        items = []
+        
+        if new_tickets:
+            items.append("")
+            items.append(f"🛠️ <b>New Repair Requests ({len(new_tickets)}):</b>")
+            for ticket in new_tickets:
+                items.append(
+                    f"• <code>{_field(ticket.get('ticket_id'))}</code> {_field(ticket.get('customerName'))} - "
+                    f"{_field(ticket.get('deviceBrand'))} {_field(ticket.get('deviceModel'))}, "
+                    f"{_field(ticket.get('specificIssue'))} ({_field(ticket.get('priority'), 'Medium')})"
+                )
+        
+        if status_updates:
+            items.append("")
+            items.append(f"📄 <b>Status Updates ({len(status_updates)}):</b>")
+            for update in status_updates:
+                items.append(
+                    f"• <code>{_field(update.get('ticket_id'))}</code> {_field(update.get('customer_name'), 'Unknown')}: "
+                    f"{_field(update.get('old_status'))} → {_field(update.get('new_status'))}"
+                )
+        
+        footer = ["", f"⏰ <b>Sent:</b> {datetime.now().strftime('%Y-%m-%d %H:%M')}"]
+        return await self.send_message(_capped_message(lines, items, footer))
 
 # Initialize the bot instance
-TELEGRAM_BOT_TOKEN = "7983043105:AAGyFmxc3PqDfqlD7lUyPz9iGlAm2O3ANoU"
-TELEGRAM_CHAT_ID = "673253772"
+TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "7983043105:AAGyFmxc3PqDfqlD7lUyPz9iGlAm2O3ANoU")
+TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "673253772")
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org")
 
-telegram_bot = TelegramBot(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
\ No newline at end of file
+telegram_bot = TelegramBot(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, api_url=TELEGRAM_API_URL)
\ No newline at end of file
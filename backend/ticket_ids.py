@@ -0,0 +1,154 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import random
+import socket
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+TICKET_PREFIX = "FN"
+# Crockford's base32: no I, L, O or U, and its order matches the numeric order
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# Characters people commonly type for the excluded ones
+CROCKFORD_ALIASES = str.maketrans({"I": "1", "L": "1", "O": "0"})
+
+# Seconds since the start of the UTC year | node | sequence within the second
+TIME_BITS = 25
+NODE_BITS = 8
+SEQUENCE_BITS = 12
+ID_LENGTH = 9  # ceil(45 bits / 5)
+
+NODES_COLLECTION = "ticket_id_nodes"
+NODE_LEASE_SECONDS = int(os.environ.get("TICKET_NODE_LEASE_SECONDS", "300"))
+# Inserts retried with a fresh id on a duplicate key, which needs two workers sharing a node
+TICKET_ID_ATTEMPTS = 3
+
+def encode_base32(value: int, length: int = ID_LENGTH) -> str:
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, 32)
+        chars.append(CROCKFORD_ALPHABET[remainder])
+    return "".join(reversed(chars))
+
+def normalize_ticket_id(ticket_id: str) -> str:
+    """Uppercase a typed ticket id and map look-alike characters in its serial part."""
+    ticket_id = ticket_id.strip().upper()
+    prefix, _, serial = ticket_id.rpartition("-")
+    if not prefix:
+        return ticket_id
+    return f"{prefix}-{serial.translate(CROCKFORD_ALIASES)}"
+
+class TicketIdGenerator:
+    """K-sortable FN-YYYY-XXXXXXXXX ticket ids, unique per leased node id."""
+
+    def __init__(self):
+        # Used until a lease is taken, e.g. by scripts that never connect
+        self.node_id = random.randrange(1 << NODE_BITS)
+        self.leased = False
+        self.owner = str(uuid.uuid4())
+        self._lock = threading.Lock()
+        self._year: Optional[int] = None
+        self._second = -1
+        self._sequence = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def next_id(self) -> str:
+        now = datetime.utcnow()
+        with self._lock:
+            if now.year != self._year:
+                self._year = now.year
+                self._second = -1
+            second = int((now - datetime(now.year, 1, 1)).total_seconds())
+            if second > self._second:
+                self._second = second
+                self._sequence = 0
+            else:
+                # Same second, or the clock stepped back: keep counting from the last id
+                self._sequence += 1
+                if self._sequence >> SEQUENCE_BITS:
+                    # Sequence exhausted, borrow the next second
+                    self._second += 1
+                    self._sequence = 0
+            value = (self._second << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+            year = self._year
+        return f"{TICKET_PREFIX}-{year}-{encode_base32(value)}"
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        await self._lease(db)
+        if self._task is None:
+            self._task = asyncio.create_task(self._renew(db), name="ticket-id-lease")
+
+    async def stop(self, db: Optional[AsyncIOMotorDatabase] = None):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if db is not None and self.leased:
+            # Free the node id for the next worker to start; otherwise it expires
+            try:
+                await db[NODES_COLLECTION].delete_one({"_id": self.node_id, "owner": self.owner})
+            except Exception as e:
+                logger.warning(f"Failed to release ticket id node {self.node_id}: {e}")
+            self.leased = False
+
+    async def _lease(self, db: AsyncIOMotorDatabase):
+        """Claim a node id that no live worker holds, preferring the current one."""
+        now = datetime.utcnow()
+        candidates = list(range(1 << NODE_BITS))
+        random.shuffle(candidates)
+        candidates.remove(self.node_id)
+        candidates.insert(0, self.node_id)
+        for node_id in candidates:
+            try:
+                await db[NODES_COLLECTION].find_one_and_update(
+                    {"_id": node_id, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                    {"$set": {
+                        "owner": self.owner,
+                        "host": socket.gethostname(),
+                        "pid": os.getpid(),
+                        "expires_at": now + timedelta(seconds=NODE_LEASE_SECONDS)
+                    }},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # Held by a live worker
+                continue
+            logger.info(f"Leased ticket id node {node_id}")
+            with self._lock:
+                self.node_id = node_id
+            self.leased = True
+            return
+        self.leased = False
+        logger.warning(f"No free ticket id node, keeping unleased node {self.node_id}")
+
+    async def _renew(self, db: AsyncIOMotorDatabase):
+        while True:
+            await asyncio.sleep(NODE_LEASE_SECONDS / 3)
+            try:
+                result = await db[NODES_COLLECTION].update_one(
+                    {"_id": self.node_id, "owner": self.owner},
+                    {"$set": {"expires_at": datetime.utcnow() + timedelta(seconds=NODE_LEASE_SECONDS)}}
+                )
+                if result.matched_count == 0:
+                    logger.warning(f"Lost the lease on ticket id node {self.node_id}, leasing another")
+                    await self._lease(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to renew ticket id node lease: {e}")
+
+ticket_ids = TicketIdGenerator()
+
+def new_ticket_id() -> str:
+    return ticket_ids.next_id()
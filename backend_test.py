@@ -179,6 +179,26 @@ def test_get_repair_requests(results: TestResult):
     results.add_result("Get Repair Requests", success, response, error)
 
 
+def test_search_partial_phone(results: TestResult):
+    """Test finding a repair request by part of its phone number, typed without the country code."""
+    if not results.auth_token or not results.created_ticket_id:
+        results.add_result("Search Partial Phone", False, None,
+                          "No auth token or ticket ID available")
+        return
+    
+    headers = {"Authorization": f"Bearer {results.auth_token}"}
+    # REPAIR_REQUEST_DATA's phone is +1234567890; search the national part with spacing
+    success, response, error = make_request("get", "/repair-requests/?search=234%20567", headers=headers)
+    
+    if success:
+        ticket_ids = [ticket["ticket_id"] for ticket in response.json()["requests"]]
+        if results.created_ticket_id not in ticket_ids:
+            success = False
+            error = f"Ticket {results.created_ticket_id} not found by partial phone"
+    
+    results.add_result("Search Partial Phone", success, response, error)
+
+
 def test_update_repair_status(results: TestResult):
     """Test updating repair request status."""
     if not results.auth_token or not results.created_ticket_id:
@@ -240,6 +260,7 @@ def main():
     # Repair request tests
     test_create_repair_request(results)
     test_get_repair_requests(results)
+    test_search_partial_phone(results)
     test_update_repair_status(results)
     
     # Contact message test
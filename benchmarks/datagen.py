@@ -0,0 +1,90 @@
+"""Synthetic repair request generator for benchmarks."""
+import random
+import string
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.models import RepairRequest, RepairStatus, PriorityLevel
+from backend.search import search_fields
+
+FIRST_NAMES = ["John", "Jane", "Alex", "Maria", "Ivan", "Olga", "Sam", "Lena", "Omar", "Chen", "Priya", "Lucas"]
+LAST_NAMES = ["Doe", "Smith", "Petrov", "Garcia", "Kim", "Novak", "Brown", "Ivanova", "Khan", "Silva"]
+DEVICES = {
+    "iPhone": ["iPhone 12", "iPhone 13 Mini", "iPhone 14 Pro", "iPhone 15 Pro Max"],
+    "Samsung": ["Galaxy S22", "Galaxy S23 Ultra", "Galaxy A54", "Galaxy Z Flip5"],
+    "Google": ["Pixel 7", "Pixel 8 Pro", "Pixel 7a"],
+    "OnePlus": ["OnePlus 11", "OnePlus Nord 3"],
+}
+ISSUES = {
+    "Screen Issues": ["Cracked Screen", "Dead Pixels", "Touch Not Working"],
+    "Battery Issues": ["Fast Drain", "Not Charging", "Swollen Battery"],
+    "Camera Issues": ["Blurry Photos", "Camera Not Opening"],
+    "Water Damage": ["Liquid Spill", "Submerged"],
+}
+STATUS_WEIGHTS = [
+    (RepairStatus.NEW, 20), (RepairStatus.IN_PROGRESS, 15), (RepairStatus.DIAGNOSED, 10),
+    (RepairStatus.PENDING_PICKUP, 5), (RepairStatus.COMPLETED, 45), (RepairStatus.CANCELLED, 5),
+]
+
+def random_submission(rng: random.Random) -> Dict[str, Any]:
+    """Payload shaped like RepairRequestCreate."""
+    brand = rng.choice(list(DEVICES))
+    category = rng.choice(list(ISSUES))
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "customerName": f"{first} {last}",
+        "customerEmail": f"{first.lower()}.{last.lower()}{rng.randint(1, 99999)}@example.com",
+        "customerPhone": f"+1 {rng.randint(200, 999)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "deviceBrand": brand,
+        "deviceModel": rng.choice(DEVICES[brand]),
+        "issueCategory": category,
+        "specificIssue": rng.choice(ISSUES[category]),
+        "description": " ".join(rng.choice(string.ascii_lowercase) * rng.randint(3, 9) for _ in range(rng.randint(5, 60))),
+        "urgency": rng.choice(["normal", "normal", "normal", "urgent"]),
+        "pickupAddress": f"{rng.randint(1, 999)} Main St, Springfield, {rng.randint(10000, 99999)}",
+        "pickupTime": rng.choice(["9am-12pm", "12pm-3pm", "3pm-6pm", None]),
+        "gdprConsent": True,
+    }
+
+def generate_tickets(count: int, seed: int = 42, days: int = 365) -> Iterator[Dict[str, Any]]:
+    """Stored repair request documents spread over the last `days` days."""
+    rng = random.Random(seed)
+    statuses = [status for status, _ in STATUS_WEIGHTS]
+    weights = [weight for _, weight in STATUS_WEIGHTS]
+    now = datetime.utcnow()
+
+    for _ in range(count):
+        created = now - timedelta(seconds=rng.randint(0, days * 86400))
+        status = rng.choices(statuses, weights)[0]
+        completed = status == RepairStatus.COMPLETED
+        ticket = RepairRequest(
+            **random_submission(rng),
+            status=status,
+            priority=rng.choice(list(PriorityLevel)),
+            createdAt=created,
+            updatedAt=created,
+            completedAt=created + timedelta(hours=rng.randint(2, 120)) if completed else None,
+            actualCost=round(rng.uniform(29, 399), 2) if completed else None,
+        )
+        document = ticket.dict()
+        document.update(search_fields(document))
+        yield document
+
+async def seed(db, count: int, batch_size: int = 2000, seed: int = 42) -> int:
+    """Insert `count` generated tickets into db.repair_requests."""
+    batch = []
+    inserted = 0
+    for document in generate_tickets(count, seed=seed):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            await db.repair_requests.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        await db.repair_requests.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""List endpoint throughput by response encoding path.
+
+Serves the same page of stored repair requests through three FastAPI
+routes and drives each over the ASGI transport, so the numbers include
+FastAPI's own response handling rather than just the encoder:
+
+  stdlib      RepairRequest models, response_model, JSONResponse (before)
+  class only  plain dicts, response_model, FastJSONResponse as the
+              app's default_response_class (jsonable_encoder still runs)
+  direct      plain dicts returned as FastJSONResponse (after)
+
+    python -m benchmarks.encoding_benchmark --rows 100 --requests 2000
+"""
+import argparse
+import asyncio
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from backend.models import RepairRequest, RepairRequestListResponse
+from backend.serialization import FastJSONResponse
+from benchmarks.datagen import generate_tickets
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+def build_app(documents: list) -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/stdlib", response_model=RepairRequestListResponse, response_class=JSONResponse)
+    async def stdlib():
+        requests = [RepairRequest(**document) for document in documents]
+        return RepairRequestListResponse(success=True, total=len(requests), requests=requests)
+
+    @app.get("/class-only", response_model=RepairRequestListResponse)
+    async def class_only():
+        return {"success": True, "total": len(documents), "requests": documents}
+
+    @app.get("/direct", response_model=RepairRequestListResponse)
+    async def direct():
+        return FastJSONResponse({"success": True, "total": len(documents), "requests": documents})
+
+    return app
+
+async def drive(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> float:
+    """Requests per second for `requests` calls spread over `concurrency` clients."""
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            response = await client.get(path)
+            response.raise_for_status()
+
+    await client.get(path)  # warm up
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started)
+
+async def run(rows: int, requests: int, concurrency: int):
+    documents = []
+    for document in generate_tickets(rows):
+        document.pop("customerPhoneDigits")
+        document.pop("customerPhoneSuffixes")
+        document.pop("searchTokens")
+        documents.append(document)
+
+    transport = httpx.ASGITransport(app=build_app(documents))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        sizes = {path: len((await client.get(path)).content) for path in ("/stdlib", "/direct")}
+        results = {path: await drive(client, path, requests, concurrency) for path in ("/stdlib", "/class-only", "/direct")}
+
+    baseline = results["/stdlib"]
+    print(f"{rows} rows per page, {sizes['/stdlib']} bytes (stdlib) / {sizes['/direct']} bytes (orjson)")
+    print(f"{'path':<12} {'req/s':>9} {'ms/req':>8} {'speedup':>8}")
+    for path, rps in results.items():
+        print(f"{path.strip('/'):<12} {rps:>9.1f} {1000 / rps:>8.2f} {rps / baseline:>7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100, help="Rows per list page")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per path")
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.requests, args.concurrency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Concurrent load test for the FixNet API.
+
+Runs each scenario with a pool of concurrent clients for a fixed duration
+and reports throughput and p50/p95/p99 latency per scenario.
+
+By default the app runs in-process over httpx's ASGI transport against a
+scratch database: a local MongoDB when --mongo-url is given, otherwise
+mongomock-motor (handy for smoke runs, but its timings say nothing about
+Mongo itself). With --url the scenarios run against an already running
+server instead; pass --mongo-url/--db-name as well to seed its database.
+
+    python -m benchmarks.load_test --mongo-url mongodb://localhost:27017 --seed 100000
+    python -m benchmarks.load_test --scenarios list search --concurrency 50 --duration 20
+    python -m benchmarks.load_test --scenarios submit --ingest-mode batched --concurrency 100
+    python -m benchmarks.load_test --output before.json
+    python -m benchmarks.load_test --compare before.json --tolerance 0.15
+
+Scenarios: submit, list, search, paginate, dashboard, timeseries, login.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import random
+import secrets
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.datagen import random_submission, seed, FIRST_NAMES, LAST_NAMES, DEVICES
+
+SCENARIOS = ["submit", "list", "search", "paginate", "dashboard", "timeseries", "login"]
+ADMIN_SCENARIOS = {"list", "search", "paginate", "dashboard", "timeseries"}
+STATUSES = ["all", "New", "In Progress", "Diagnosed", "Pending Pickup", "Completed", "Cancelled"]
+SCRATCH_DB = "fixnet_load_test"
+# Narrowed on mongomock, which has no $text search or $substrCP projection
+LIST_VIEWS = ["full", "summary"]
+SEARCH_MODES = ["auto", "prefix"]
+BENCH_ADMIN = "loadtest@example.com"
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+class ScenarioResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.statuses = collections.Counter()
+        self.elapsed = 0.0
+
+    def record(self, started: float, status):
+        self.latencies.append((time.perf_counter() - started) * 1000)
+        self.statuses[status] += 1
+
+    @property
+    def errors(self) -> int:
+        return sum(count for status, count in self.statuses.items() if not (isinstance(status, int) and status < 400))
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "rps": round(len(self.latencies) / self.elapsed, 2) if self.elapsed else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50), 3),
+            "p95_ms": round(percentile(self.latencies, 95), 3),
+            "p99_ms": round(percentile(self.latencies, 99), 3),
+            "max_ms": round(max(self.latencies), 3) if self.latencies else 0.0,
+            "statuses": {str(status): count for status, count in self.statuses.items()}
+        }
+
+async def timed(client: httpx.AsyncClient, result: ScenarioResult, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as e:
+        result.record(started, type(e).__name__)
+        return None
+    result.record(started, response.status_code)
+    return response
+
+def search_term(rng: random.Random) -> str:
+    kind = rng.randrange(4)
+    if kind == 0:
+        return rng.choice(LAST_NAMES)
+    if kind == 1:
+        return rng.choice(list(DEVICES))[:4].lower()
+    if kind == 2:
+        return f"{rng.choice(FIRST_NAMES).lower()}.{rng.choice(LAST_NAMES).lower()}"[:6]
+    return f"+1 {rng.randint(200, 999)}"
+
+async def scenario_submit(client, result, rng, headers):
+    await timed(client, result, "POST", "/api/repair-requests/", json=random_submission(rng))
+
+async def scenario_list(client, result, rng, headers):
+    params = {"status": rng.choice(STATUSES), "page": rng.randint(1, 20), "limit": 50, "view": rng.choice(LIST_VIEWS)}
+    await timed(client, result, "GET", "/api/repair-requests/", params=params, headers=headers)
+
+async def scenario_search(client, result, rng, headers):
+    params = {"search": search_term(rng), "search_mode": rng.choice(SEARCH_MODES), "limit": 50}
+    await timed(client, result, "GET", "/api/repair-requests/", params=params, headers=headers)
+
+async def scenario_paginate(client, result, rng, headers):
+    params = {"status": rng.choice(STATUSES), "limit": 50, "exact_total": "false"}
+    for _ in range(10):
+        response = await timed(client, result, "GET", "/api/repair-requests/", params=params, headers=headers)
+        if response is None or response.status_code != 200:
+            return
+        next_cursor = response.json().get("next_cursor")
+        if not next_cursor:
+            return
+        params["cursor"] = next_cursor
+
+async def scenario_dashboard(client, result, rng, headers):
+    await timed(client, result, "GET", "/api/repair-requests/stats/dashboard", headers=headers)
+
+async def scenario_timeseries(client, result, rng, headers):
+    bucket = rng.choice(["hour", "day"])
+    params = {"bucket": bucket, "group_by": rng.choice(["status", "deviceBrand", "issueCategory", "priority"])}
+    if bucket == "day":
+        params["from"] = (datetime.utcnow() - timedelta(days=rng.choice([7, 30, 365]))).isoformat()
+    await timed(client, result, "GET", "/api/repair-requests/stats/timeseries", params=params, headers=headers)
+
+def scenario_login(email: str, password: str):
+    async def run(client, result, rng, headers):
+        await timed(client, result, "POST", "/api/auth/login", json={"email": email, "password": password})
+    return run
+
+async def run_scenario(client, name: str, action, concurrency: int, duration: float, headers, seed_value: int) -> ScenarioResult:
+    result = ScenarioResult(name)
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int):
+        rng = random.Random(seed_value * 1000 + index)
+        while time.perf_counter() < deadline:
+            await action(client, result, rng, headers)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+def print_report(results: Dict[str, Dict]):
+    print(f"{'scenario':<10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, summary in results.items():
+        print(f"{name:<10} {summary['requests']:>9} {summary['errors']:>7} {summary['rps']:>9.1f} "
+              f"{summary['p50_ms']:>9.2f} {summary['p95_ms']:>9.2f} {summary['p99_ms']:>9.2f} {summary['max_ms']:>9.2f}")
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Scenarios whose p95 or throughput regressed past the tolerance."""
+    regressions = []
+    for name, summary in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and summary["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.2f}ms -> {summary['p95_ms']:.2f}ms")
+        if before["rps"] and summary["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['rps']:.1f} -> {summary['rps']:.1f} req/s")
+    return regressions
+
+async def prepare_in_process(args):
+    """Point the app at a scratch database and create a known admin."""
+    from backend import database
+    from backend.auth import get_password_hash
+    from backend.indexes import sync_indexes
+    from backend.models import AdminUser
+    from backend.ingestion import repair_ingestion
+    from backend.routes.health import service_state
+    from backend.server import app
+
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        scratch = AsyncIOMotorClient(args.mongo_url)
+        await scratch.drop_database(args.db_name)
+        scratch.close()
+        await database.connect_to_mongo(database.MongoSettings(url=args.mongo_url, db_name=args.db_name))
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        print("No --mongo-url, running on mongomock-motor: full list view and prefix search only")
+        LIST_VIEWS[:] = ["full"]
+        SEARCH_MODES[:] = ["prefix"]
+        client = AsyncMongoMockClient()
+        database.db_instance.client = client
+        database.db_instance.db = client[args.db_name]
+        await sync_indexes(database.db_instance.db)
+    service_state.started = True
+
+    db = database.db_instance.db
+    repair_ingestion.configure(args.ingest_mode, args.ingest_ack)
+    await repair_ingestion.start(db)
+    password = secrets.token_urlsafe(12)
+    await db.admin_users.insert_one(AdminUser(email=BENCH_ADMIN, hashed_password=get_password_hash(password)).dict())
+    transport = httpx.ASGITransport(app=app)
+    return db, transport, "http://loadtest", BENCH_ADMIN, password
+
+async def cleanup_in_process(args):
+    from backend import database
+    from backend.ingestion import repair_ingestion
+    await repair_ingestion.stop()
+    if args.mongo_url and not args.keep:
+        await database.db_instance.client.drop_database(args.db_name)
+    await database.close_mongo_connection()
+
+async def seed_database(db, count: int):
+    from backend.stats import reconcile_dashboard_counters
+    from backend.analytics import rebuild_rollups
+    started = time.perf_counter()
+    inserted = await seed(db, count)
+    # Tickets were inserted behind the API's back, rebuild the counters it maintains
+    await reconcile_dashboard_counters(db)
+    await rebuild_rollups(db)
+    print(f"Seeded {inserted} tickets in {time.perf_counter() - started:.1f}s")
+
+async def run(args):
+    external_client = None
+    if args.url:
+        transport, base_url, email, password = None, args.url, args.email, args.password
+        if args.seed:
+            if not args.mongo_url:
+                raise SystemExit("--seed with --url needs --mongo-url to reach the server's database")
+            from motor.motor_asyncio import AsyncIOMotorClient
+            external_client = AsyncIOMotorClient(args.mongo_url)
+            await seed_database(external_client[args.db_name], args.seed)
+    else:
+        db, transport, base_url, email, password = await prepare_in_process(args)
+        if args.seed:
+            await seed_database(db, args.seed)
+
+    limits = httpx.Limits(max_connections=args.concurrency + 5)
+    results = {}
+    try:
+        async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=60.0, limits=limits) as client:
+            headers = {}
+            if ADMIN_SCENARIOS.intersection(args.scenarios):
+                if not email or not password:
+                    raise SystemExit("Admin scenarios against --url need --email and --password")
+                response = await client.post("/api/auth/login", json={"email": email, "password": password})
+                response.raise_for_status()
+                headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            actions = {
+                "submit": scenario_submit,
+                "list": scenario_list,
+                "search": scenario_search,
+                "paginate": scenario_paginate,
+                "dashboard": scenario_dashboard,
+                "timeseries": scenario_timeseries,
+                "login": scenario_login(email, password)
+            }
+            for index, name in enumerate(args.scenarios):
+                result = await run_scenario(client, name, actions[name], args.concurrency, args.duration, headers, args.random_seed + index)
+                results[name] = result.summary()
+    finally:
+        if external_client is not None:
+            external_client.close()
+        if not args.url:
+            await cleanup_in_process(args)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--seed", type=int, default=10000, help="Tickets to generate before the run (0 to skip)")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--url", help="Run against this server instead of in-process")
+    parser.add_argument("--email", help="Admin email for --url runs")
+    parser.add_argument("--password", help="Admin password for --url runs")
+    parser.add_argument("--mongo-url", help="MongoDB to use in-process, or to seed for --url runs")
+    parser.add_argument("--db-name", default=SCRATCH_DB)
+    parser.add_argument("--keep", action="store_true", help="Keep the in-process scratch database")
+    parser.add_argument("--ingest-mode", choices=["direct", "batched"], default="direct", help="In-process submission path")
+    parser.add_argument("--ingest-ack", choices=["commit", "queued"], default="commit", help="When batched submissions are answered")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON from a previous --output run")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed p95/throughput regression vs the baseline")
+    args = parser.parse_args()
+
+    # One INFO line per request would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Unrelated endpoint latency during a login storm.
+
+Measures GET /api/health latency on a running local backend, first at
+rest and then while a crowd of concurrent clients hammers
+POST /api/auth/login. With bcrypt running in the bounded hashing pool
+the health check should stay flat; excess logins are shed with 503/429.
+
+    uvicorn backend.server:app --port 8001 &
+    python -m benchmarks.login_storm_benchmark --url http://localhost:8001
+"""
+import argparse
+import asyncio
+import collections
+import statistics
+import time
+
+import httpx
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def probe_health(client: httpx.AsyncClient, duration: float, interval: float):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get("/api/health")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+async def storm(client: httpx.AsyncClient, deadline: float, email: str, password: str, statuses: collections.Counter):
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.post("/api/auth/login", json={"email": email, "password": password})
+            statuses[response.status_code] += 1
+        except httpx.HTTPError:
+            statuses["error"] += 1
+
+def report(label: str, latencies):
+    print(f"{label:<14} n={len(latencies):<5} p50={statistics.median(latencies):7.2f}ms "
+          f"p95={percentile(latencies, 95):7.2f}ms p99={percentile(latencies, 99):7.2f}ms "
+          f"max={max(latencies):7.2f}ms")
+
+async def run(url: str, duration: float, concurrency: int, email: str, password: str):
+    limits = httpx.Limits(max_connections=concurrency + 5)
+    async with httpx.AsyncClient(base_url=url, timeout=30.0, limits=limits) as client:
+        baseline = await probe_health(client, duration, 0.02)
+        report("baseline", baseline)
+
+        statuses = collections.Counter()
+        deadline = time.perf_counter() + duration
+        attackers = [
+            asyncio.create_task(storm(client, deadline, f"storm{i}-{email}" if i % 2 else email, password, statuses))
+            for i in range(concurrency)
+        ]
+        during = await probe_health(client, duration, 0.02)
+        await asyncio.gather(*attackers)
+        report("login storm", during)
+        print(f"login responses: {dict(statuses)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--email", default="zagat5654@gmail.com")
+    parser.add_argument("--password", default="wrong-password")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.duration, args.concurrency, args.email, args.password))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Repair request search latency as the collection grows.
+
+Seeds a scratch database on a local MongoDB (MONGO_URL, default
+mongodb://localhost:27017) with generated tickets and compares the legacy
+seven-clause $regex search against the index-backed search modes.
+
+    python -m benchmarks.search_benchmark --sizes 1000 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend import database
+from backend.search import build_search_query
+from benchmarks.datagen import seed
+
+def legacy_query(term: str):
+    fields = ["customerName", "customerEmail", "customerPhone", "ticket_id", "deviceBrand", "deviceModel", "specificIssue"]
+    return {"$or": [{field: {"$regex": re.escape(term), "$options": "i"}} for field in fields]}
+
+async def time_query(db, query, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await db.repair_requests.count_documents(query)
+        await db.repair_requests.find(query).sort([("createdAt", -1), ("ticket_id", -1)]).limit(50).to_list(50)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+async def run(sizes, repeats: int):
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db_name = "fixnet_search_benchmark"
+    await client.drop_database(db_name)
+    database.db_instance.client = client
+    database.db_instance.db = client[db_name]
+    await database.create_indexes()
+    db = database.db_instance.db
+
+    print(f"{'docs':>9} {'scenario':<16} {'legacy ms':>10} {'indexed ms':>11}")
+    seeded = 0
+    for size in sizes:
+        seeded += await seed(db, size - seeded, seed=size)
+        sample = await db.repair_requests.find_one()
+        scenarios = {
+            "ticket id": sample["ticket_id"][:12],
+            "email": sample["customerEmail"],
+            "phone prefix": sample["customerPhone"][:7],
+            "name (text)": sample["customerName"].split()[-1],
+            "model (prefix)": "galax",
+        }
+        for label, term in scenarios.items():
+            mode = "prefix" if "prefix" in label and label != "phone prefix" else "auto"
+            legacy = await time_query(db, legacy_query(term), repeats)
+            indexed = await time_query(db, build_search_query(term, mode), repeats)
+            print(f"{size:>9} {label:<16} {legacy:>10.2f} {indexed:>11.2f}")
+
+    await client.drop_database(db_name)
+    client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(sorted(args.sizes), args.repeats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Per-request CPU cost of repair request serialization.
+
+Compares the validate-and-re-serialize path (RepairRequest models run
+through FastAPI's response_model handling) with the lean path (one
+validation on ingest, raw documents encoded directly). Exits non-zero
+when a lean path exceeds its --max-us budget, so it can gate changes.
+
+    python -m benchmarks.serialization_benchmark --rows 100
+"""
+import argparse
+import random
+import sys
+import timeit
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.models import RepairRequest, RepairRequestCreate, RepairRequestListResponse, RepairStatus, PriorityLevel
+from backend.search import search_fields
+from backend.serialization import dumps
+from benchmarks.datagen import generate_tickets, random_submission
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+def legacy_create(submission: dict) -> bytes:
+    request_data = RepairRequestCreate(**submission)
+    repair_request = RepairRequest(
+        **request_data.dict(),
+        priority=PriorityLevel.MEDIUM,
+        estimatedCompletion=datetime.utcnow() + timedelta(days=3)
+    )
+    repair_request.dict()  # insert
+    repair_request.dict()  # notification payload
+    response = {"success": True, "message": "ok", "ticket_id": repair_request.ticket_id, "data": repair_request}
+    return JSONResponse(jsonable_encoder(response)).body
+
+def lean_create(submission: dict) -> bytes:
+    request_data = RepairRequestCreate(**submission)
+    repair_request = RepairRequest.construct(
+        **request_data.dict(),
+        status=RepairStatus.NEW.value,
+        priority=PriorityLevel.MEDIUM.value,
+        estimatedCompletion=datetime.utcnow() + timedelta(days=3)
+    ).dict()
+    {**repair_request, **search_fields(repair_request)}  # insert
+    return dumps({"success": True, "message": "ok", "ticket_id": repair_request["ticket_id"], "data": repair_request})
+
+def legacy_list(documents: list) -> bytes:
+    requests = [RepairRequest(**document) for document in documents]
+    response = RepairRequestListResponse(success=True, total=len(requests), requests=requests)
+    return JSONResponse(jsonable_encoder(response)).body
+
+def lean_list(documents: list) -> bytes:
+    return dumps({"success": True, "total": len(documents), "requests": documents})
+
+def measure(fn, arg, number: int) -> float:
+    """Best-of-5 microseconds per call."""
+    return min(timeit.repeat(lambda: fn(arg), number=number, repeat=5)) / number * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100, help="Rows per list page")
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--max-create-us", type=float, default=None, help="Fail if lean create exceeds this")
+    parser.add_argument("--max-list-us", type=float, default=None, help="Fail if lean list page exceeds this")
+    args = parser.parse_args()
+
+    submission = random_submission(random.Random(1))
+    documents = []
+    for document in generate_tickets(args.rows):
+        document.pop("customerPhoneDigits")
+        document.pop("customerPhoneSuffixes")
+        document.pop("searchTokens")
+        documents.append(document)
+
+    results = {
+        "create": (measure(legacy_create, submission, args.number), measure(lean_create, submission, args.number)),
+        f"list ({args.rows} rows)": (measure(legacy_list, documents, args.number // 10 or 1), measure(lean_list, documents, args.number // 10 or 1)),
+    }
+
+    print(f"{'path':<16} {'legacy us':>10} {'lean us':>10} {'speedup':>8}")
+    for path, (legacy, lean) in results.items():
+        print(f"{path:<16} {legacy:>10.1f} {lean:>10.1f} {legacy / lean:>7.1f}x")
+
+    failed = False
+    if args.max_create_us is not None and results["create"][1] > args.max_create_us:
+        print(f"lean create over budget: {results['create'][1]:.1f}us > {args.max_create_us}us")
+        failed = True
+    if args.max_list_us is not None and results[f"list ({args.rows} rows)"][1] > args.max_list_us:
+        print(f"lean list over budget: {results[f'list ({args.rows} rows)'][1]:.1f}us > {args.max_list_us}us")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
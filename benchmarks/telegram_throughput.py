@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Offline Telegram send throughput benchmark.
+
+Runs TelegramBot against an in-process stand-in for the Bot API that
+simulates network latency and enforces a per-chat rate limit with 429
+responses, so the pooled client and token-bucket limiter can be measured
+without touching api.telegram.org.
+
+    python -m benchmarks.telegram_throughput --messages 50 --latency-ms 80
+"""
+import argparse
+import asyncio
+import json
+import time
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.telegram_bot import TelegramBot
+
+class FakeTelegramAPI:
+    """Minimal sendMessage endpoint with latency and per-chat rate limiting."""
+
+    def __init__(self, latency_ms: float, chat_limit_per_second: float):
+        self.latency = latency_ms / 1000
+        self.min_interval = 1 / chat_limit_per_second
+        self.last_sent = {}
+        self.accepted = 0
+        self.rejected = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency)
+        payload = json.loads(request.content)
+        chat_id = payload["chat_id"]
+        now = time.monotonic()
+        last = self.last_sent.get(chat_id)
+        if last is not None and now - last < self.min_interval:
+            self.rejected += 1
+            return httpx.Response(429, json={
+                "ok": False,
+                "error_code": 429,
+                "description": "Too Many Requests",
+                "parameters": {"retry_after": 1}
+            })
+        self.last_sent[chat_id] = now
+        self.accepted += 1
+        return httpx.Response(200, json={"ok": True, "result": {"message_id": self.accepted}})
+
+async def run(messages: int, latency_ms: float, chat_limit: float, rate: float, burst: float):
+    api = FakeTelegramAPI(latency_ms, chat_limit)
+    bot = TelegramBot(
+        "000:benchmark", "1",
+        api_url="http://telegram.local",
+        rate_per_second=rate,
+        burst=burst,
+        transport=httpx.MockTransport(api.handler)
+    )
+    await bot.start()
+    started = time.perf_counter()
+    results = await asyncio.gather(*(bot.send_message(f"message {i}") for i in range(messages)))
+    elapsed = time.perf_counter() - started
+    await bot.close()
+
+    print(f"messages:    {messages}")
+    print(f"delivered:   {sum(results)}")
+    print(f"rejected:    {api.rejected} (429 from stand-in)")
+    print(f"elapsed:     {elapsed:.2f}s")
+    print(f"throughput:  {sum(results) / elapsed:.2f} msg/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--chat-limit", type=float, default=20.0, help="Stand-in per-chat limit (msg/s)")
+    parser.add_argument("--rate", type=float, default=1.0, help="Client token-bucket rate (msg/s)")
+    parser.add_argument("--burst", type=float, default=3.0, help="Client token-bucket capacity")
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.latency_ms, args.chat_limit, args.rate, args.burst))
+
+if __name__ == "__main__":
+    main()
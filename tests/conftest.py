@@ -0,0 +1,20 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from backend.cache import response_cache, auth_cache
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["fixnet_test"]
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    response_cache.clear()
+    auth_cache.clear()
+    yield
+    response_cache.clear()
+    auth_cache.clear()
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.analytics import (
+    ROLLUPS_COLLECTION, apply_rollups, get_timeseries, rebuild_rollups, rollup_deltas, rollup_key, group_value
+)
+
+pytestmark = pytest.mark.anyio
+
+CREATED = datetime(2026, 4, 1, 9, 30)
+COMPLETED = datetime(2026, 4, 2, 15, 0)
+
+def ticket(status="New", **fields):
+    return {"status": status, "createdAt": CREATED, "deviceBrand": "Apple", "issueCategory": "Screen", "priority": "High", **fields}
+
+def completed():
+    return ticket("Completed", completedAt=COMPLETED, actualCost=150.0)
+
+def test_rollup_keys_are_safe_field_names():
+    assert rollup_key("Mi 11.5") == "Mi 11．5"
+    assert group_value(rollup_key("$x.y")) == "$x.y"
+    assert rollup_key(None) == rollup_key("") == "unknown"
+
+def test_created_ticket_counts_in_its_hour_and_day():
+    deltas = rollup_deltas([(None, ticket())])
+
+    assert set(deltas) == {"hour:2026-04-01T09", "day:2026-04-01"}
+    assert deltas["day:2026-04-01"] == {
+        "created": 1, "by_status.New": 1, "by_deviceBrand.Apple": 1, "by_issueCategory.Screen": 1, "by_priority.High": 1
+    }
+
+def test_completion_moves_status_and_counts_revenue_when_completed():
+    deltas = rollup_deltas([(ticket(), completed())])
+
+    assert deltas["day:2026-04-01"] == {"by_status.New": -1, "by_status.Completed": 1}
+    assert deltas["day:2026-04-02"] == {
+        "completed": 1, "revenue": 150.0, "turnaround_count": 1, "turnaround_seconds": (COMPLETED - CREATED).total_seconds()
+    }
+
+def test_unchanged_ticket_has_no_deltas():
+    assert rollup_deltas([(ticket(), ticket())]) == {}
+
+async def test_rebuild_corrects_drifted_rollups(db):
+    await db.repair_requests.insert_many([ticket(), completed()])
+    await apply_rollups(db, [(None, ticket())])
+    await db[ROLLUPS_COLLECTION].update_one({"_id": "day:2026-04-01"}, {"$inc": {"created": 7, "bogus": 1}})
+
+    assert await rebuild_rollups(db) == 2
+
+    rollup = await db[ROLLUPS_COLLECTION].find_one({"_id": "day:2026-04-01"})
+    assert (rollup["created"], rollup["by_status"], rollup["bogus"]) == (2, {"New": 1, "Completed": 1}, 0)
+    assert (await db[ROLLUPS_COLLECTION].find_one({"_id": "day:2026-04-02"}))["revenue"] == 150.0
+
+async def test_rebuild_leaves_rollups_written_during_the_scan(db, monkeypatch):
+    await db.repair_requests.insert_one(ticket())
+    await apply_rollups(db, [(None, ticket())])
+    await db[ROLLUPS_COLLECTION].update_one({"_id": "day:2026-04-01"}, {"$inc": {"created": 3}})
+    bulk_write = type(db.repair_requests).bulk_write
+    raced = []
+
+    async def racing_bulk_write(self, writes, *args, **kwargs):
+        if not raced:
+            # A new ticket lands after the rebuild took its snapshot and scanned the tickets
+            raced.append(True)
+            await db.repair_requests.insert_one(ticket())
+            await apply_rollups(db, [(None, ticket())])
+        return await bulk_write(self, writes, *args, **kwargs)
+
+    monkeypatch.setattr(type(db.repair_requests), "bulk_write", racing_bulk_write)
+    await rebuild_rollups(db)
+
+    # The raced rollup keeps its live counts, drift included, until the next rebuild
+    assert (await db[ROLLUPS_COLLECTION].find_one({"_id": "day:2026-04-01"}))["created"] == 5
+    assert (await db[ROLLUPS_COLLECTION].find_one({"_id": "hour:2026-04-01T09"}))["created"] == 2
+    await rebuild_rollups(db)
+    assert (await db[ROLLUPS_COLLECTION].find_one({"_id": "day:2026-04-01"}))["created"] == 2
+
+async def test_timeseries_is_zero_filled(db):
+    await apply_rollups(db, [(None, ticket()), (None, completed())])
+
+    points = await get_timeseries(db, datetime(2026, 3, 31), datetime(2026, 4, 3), "day", group_by="status")
+
+    assert [point["start"] for point in points] == [datetime(2026, 3, 31) + timedelta(days=day) for day in range(3)]
+    assert [point["created"] for point in points] == [0, 2, 0]
+    assert points[1]["groups"] == {"New": 1, "Completed": 1}
+    assert (points[2]["completed"], points[2]["revenue"]) == (1, 150.0)
+    assert points[2]["avg_turnaround_hours"] == round((COMPLETED - CREATED).total_seconds() / 3600, 2)
+    assert points[0]["avg_turnaround_hours"] is None
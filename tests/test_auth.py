@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+from jose import jwt
+
+from backend.auth import (
+    ALGORITHM, SECRET_KEY, _authenticate_token, _verify_stream_ticket, create_access_token, create_stream_ticket,
+    revoke_token, session_active, set_admin_active, set_admin_password, token_digest, verify_token
+)
+from backend.models import AdminUser
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = "admin@example.com"
+
+@pytest.fixture
+async def admin(db):
+    await db.admin_users.insert_one(AdminUser(email=EMAIL, hashed_password="not-a-real-hash").dict())
+    return EMAIL
+
+def issued_minutes_ago(minutes: int) -> str:
+    issued_at = datetime.utcnow() - timedelta(minutes=minutes)
+    return jwt.encode({"sub": EMAIL, "iat": issued_at, "exp": issued_at + timedelta(hours=1)}, SECRET_KEY, algorithm=ALGORITHM)
+
+async def test_valid_token_is_verified_then_served_from_cache(db, admin):
+    token = create_access_token({"sub": admin})
+
+    assert await _authenticate_token(db, token) == (admin, "verified")
+    assert await _authenticate_token(db, token) == (admin, "cached")
+
+async def test_revoked_token_is_rejected_even_when_cached(db, admin):
+    token = create_access_token({"sub": admin})
+    await _authenticate_token(db, token)
+
+    await revoke_token(db, token, admin)
+
+    assert await _authenticate_token(db, token) == (None, "rejected")
+    assert not await session_active(db, token_digest(token), admin, verify_token(token)["iat"])
+    stored = await db.revoked_tokens.find_one({"_id": token_digest(token)})
+    assert stored["expires_at"] == datetime.utcfromtimestamp(verify_token(token)["exp"])
+
+async def test_revoking_one_token_keeps_other_sessions(db, admin):
+    revoked, other = create_access_token({"sub": admin}), create_access_token({"sub": admin})
+
+    await revoke_token(db, revoked, admin)
+
+    assert await _authenticate_token(db, other) == (admin, "verified")
+
+async def test_deactivating_an_admin_ends_cached_sessions(db, admin):
+    token = create_access_token({"sub": admin})
+    await _authenticate_token(db, token)
+
+    await set_admin_active(db, admin, False)
+
+    assert await _authenticate_token(db, token) == (None, "rejected")
+
+async def test_password_change_rejects_older_tokens(db, admin):
+    older = issued_minutes_ago(5)
+    assert await _authenticate_token(db, older) == (admin, "verified")
+
+    await set_admin_password(db, admin, "new-password")
+
+    assert await _authenticate_token(db, older) == (None, "rejected")
+    assert await _authenticate_token(db, create_access_token({"sub": admin})) == (admin, "verified")
+
+async def test_stream_ticket_is_not_an_access_token(db, admin):
+    token = create_access_token({"sub": admin})
+    ticket = create_stream_ticket(token)
+
+    assert verify_token(ticket) is None
+    assert await _authenticate_token(db, ticket) == (None, "rejected")
+    assert _verify_stream_ticket(ticket) == {"email": admin, "session": token_digest(token), "session_iat": verify_token(token)["iat"]}
+    assert _verify_stream_ticket(token) is None
+
+async def test_stream_ticket_dies_with_its_session(db, admin):
+    token = create_access_token({"sub": admin})
+    session = _verify_stream_ticket(create_stream_ticket(token))
+
+    await revoke_token(db, token, admin)
+
+    assert not await session_active(db, session["session"], session["email"], session["session_iat"])
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from backend import cache as cache_module
+from backend.cache import CacheInvalidator, MongoInvalidationBackend, TTLCache, cached, cached_json, response_cache
+
+pytestmark = pytest.mark.anyio
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock.monotonic)
+    return clock
+
+def test_tag_invalidation_drops_only_tagged_keys():
+    cache = TTLCache()
+    cache.set("list:1", "a", tags=["repair_requests"])
+    cache.set("ticket:FN-1", "b", tags=["repair_requests", "ticket:FN-1"])
+    cache.set("health", "c")
+
+    cache.invalidate_tag("repair_requests")
+
+    assert cache.get("list:1") is None and cache.get("ticket:FN-1") is None
+    assert cache.get("health") == "c"
+    assert cache.invalidations == 2
+
+def test_every_invalidation_bumps_the_generation():
+    cache = TTLCache()
+    cache.delete("missing")
+    cache.invalidate_tag("missing")
+    cache.clear()
+
+    assert cache.generation == 3
+
+def test_entries_expire(clock):
+    cache = TTLCache(default_ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    clock.now += 45
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+def test_sweep_drops_expired_keys_nobody_reads(clock):
+    cache = TTLCache(default_ttl=1)
+    cache.set("a", 1)
+    clock.now += 10
+
+    cache.set("b", 2)
+
+    assert len(cache) == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+def test_byte_bound_counts_encoded_values_only():
+    cache = TTLCache(maxbytes=10)
+    cache.set("a", b"12345")
+    cache.set("b", {"not": "counted"})
+    cache.set("c", b"123456")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == {"not": "counted"}
+    assert cache.bytes == 6
+
+    cache.set("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    assert cache.get("c") == b"123456"
+
+async def test_cached_loads_once():
+    calls = []
+
+    async def loader():
+        calls.append(True)
+        return {"total": 1}
+
+    assert await cached("stats", loader) == {"total": 1}
+    assert await cached("stats", loader) == {"total": 1}
+    assert len(calls) == 1
+
+async def test_value_invalidated_while_loading_is_not_stored():
+    async def loader():
+        response_cache.invalidate_tag("repair_requests")
+        return "stale"
+
+    assert await cached("list", loader, tags=["repair_requests"]) == "stale"
+    assert response_cache.get("list") is None
+
+async def test_cached_json_stores_encoded_bytes():
+    async def found():
+        return {"ticket_id": "FN-1"}
+
+    async def missing():
+        return None
+
+    assert await cached_json("ticket:FN-1", found) == b'{"ticket_id":"FN-1"}'
+    assert response_cache.get("ticket:FN-1") == b'{"ticket_id":"FN-1"}'
+    assert await cached_json("ticket:FN-2", missing) is None
+
+def test_invalidator_applies_to_every_cache():
+    first, second = TTLCache(), TTLCache()
+    invalidator = CacheInvalidator(first, second)
+    for cache in (first, second):
+        cache.set("a", 1, tags=["t"])
+        cache.set("b", 2)
+        cache.set("c", 3)
+
+    invalidator.apply(keys=["b"], tags=["t"])
+
+    assert [len(first), len(second)] == [1, 1]
+    invalidator.reset()
+    assert [len(first), len(second)] == [0, 0]
+
+class FeedCollection:
+    def __init__(self, messages):
+        self.messages = messages
+
+    def find(self, query, cursor_type):
+        return self
+
+    async def __aiter__(self):
+        for message in self.messages:
+            yield message
+        # Park like an idle tailable cursor
+        await asyncio.Event().wait()
+
+async def test_invalidation_feed_starts_after_the_marker_and_skips_own_messages():
+    backend = MongoInvalidationBackend(db=None)
+    backend.db = {MongoInvalidationBackend.COLLECTION: FeedCollection([
+        {"_id": 1, "origin": "other", "keys": ["old"], "tags": []},
+        {"_id": 2, "origin": backend.origin, "keys": [], "tags": []},
+        {"_id": 3, "origin": backend.origin, "keys": ["own"], "tags": []},
+        {"_id": 4, "origin": "other", "keys": ["k"], "tags": ["t"]}
+    ])}
+    received = []
+
+    task = asyncio.create_task(backend._tail(lambda keys, tags: received.append((keys, tags)), lambda: None, marker=2))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert received == [(["k"], ["t"])]
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from backend import events as events_module
+from backend.events import RESYNC, TicketEventBroker, format_sse, transition_event
+
+pytestmark = pytest.mark.anyio
+
+def ticket(status="New", **fields):
+    return {"_id": "oid-1", "ticket_id": "FN-1", "status": status, "customerName": "Jane", "description": "long text", **fields}
+
+def test_transition_events():
+    assert transition_event(None, None) is None
+    assert transition_event(ticket(), None) == {"type": "deleted", "ticket_id": "FN-1"}
+    assert transition_event(None, ticket())["type"] == "created"
+    assert transition_event(ticket(), ticket(priority="High"))["type"] == "updated"
+
+    changed = transition_event(ticket(), ticket("Diagnosed"))
+    assert (changed["type"], changed["old_status"], changed["status"]) == ("status_changed", "New", "Diagnosed")
+    assert "description" not in changed["ticket"]
+    assert changed["ticket"]["customerName"] == "Jane"
+
+def test_format_sse_frame():
+    frame = format_sse("abc-1", {"type": "deleted", "ticket_id": "FN-1"})
+
+    header, data = frame.decode().rstrip("\n").split("data: ")
+    assert header == "event: deleted\nid: abc-1\n"
+    assert json.loads(data) == {"type": "deleted", "ticket_id": "FN-1"}
+    assert frame.endswith(b"\n\n")
+    assert b"id:" not in format_sse(None, {"type": RESYNC})
+
+async def test_subscriber_replays_events_after_its_last_id():
+    broker = TicketEventBroker()
+    first = broker.publish({"type": "created", "ticket_id": "FN-1"})
+    broker.publish({"type": "created", "ticket_id": "FN-2"})
+
+    queue, backlog = await broker.subscribe(last_event_id=first)
+    broker.publish({"type": "deleted", "ticket_id": "FN-1"})
+
+    assert [event["ticket_id"] for _, event in backlog] == ["FN-2"]
+    assert queue.get_nowait()[1]["type"] == "deleted"
+    broker.unsubscribe(queue)
+    assert broker.subscribers == 0
+
+async def test_unknown_last_id_asks_the_client_to_resync():
+    broker = TicketEventBroker()
+
+    _, backlog = await broker.subscribe(last_event_id="other-worker-7")
+
+    assert backlog == [(None, {"type": RESYNC, "reason": "unknown_event_id"})]
+
+async def test_lagging_subscriber_gets_a_resync_instead_of_blocking(monkeypatch):
+    monkeypatch.setattr(events_module, "SUBSCRIBER_QUEUE_SIZE", 2)
+    broker = TicketEventBroker()
+    queue, _ = await broker.subscribe()
+
+    for number in range(3):
+        broker.publish({"type": "created", "ticket_id": f"FN-{number}"})
+
+    assert queue.get_nowait() == (None, {"type": RESYNC, "reason": "lagging"})
+    assert queue.empty()
+
+def test_change_stream_delete_uses_remembered_ticket_ids():
+    broker = TicketEventBroker()
+    insert = {"operationType": "insert", "documentKey": {"_id": "oid-1"}, "fullDocument": ticket()}
+    delete = {"operationType": "delete", "documentKey": {"_id": "oid-1"}}
+
+    assert broker._change_event(insert)["type"] == "created"
+    assert broker._change_event(delete) == {"type": "deleted", "ticket_id": "FN-1"}
+    assert broker._change_event(delete) == {"type": RESYNC, "reason": "unknown_delete"}
+
+def test_local_writes_are_not_published_twice_under_a_change_stream():
+    broker = TicketEventBroker()
+    broker.source = "change_stream"
+
+    broker.publish_transitions([(ticket(), None)])
+
+    assert list(broker._buffer) == []
+    assert broker._change_event({"operationType": "delete", "documentKey": {"_id": "oid-1"}})["ticket_id"] == "FN-1"
@@ -0,0 +1,64 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from enum import Enum
+
+import pytest
+
+from backend.export import _csv_value, accepts_gzip, csv_chunks, gzip_chunks, ndjson_chunks
+
+pytestmark = pytest.mark.anyio
+
+class Status(Enum):
+    NEW = "New"
+
+async def iterate(items):
+    for item in items:
+        yield item
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+@pytest.mark.parametrize("value", ["=HYPERLINK(\"x\")", "+1 234", "-2+3", "@SUM(A1)", "\tcmd", "\rcmd"])
+def test_formula_prefixes_are_neutralised(value):
+    assert _csv_value(value) == f"'{value}"
+
+def test_plain_values_are_kept():
+    assert _csv_value("Cracked screen") == "Cracked screen"
+    assert _csv_value(-5) == -5
+    assert _csv_value(None) == ""
+    assert _csv_value(datetime(2026, 1, 2, 3, 4)) == "2026-01-02T03:04:00"
+    assert _csv_value(Status.NEW) == "New"
+
+async def test_csv_chunks_write_a_header_and_rows():
+    documents = [{"ticket_id": "FN-1", "customerName": "=cmd"}, {"ticket_id": "FN-2"}]
+
+    body = (await collect(csv_chunks(iterate(documents), ["ticket_id", "customerName"]))).decode("utf-8")
+
+    assert list(csv.reader(io.StringIO(body))) == [["ticket_id", "customerName"], ["FN-1", "'=cmd"], ["FN-2", ""]]
+
+async def test_ndjson_chunks_write_one_document_per_line():
+    body = await collect(ndjson_chunks(iterate([{"a": 1}, {"a": 2}])))
+
+    assert body.splitlines() == [b'{"a":1}', b'{"a":2}']
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ("gzip", True),
+    ("deflate, GZIP;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip;q=oops", False),
+    ("*", True),
+    ("br, identity", False)
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+async def test_gzip_chunks_form_one_member():
+    chunks = [b"ticket_id\n", b"FN-1\n" * 1000]
+
+    body = await collect(gzip_chunks(iterate(chunks)))
+
+    assert zlib.decompress(body, 16 + zlib.MAX_WBITS) == b"".join(chunks)
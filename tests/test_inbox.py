@@ -0,0 +1,59 @@
+import pytest
+
+from backend.inbox import (
+    INBOX_COUNTERS_COLLECTION, INBOX_COUNTERS_ID, _unread_delta, adjust_unread, apply_bulk_action, get_unread_count,
+    reconcile_unread_count
+)
+
+pytestmark = pytest.mark.anyio
+
+async def counter(db):
+    return (await db[INBOX_COUNTERS_COLLECTION].find_one({"_id": INBOX_COUNTERS_ID}))["unread"]
+
+@pytest.fixture
+async def messages(db):
+    await db.contact_messages.insert_many([
+        {"id": "m1", "is_read": False},
+        {"id": "m2", "is_read": False},
+        {"id": "m3", "is_read": True}
+    ])
+    assert await get_unread_count(db) == 2
+    return db
+
+def test_unread_delta():
+    assert _unread_delta("mark_read", {"nModified": 2}, 0) == -2
+    assert _unread_delta("mark_unread", {"nModified": 1}, 0) == 1
+    assert _unread_delta("delete", {"nRemoved": 3}, 1) == -1
+    assert _unread_delta("delete", {"nRemoved": 1}, 2) == -1
+
+async def test_mark_read_moves_only_changed_messages(messages):
+    result = await apply_bulk_action(messages, "mark_read", ["m1", "m3", "m1"])
+
+    assert result == {"requested": 2, "changed": 1}
+    assert await counter(messages) == 1
+
+async def test_delete_counts_the_unread_messages_it_removes(messages):
+    result = await apply_bulk_action(messages, "delete", ["m1", "m3", "missing"])
+
+    assert result == {"requested": 3, "changed": 2}
+    assert await counter(messages) == 1
+
+async def test_reconcile_corrects_drift(messages):
+    await adjust_unread(messages, 5)
+
+    assert await reconcile_unread_count(messages) == 2
+    assert await counter(messages) == 2
+
+async def test_reconcile_skips_a_counter_changed_since_its_snapshot(messages, monkeypatch):
+    count_documents = type(messages.contact_messages).count_documents
+
+    async def racing_count(self, query, *args, **kwargs):
+        # A message arrives between the snapshot and the recount
+        await messages.contact_messages.insert_one({"id": "m4", "is_read": False})
+        await adjust_unread(messages, 1)
+        return await count_documents(self, query, *args, **kwargs)
+
+    monkeypatch.setattr(type(messages.contact_messages), "count_documents", racing_count)
+    await reconcile_unread_count(messages)
+
+    assert await counter(messages) == 3
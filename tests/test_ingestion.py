@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from backend.ingestion import DUPLICATE_KEY, IngestFailed, IngestionPipeline, _duplicate_field, _Submission
+
+pytestmark = pytest.mark.anyio
+
+def duplicate(index, key_pattern=None, errmsg="E11000 duplicate key error"):
+    error = {"index": index, "code": DUPLICATE_KEY, "errmsg": errmsg}
+    if key_pattern is not None:
+        error["keyPattern"] = key_pattern
+    return error
+
+class ScriptedCollection:
+    """insert_many answers taken from a script; stored documents looked up by _id."""
+
+    def __init__(self, *outcomes, stored=()):
+        self.outcomes = list(outcomes)
+        self.stored = set(stored)
+        self.batches = []
+
+    async def insert_many(self, documents, ordered):
+        self.batches.append([dict(document) for document in documents])
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+
+    async def find_one(self, query, projection):
+        return {"_id": query["_id"]} if query["_id"] in self.stored else None
+
+def pipeline_with(collection):
+    pipeline = IngestionPipeline()
+    pipeline._db = {"repair_requests": collection}
+    return pipeline
+
+def submission(ticket_id, document_id, attempts=0):
+    item = _Submission({"_id": document_id, "ticket_id": ticket_id}, asyncio.get_running_loop().create_future())
+    item.attempts = attempts
+    return item
+
+@pytest.mark.parametrize("error, field", [
+    (duplicate(0, {"ticket_id": 1}), "ticket_id"),
+    (duplicate(0, {"_id": 1}), "_id"),
+    (duplicate(0, errmsg="E11000 duplicate key error collection: db.c index: ticket_id_1 dup key"), "ticket_id"),
+    (duplicate(0, errmsg="E11000 duplicate key error collection: db.c index: _id_ dup key"), "_id"),
+    (duplicate(0, errmsg="E11000 duplicate key error index: email_1"), None)
+])
+def test_duplicate_field(error, field):
+    assert _duplicate_field(error) == field
+
+async def test_own_id_collision_after_a_lost_ack_counts_as_written():
+    collection = ScriptedCollection(BulkWriteError({"writeErrors": [duplicate(0, {"_id": 1})]}))
+    item = submission("FN-1", "a", attempts=1)
+
+    await pipeline_with(collection)._flush([item])
+
+    assert item.future.result() is None
+    assert len(collection.batches) == 1
+
+async def test_own_retried_write_on_ticket_id_counts_as_written():
+    collection = ScriptedCollection(BulkWriteError({"writeErrors": [duplicate(0, {"ticket_id": 1})]}), stored={"a"})
+    item = submission("FN-1", "a", attempts=1)
+
+    await pipeline_with(collection)._flush([item])
+
+    assert item.future.result() is None
+    assert item.document["ticket_id"] == "FN-1"
+
+async def test_ticket_id_taken_by_another_ticket_is_reissued():
+    collection = ScriptedCollection(BulkWriteError({"writeErrors": [duplicate(1, {"ticket_id": 1})]}), None)
+    first, second = submission("FN-1", "a"), submission("FN-2", "b")
+
+    await pipeline_with(collection)._flush([first, second])
+
+    assert first.future.done() and second.future.done()
+    assert second.document["ticket_id"] != "FN-2"
+    assert collection.batches[1] == [second.document]
+
+async def test_other_write_errors_fail_only_their_submission():
+    error = {"index": 0, "code": 121, "errmsg": "Document failed validation"}
+    collection = ScriptedCollection(BulkWriteError({"writeErrors": [error]}))
+    bad, good = submission("FN-1", "a"), submission("FN-2", "b")
+
+    await pipeline_with(collection)._flush([bad, good])
+
+    with pytest.raises(IngestFailed):
+        bad.future.result()
+    assert good.future.result() is None
+
+async def test_unknown_outcome_retries_the_batch(monkeypatch):
+    sleep = asyncio.sleep
+    monkeypatch.setattr("backend.ingestion.asyncio.sleep", lambda seconds: sleep(0))
+    collection = ScriptedCollection(AutoReconnect("primary stepped down"), None)
+    handled = []
+    pipeline = pipeline_with(collection)
+
+    async def handler(db, documents):
+        handled.extend(documents)
+
+    pipeline.on_inserted(handler)
+    items = [submission("FN-1", "a"), submission("FN-2", "b")]
+    await pipeline._flush(items)
+
+    assert len(collection.batches) == 2
+    assert [document["ticket_id"] for document in handled] == ["FN-1", "FN-2"]
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+
+from backend.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_sort, merge_filters
+
+pytestmark = pytest.mark.anyio
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123000)
+
+    token = encode_cursor(created_at, "FN-2026-0000000AB")
+
+    assert "=" not in token
+    assert decode_cursor(token) == (created_at, "FN-2026-0000000AB")
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", encode_cursor(datetime(2026, 1, 1), "x")[:-4]])
+def test_malformed_cursor_is_a_value_error(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+def test_merge_filters_keeps_top_level_operators():
+    page = keyset_filter("createdAt", "ticket_id", datetime(2026, 1, 1), "b")
+
+    assert merge_filters({}, page) == page
+    assert merge_filters({"$text": {"$search": "x"}}, page) == {"$and": [{"$text": {"$search": "x"}}, page]}
+
+async def test_keyset_pages_visit_every_document_once(db):
+    same_time = datetime(2026, 1, 2)
+    documents = [{"createdAt": same_time, "ticket_id": f"T{i}"} for i in range(5)]
+    documents += [{"createdAt": datetime(2026, 1, 1, hour), "ticket_id": f"U{hour}"} for hour in range(5)]
+    await db.items.insert_many(documents)
+
+    seen = []
+    query = {}
+    while True:
+        page = await db.items.find(query).sort(keyset_sort("createdAt", "ticket_id")).limit(3).to_list(length=None)
+        if not page:
+            break
+        seen.extend(document["ticket_id"] for document in page)
+        token = encode_cursor(page[-1]["createdAt"], page[-1]["ticket_id"])
+        query = keyset_filter("createdAt", "ticket_id", *decode_cursor(token))
+
+    assert seen == ["T4", "T3", "T2", "T1", "T0", "U4", "U3", "U2", "U1", "U0"]
@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from motor.frameworks.asyncio import run_on_executor
+
+from backend import profiling
+from backend.profiling import ProfilingMiddleware, profiler, profiling_command_listener
+
+pytestmark = pytest.mark.anyio
+
+def _command_events(request_id: int, collection: str):
+    """Started and succeeded events as pymongo publishes them from the thread running the command."""
+    started = SimpleNamespace(command_name="find", command={"find": collection}, request_id=request_id)
+    profiling_command_listener.started(started)
+    profiling_command_listener.succeeded(SimpleNamespace(command_name="find", request_id=request_id, duration_micros=1500))
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/repair-requests/probe")
+    async def probe():
+        # The same executor hop motor makes for every pymongo call
+        await run_on_executor(asyncio.get_running_loop(), _command_events, 1, "repair_requests")
+        return {"ok": True}
+
+    async def authorize(token: str) -> bool:
+        return token == "admin"
+
+    app.add_middleware(ProfilingMiddleware, authorize=authorize)
+    return app
+
+@pytest.fixture(autouse=True)
+def enabled_profiler(monkeypatch):
+    monkeypatch.setattr(profiler, "enabled", True)
+    monkeypatch.setattr(profiler, "threshold_ms", 0.0)
+    profiler.clear()
+    yield
+    profiler.clear()
+
+async def _get(headers):
+    transport = httpx.ASGITransport(app=_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get("/api/repair-requests/probe", headers=headers)
+
+async def test_mongo_commands_reach_the_request_timeline():
+    response = await _get({"X-Profile": "1", "Authorization": "Bearer admin"})
+
+    profile = profiler.get(response.headers[profiling.PROFILE_ID_HEADER])
+    detail = profile.detail()
+    assert [span["name"] for span in detail["timeline"] if span["kind"] == "mongo"] == ["find repair_requests"]
+    assert detail["timeline"][0]["duration_ms"] == 1.5
+    assert detail["call_profile_scope"] == "event_loop"
+    assert detail["call_profile"].startswith("Event loop sample: 0 other request(s)")
+
+async def test_commands_outside_a_profiled_request_are_ignored():
+    await run_on_executor(asyncio.get_running_loop(), _command_events, 2, "contact_messages")
+
+    assert profiling_command_listener._started == {}
+
+async def test_profile_header_needs_an_admin_token():
+    response = await _get({"X-Profile": "1", "Authorization": "Bearer someone"})
+
+    assert profiling.PROFILE_ID_HEADER not in response.headers
+    assert len(profiler.profiles) == 0
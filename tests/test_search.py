@@ -0,0 +1,59 @@
+import pytest
+
+from backend.search import backfill_search_fields, build_search_query, phone_suffixes, search_fields, search_tokens
+
+pytestmark = pytest.mark.anyio
+
+TICKET = {
+    "customerName": "Jane O'Neil",
+    "customerEmail": "jane.oneil@gmail.com",
+    "customerPhone": "+1 (234) 567-890",
+    "deviceBrand": "Samsung",
+    "deviceModel": "Galaxy S24",
+    "specificIssue": "Cracked screen"
+}
+
+def test_search_tokens_are_word_prefixes():
+    tokens = search_tokens(TICKET)
+
+    assert {"ja", "jan", "jane", "ga", "gal", "galaxy", "s2", "s24", "gmail"} <= set(tokens)
+    assert "j" not in tokens
+    assert tokens == sorted(tokens)
+
+def test_phone_suffixes_match_any_run_of_digits():
+    assert phone_suffixes("1234567") == ["1234567", "234567", "34567", "4567", "567"]
+    assert search_fields(TICKET)["customerPhoneDigits"] == "1234567890"
+
+@pytest.mark.parametrize("term, expected", [
+    ("fn-2026-0o1", {"ticket_id": {"$regex": "^FN-2026-001"}}),
+    ("Jane.ONeil@Gmail.com", {"customerEmail": {"$in": sorted(["Jane.ONeil@Gmail.com", "jane.oneil@gmail.com"])}}),
+    ("jane@gmail", {"searchTokens": {"$all": ["jane", "gmail"]}}),
+    ("@gmail.com", {"searchTokens": {"$all": ["gmail", "com"]}}),
+    ("(234) 567", {"customerPhoneSuffixes": {"$regex": "^234567"}}),
+    ("12", {"$text": {"$search": "12"}}),
+    ("cracked screen", {"$text": {"$search": "cracked screen"}})
+])
+def test_auto_mode_picks_an_index(term, expected):
+    query = build_search_query(term)
+    if "customerEmail" in query:
+        query["customerEmail"]["$in"].sort()
+
+    assert query == expected
+
+def test_explicit_modes():
+    assert build_search_query("Gal S2", mode="prefix") == {"searchTokens": {"$all": ["gal", "s2"]}}
+    assert build_search_query("a", mode="prefix") == {"$text": {"$search": "a"}}
+    assert build_search_query("FN-2026", mode="text") == {"$text": {"$search": "FN-2026"}}
+
+async def test_partial_email_finds_the_ticket(db):
+    await db.repair_requests.insert_one({**TICKET, **search_fields(TICKET)})
+
+    assert await db.repair_requests.count_documents(build_search_query("oneil@gmail")) == 1
+    assert await db.repair_requests.count_documents(build_search_query("jane.oneil@gmail.com")) == 1
+    assert await db.repair_requests.count_documents(build_search_query("567-89")) == 1
+
+async def test_backfill_fills_only_missing_fields(db):
+    await db.repair_requests.insert_many([dict(TICKET), {**TICKET, **search_fields(TICKET)}])
+
+    assert await backfill_search_fields(db, batch_size=1) == 1
+    assert await db.repair_requests.count_documents({"searchTokens": "galaxy"}) == 2
@@ -0,0 +1,36 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from bson import ObjectId
+
+from backend.models import RepairStatus
+from backend.serialization import EncodedJSONResponse, FastJSONResponse, dumps
+
+def test_dumps_encodes_mongo_and_model_types():
+    document = {
+        "_id": ObjectId("65f000000000000000000001"),
+        "id": UUID("12345678-1234-5678-1234-567812345678"),
+        "status": RepairStatus.COMPLETED,
+        "createdAt": datetime(2026, 1, 2, 3, 4, 5),
+        "day": date(2026, 1, 2),
+        "cost": Decimal("12.50"),
+        "name": "Jürgen"
+    }
+
+    assert json.loads(dumps(document)) == {
+        "_id": "65f000000000000000000001",
+        "id": "12345678-1234-5678-1234-567812345678",
+        "status": "Completed",
+        "createdAt": "2026-01-02T03:04:05",
+        "day": "2026-01-02",
+        "cost": 12.5,
+        "name": "Jürgen"
+    }
+
+def test_responses_send_json_bytes():
+    assert FastJSONResponse({"a": [1]}).body == b'{"a":[1]}'
+    response = EncodedJSONResponse(b'{"a":1}')
+    assert response.body == b'{"a":1}'
+    assert response.media_type == "application/json"
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockCollection
+
+from backend.stats import (
+    COUNTERS_COLLECTION, StatsReconciler, apply_transitions, counter_deltas, get_dashboard_stats,
+    reconcile_dashboard_counters
+)
+
+pytestmark = pytest.mark.anyio
+
+# Recent enough for the daily buckets reconciliation covers
+CREATED = (datetime.utcnow() - timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+DAY = CREATED.strftime("%Y-%m-%d")
+
+def ticket(status="New", **fields):
+    return {"status": status, "createdAt": CREATED, **fields}
+
+def test_counter_deltas_for_create_update_and_delete():
+    completed = ticket("Completed", actualCost=120.0)
+
+    assert counter_deltas([(None, ticket())]) == ({"total": 1, "by_status.New": 1}, {DAY: 1})
+    assert counter_deltas([(ticket(), completed)]) == (
+        {"by_status.New": -1, "by_status.Completed": 1, "revenue": 120.0}, {}
+    )
+    assert counter_deltas([(completed, None)]) == (
+        {"total": -1, "by_status.Completed": -1, "revenue": -120.0}, {DAY: -1}
+    )
+
+def test_counter_deltas_net_out_within_a_batch():
+    assert counter_deltas([(None, ticket()), (ticket(), None)]) == ({}, {})
+
+def test_revenue_needs_a_completed_status_and_a_cost():
+    assert "revenue" not in counter_deltas([(None, ticket("Completed"))])[0]
+    assert "revenue" not in counter_deltas([(None, ticket("New", actualCost=50))])[0]
+
+async def test_reconcile_corrects_drift(db):
+    await db.repair_requests.insert_many([ticket(), ticket(), ticket("Completed", actualCost=80)])
+    assert await reconcile_dashboard_counters(db)
+    await db[COUNTERS_COLLECTION].update_one({}, {"$inc": {"total": 5, "by_status.New": 5, "version": 1}})
+
+    assert await reconcile_dashboard_counters(db)
+
+    counters = await db[COUNTERS_COLLECTION].find_one()
+    assert (counters["total"], counters["by_status"], counters["revenue"]) == (3, {"New": 2, "Completed": 1}, 80)
+    assert (await db.dashboard_daily.find_one({"_id": DAY}))["created"] == 3
+
+async def test_reconcile_keeps_increments_made_while_it_runs(db, monkeypatch):
+    await db.repair_requests.insert_one(ticket())
+    await reconcile_dashboard_counters(db)
+    aggregate = AsyncMongoMockCollection.aggregate
+    raced = []
+
+    async def racing_aggregate(self, pipeline, *args, **kwargs):
+        if not raced:
+            # A ticket write lands between the snapshot and the correction
+            raced.append(True)
+            await apply_transitions(db, [(None, ticket())])
+        async for result in aggregate(self, pipeline, *args, **kwargs):
+            yield result
+
+    monkeypatch.setattr(AsyncMongoMockCollection, "aggregate", racing_aggregate)
+    assert not await reconcile_dashboard_counters(db)
+
+    assert (await db[COUNTERS_COLLECTION].find_one())["total"] == 2
+
+async def test_dashboard_stats_build_counters_on_first_use(db):
+    await db.repair_requests.insert_many([ticket(), ticket("Diagnosed"), ticket("Completed", actualCost=10)])
+
+    stats = await get_dashboard_stats(db)
+
+    assert stats["total_requests"] == 3
+    assert stats["active_requests"] == 2
+    assert stats["total_revenue"] == 10
+
+async def test_one_worker_holds_the_reconcile_lease(db):
+    first, second = StatsReconciler(interval=60), StatsReconciler(interval=60)
+
+    assert await first._take_lease(db)
+    assert not await second._take_lease(db)
+    assert await first._take_lease(db)
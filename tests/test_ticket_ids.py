@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import ticket_ids as ticket_ids_module
+from backend.ticket_ids import (
+    CROCKFORD_ALPHABET, NODES_COLLECTION, SEQUENCE_BITS, TicketIdGenerator, encode_base32, normalize_ticket_id
+)
+
+pytestmark = pytest.mark.anyio
+
+class FrozenClock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def utcnow(self) -> datetime:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FrozenClock(datetime(2026, 5, 1, 8, 0, 0))
+    monkeypatch.setattr(ticket_ids_module, "datetime", type("datetime", (datetime,), {"utcnow": staticmethod(clock.utcnow)}))
+    return clock
+
+def test_encode_base32_is_fixed_width_and_ordered():
+    values = [0, 1, 31, 32, 1 << 40]
+    encoded = [encode_base32(value) for value in values]
+
+    assert all(len(serial) == 9 for serial in encoded)
+    assert encoded == sorted(encoded)
+    assert set("".join(encoded)) <= set(CROCKFORD_ALPHABET)
+
+def test_normalize_maps_look_alikes_in_the_serial_only():
+    assert normalize_ticket_id(" fn-2026-0oil1 ") == "FN-2026-00111"
+    assert normalize_ticket_id("fnol") == "FNOL"
+
+def test_ids_are_unique_and_sortable_within_a_second(clock):
+    generator = TicketIdGenerator()
+    generator.node_id = 7
+
+    ids = [generator.next_id() for _ in range(1000)]
+
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert all(ticket_id.startswith("FN-2026-") for ticket_id in ids)
+
+def test_clock_stepping_back_keeps_ids_increasing(clock):
+    generator = TicketIdGenerator()
+    first = generator.next_id()
+    clock.now -= timedelta(seconds=30)
+
+    assert generator.next_id() > first
+
+def test_exhausted_sequence_borrows_the_next_second(clock):
+    generator = TicketIdGenerator()
+    ids = [generator.next_id() for _ in range((1 << SEQUENCE_BITS) + 1)]
+
+    assert len(set(ids)) == len(ids)
+    assert ids[-1] > ids[-2]
+
+async def test_workers_lease_different_nodes(db):
+    first, second = TicketIdGenerator(), TicketIdGenerator()
+    second.node_id = first.node_id
+
+    await first._lease(db)
+    await second._lease(db)
+
+    assert first.leased and second.leased
+    assert first.node_id != second.node_id
+    assert await db[NODES_COLLECTION].count_documents({}) == 2
+
+async def test_stop_releases_the_node(db):
+    generator = TicketIdGenerator()
+    await generator._lease(db)
+
+    await generator.stop(db)
+
+    assert not generator.leased
+    assert await db[NODES_COLLECTION].count_documents({}) == 0